@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Détection des croisements de liens par balayage
+
+Pour chaque palier, les liens sont triés selon leur abscisse minimale, puis
+balayés de gauche à droite. Seuls les liens dont les intervalles d'abscisses
+se chevauchent (liens «actifs», conservés dans un tas selon leur abscisse
+maximale) sont confrontés entre eux, et seulement si leurs intervalles
+d'ordonnées se chevauchent aussi.
+
+Le critère de croisement est celui de «carte_est_valide» : deux liens de
+même palier sans nœud commun se croisent si leurs segments se coupent en un
+point. Les segments parallèles ne sont pas considérés comme sécants.
+
+Il ne s'agit pas d'un balayage de Bentley-Ottmann : le coût est en
+O(E log E + P), où P est le nombre de paires de liens dont les intervalles
+d'abscisses se chevauchent. Il est quasi linéaire pour des liens courts et
+épars, comme ceux d'un réseau joué, mais reste quadratique (O(E²)) dans le
+pire cas, par exemple pour des liens longs qui se chevauchent tous.
+"""
+
+# Dépendance(s) standard(s)
+import heapq
+
+# Dépendance(s) interne(s)
+
+# Dépendance(s) externe(s)
+
+
+def se_croisent(x1, y1, x2, y2, x3, y3, x4, y4):
+    """Vrai ssi les segments [(x1, y1), (x2, y2)] et [(x3, y3), (x4, y4)] se
+    coupent, hors cas des segments parallèles
+    """
+    retour = False
+    v1x = x2 - x1
+    v1y = y2 - y1
+    v2x = x4 - x3
+    v2y = y4 - y3
+    # Équation à vérifier (en deux dimensions) :
+    # v1 * t1 - v2 * t2 = nid2 - nid1
+    # avec t1 ∈ [0, 1] et t2 ∈ [0, 1]
+    dét = v1y * v2x - v1x * v2y
+    if dét != 0:
+        ex = x3 - x1
+        ey = y3 - y1
+        t1 = (v2x * ey - v2y * ex) / dét
+        t2 = (v1x * ey - v1y * ex) / dét
+        retour = 0 <= t1 <= 1 and 0 <= t2 <= 1
+    return retour
+
+
+def segments(liens):
+    """Liste des segments associés aux liens binaires, sous la forme
+    (xmin, xmax, ymin, ymax, extrémités, identifiants des nœuds, lien)
+    """
+    retour = list()
+    for lien in liens:
+        p0 = lien.liaisons[0]["position"]
+        p1 = lien.liaisons[1]["position"]
+        extrémités = (p0.largeur, p0.hauteur, p1.largeur, p1.hauteur)
+        retour.append((min(p0.largeur, p1.largeur),
+                       max(p0.largeur, p1.largeur),
+                       min(p0.hauteur, p1.hauteur),
+                       max(p0.hauteur, p1.hauteur),
+                       extrémités,
+                       (id(lien.liaisons[0]), id(lien.liaisons[1])),
+                       lien))
+    return retour
+
+
+def balayer(liens):
+    """Énumère les paires de liens sécants parmi ceux fournis, tous supposés
+    de même palier, en O(E log E + P) (voir plus haut)
+    """
+    à_balayer = segments(liens)
+    à_balayer.sort(key=lambda s: s[0])
+    actifs = list()
+    for k, s in enumerate(à_balayer):
+        xmin, xmax, ymin, ymax, extrémités, nœuds, lien = s
+        # Éviction des segments entièrement à gauche du segment courant
+        while len(actifs) > 0 and actifs[0][0] < xmin:
+            heapq.heappop(actifs)
+        for _, _, a in actifs:
+            if (a[2] <= ymax and ymin <= a[3]
+                    and a[5][0] not in nœuds and a[5][1] not in nœuds
+                    and se_croisent(*a[4], *extrémités)):
+                yield a[6], lien
+        heapq.heappush(actifs, (xmax, k, s))
+
+
+def par_palier(graphe):
+    """Répartition des liens binaires du graphe selon leur palier
+    """
+    retour = dict()
+    for lien in graphe.iter_liens():
+        if len(lien.liaisons) == 2:
+            retour.setdefault(lien["palier"], list()).append(lien)
+    return retour
+
+
+def croisements(graphe, palier=None):
+    """Énumère toutes les paires de liens sécants du graphe, éventuellement
+    restreintes à un unique palier
+    """
+    for p, liens in par_palier(graphe).items():
+        if palier is None or p == palier:
+            yield from balayer(liens)
+
+
+def carte_est_valide(graphe):
+    """Un graphe est valide si aucun lien ne croise un autre lien de même
+    'palier'
+    """
+    retour = True
+    for _ in croisements(graphe):
+        retour = False
+        break
+    return retour
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Bancs de mesure des performances
+
+- «allocations» : nombre de vecteurs «V2» construits par appel des fonctions
+  géométriques, et durée moyenne d'un appel ;
+- «suite» : durée des opérations du jeu sur des niveaux et des réseaux
+  générés de tailles croissantes.
+
+Les résultats sont écrits sur la sortie standard (ou ajoutés à un fichier), à
+raison d'un objet JSON par ligne, afin d'être comparés d'une version à
+l'autre.
+"""
+
+# Dépendance(s) standard(s)
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Dépendance(s) interne(s)
+import balayage
+import contraintes
+import format_binaire
+import générateur
+import échangeur
+
+# Dépendance(s) externe(s)
+
+
+@contextlib.contextmanager
+def compter_instances(classe):
+    """Compte les instances de la classe construites au sein du bloc
+    """
+    compteur = [0]
+    initialiser = classe.__init__
+
+    def compter(self, *args, **kwargs):
+        compteur[0] += 1
+        initialiser(self, *args, **kwargs)
+
+    classe.__init__ = compter
+    try:
+        yield compteur
+    finally:
+        classe.__init__ = initialiser
+
+
+def mesurer(nom, fonction, appels, **contexte):
+    """Nombre de V2 construits et durée moyenne par appel de la fonction
+    """
+    with compter_instances(échangeur.V2) as compteur:
+        for a in appels[:100]:
+            fonction(*a)
+    instances = compteur[0] / min(len(appels), 100)
+
+    début = time.perf_counter()
+    for a in appels:
+        fonction(*a)
+    durée = (time.perf_counter() - début) / len(appels)
+
+    return dict(banc=nom, v2_par_appel=instances, secondes_par_appel=durée,
+                **contexte)
+
+
+def bancs_allocations(graine=1977, répétitions=2000):
+    aléa = random.Random(graine)
+    V2 = échangeur.V2
+
+    def point():
+        return V2(aléa.randint(0, 640), aléa.randint(0, 480))
+
+    obstacle = échangeur.Obstacle(V2(200, 200), V2(260, 240),
+                                  échangeur.Biome.USINE)
+    segments = [(point(), point()) for _ in range(répétitions)]
+    yield mesurer("Obstacle.intersection", obstacle.intersection, segments)
+
+    quadruplets = [(a, b - a, c, d - c)
+                   for (a, b), (c, d) in zip(segments, reversed(segments))]
+    yield mesurer("intersection", échangeur.intersection, quadruplets)
+    octuplets = [(a.largeur, a.hauteur, v.largeur, v.hauteur,
+                  c.largeur, c.hauteur, w.largeur, w.hauteur)
+                 for a, v, c, w in quadruplets]
+    yield mesurer("intersection_coordonnées",
+                  échangeur.intersection_coordonnées, octuplets)
+
+    niveau = échangeur.Niveau(moteur=échangeur.Moteur.SCALAIRE)
+    niveau.obstacles.append(obstacle)
+    nœuds = générateur.réseau(niveau, graine, 200, 150)
+    positions = [(point(),) for _ in range(répétitions // 10)]
+    yield mesurer("lien_proche (référence)",
+                  lambda p: échangeur.lien_proche(niveau.graphe, p),
+                  positions, liens=150)
+    yield mesurer("Niveau.lien_proche", niveau.lien_proche, positions,
+                  liens=150)
+    mouvements = [(aléa.choice(nœuds), point())
+                  for _ in range(répétitions // 10)]
+    yield mesurer("Niveau.valider_mouvement", niveau.valider_mouvement,
+                  mouvements, liens=150)
+
+
+# Nombre de liens au-delà duquel les implémentations de référence, en temps
+# quadratique, ne sont plus mesurées
+TAILLE_MAX_RÉFÉRENCE = 2000
+
+
+def chronométrer(fonction, répétitions, préparation=None):
+    """Durée médiane d'un appel de la fonction, en secondes
+
+    'préparation', si fournie, est appelée avant chaque mesure, hors
+    chronométrage, et son résultat est passé à la fonction.
+    """
+    durées = list()
+    for _ in range(répétitions):
+        arguments = () if préparation is None else (préparation(),)
+        début = time.perf_counter()
+        fonction(*arguments)
+        durées.append(time.perf_counter() - début)
+    return statistics.median(durées)
+
+
+def supprimer(nom_fichier):
+    """Supprime le fichier de niveau, et sa forme compilée le cas échéant
+    """
+    os.remove(nom_fichier)
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(format_binaire.chemin_cache(nom_fichier))
+
+
+def niveau_généré(graine, taille):
+    """Niveau et réseau générés, dimensionnés selon 'taille' (nombre de
+    liens du réseau)
+    """
+    description = générateur.niveau(graine, routes=max(4, taille // 50),
+                                     obstacles=max(1, taille // 100),
+                                     liaisons=max(1, taille // 100))
+    with tempfile.NamedTemporaryFile("wt", suffix=".json", delete=False,
+                                     encoding="utf-8") as fichier:
+        json.dump(description, fichier, ensure_ascii=False)
+    try:
+        niveau = échangeur.Niveau()
+        niveau.charger(fichier.name)
+        nœuds = générateur.réseau(niveau, graine, taille, taille)
+    finally:
+        supprimer(fichier.name)
+    return description, niveau, nœuds
+
+
+def bancs_suite(graine=1977, tailles=(100, 1000, 5000), répétitions=20):
+    # Le trafic repose sur NumPy, dont les autres bancs se passent
+    try:
+        import trafic
+    except ImportError:
+        trafic = None
+    aléa = random.Random(graine)
+    V2 = échangeur.V2
+
+    def point():
+        return V2(aléa.uniform(0, générateur.LARGEUR),
+                  aléa.uniform(0, générateur.HAUTEUR))
+
+    for taille in tailles:
+        description, niveau, nœuds = niveau_généré(graine, taille)
+        graphe = niveau.graphe
+
+        def mesure(nom, fonction, préparation=None, n=répétitions):
+            return dict(banc=nom, taille=taille, répétitions=n,
+                        secondes=chronométrer(fonction, n, préparation))
+
+        # Chargement
+        with tempfile.NamedTemporaryFile("wt", suffix=".json", delete=False,
+                                         encoding="utf-8") as fichier:
+            json.dump(description, fichier, ensure_ascii=False)
+        try:
+            yield mesure("Niveau.charger",
+                         lambda: échangeur.Niveau().charger(fichier.name))
+        finally:
+            supprimer(fichier.name)
+
+        # Validité de la carte
+        if taille <= TAILLE_MAX_RÉFÉRENCE:
+            yield mesure("carte_est_valide (référence)",
+                         lambda: échangeur.carte_est_valide(graphe), n=3)
+        yield mesure("carte_est_valide (balayage)",
+                     lambda: sum(1 for _ in balayage.croisements(graphe)))
+        if contraintes.numpy_disponible():
+            import vectoriel
+            yield mesure("carte_est_valide (numpy)",
+                         lambda: sum(1 for _ in vectoriel.croisements(
+                             vectoriel.Segments(graphe.iter_liens()))))
+
+        # Déplacements
+        for moteur in échangeur.Moteur:
+            niveau.choisir_moteur(moteur)
+            if niveau.moteur == moteur:
+                yield mesure(f"valider_mouvement ({moteur.name.lower()})",
+                             lambda m: niveau.valider_mouvement(*m),
+                             lambda: (aléa.choice(nœuds), point()))
+
+        # Désignation
+        if taille <= TAILLE_MAX_RÉFÉRENCE:
+            yield mesure("nœud_proche (référence)",
+                         lambda p: échangeur.nœud_proche(graphe, p), point)
+            yield mesure("lien_proche (référence)",
+                         lambda p: échangeur.lien_proche(graphe, p), point)
+        yield mesure("nœud_proche", niveau.nœud_proche, point)
+        yield mesure("lien_proche", niveau.lien_proche, point)
+
+        # Complétude, sans puis avec changement de topologie
+        yield mesure("est_complet (inchangé)", niveau.est_complet)
+
+        def modifier():
+            l = graphe.ajouter_lien()
+            l["palier"] = 0
+            l.associer(*aléa.sample(nœuds, 2))
+            graphe.supprimer_lien(l)
+
+        yield mesure("est_complet (modifié)", lambda _: niveau.est_complet(),
+                     modifier)
+
+        # Trafic, sur le réseau raccordé aux routes
+        générateur.raccorder(niveau)
+        if trafic is not None:
+            simulation = trafic.Trafic(niveau)
+            for _ in range(600):
+                simulation.avancer(0.1)
+            yield dict(mesure("Trafic.avancer",
+                              lambda: simulation.avancer(0.1)),
+                       véhicules=len(simulation))
+
+        # Fusions, en dernier car elles consomment le réseau
+        restants = list(nœuds)
+        aléa.shuffle(restants)
+
+        def paire():
+            nid = restants.pop()
+            but, _ = niveau.nœud_proche(nid["position"], nid)
+            return nid, but
+
+        yield mesure("fusionner_nœuds", lambda p: graphe.fusionner_nœuds(*p),
+                     paire, n=min(répétitions, len(nœuds) // 2))
+
+
+def contexte():
+    """Description de l'environnement de mesure, jointe à chaque résultat
+    """
+    try:
+        version = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                 capture_output=True, text=True,
+                                 cwd=os.path.dirname(__file__) or ".",
+                                 check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        version = None
+    return dict(date=datetime.datetime.now().isoformat(timespec="seconds"),
+                version=version, python=platform.python_version())
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    analyseur.add_argument("bancs", nargs="*", metavar="banc",
+                           help="allocations, suite (par défaut : tous)")
+    analyseur.add_argument("--graine", type=int, default=1977)
+    analyseur.add_argument("--tailles", type=int, nargs="+",
+                           default=[100, 1000, 5000],
+                           help="nombres de liens des réseaux de la suite")
+    analyseur.add_argument("--sortie", help="fichier auquel ajouter les "
+                           "résultats, plutôt que la sortie standard")
+    arguments = analyseur.parse_args()
+
+    sortie = sys.stdout
+    if arguments.sortie is not None:
+        sortie = open(arguments.sortie, "at", encoding="utf-8")
+    environnement = contexte()
+
+    for b in arguments.bancs or ["allocations", "suite"]:
+        if b == "allocations":
+            résultats = bancs_allocations(arguments.graine)
+        elif b == "suite":
+            résultats = bancs_suite(arguments.graine, arguments.tailles)
+        else:
+            analyseur.error(f"banc inconnu : {b}")
+        for r in résultats:
+            print(json.dumps(dict(r, **environnement), ensure_ascii=False),
+                  file=sortie)
+            sortie.flush()
+
+    if sortie is not sys.stdout:
+        sortie.close()
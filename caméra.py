@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Portion du monde affichée à l'écran
+
+La caméra associe aux coordonnées du monde celles de l'écran : le coin
+supérieur gauche de l'écran montre le point d'origine de la caméra, et une
+unité du monde y occupe 'zoom' pixels. Elle ne dépend pas de pygame : le
+rejeu d'une session, sans affichage, convertit les positions de la souris
+exactement comme pendant la partie.
+"""
+
+# Dépendance(s) standard(s)
+
+# Dépendance(s) interne(s)
+
+# Dépendance(s) externe(s)
+
+
+# Bornes du facteur de zoom : la vue la plus large montre huit fois les
+# dimensions de l'écran dans chaque direction
+ZOOM_MIN = 1 / 8
+ZOOM_MAX = 4
+
+
+class Caméra:
+    """Vue de dimensions fixes (en pixels) sur le monde, déplaçable et
+    zoomable
+    """
+
+    def __init__(self, largeur, hauteur):
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.x = 0
+        self.y = 0
+        self.zoom = 1
+
+    def vers_écran(self, x, y):
+        """Position à l'écran du point du monde donné
+        """
+        return ((x - self.x) * self.zoom, (y - self.y) * self.zoom)
+
+    def vers_monde(self, x, y):
+        """Point du monde affiché à la position donnée de l'écran
+        """
+        return (self.x + x / self.zoom, self.y + y / self.zoom)
+
+    def visible(self, marge=0):
+        """Rectangle (xmin, ymin, xmax, ymax) du monde affiché, élargi de
+        'marge' pixels de chaque côté
+        """
+        xmin, ymin = self.vers_monde(-marge, -marge)
+        xmax, ymax = self.vers_monde(self.largeur + marge,
+                                     self.hauteur + marge)
+        return (xmin, ymin, xmax, ymax)
+
+    def défiler(self, dx, dy):
+        """Déplace la vue de (dx, dy) pixels
+        """
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+
+    def zoomer(self, facteur, x=None, y=None):
+        """Multiplie le zoom par 'facteur', dans les limites permises, sans
+        déplacer le point du monde affiché à la position (x, y) de l'écran
+        (par défaut, son centre)
+        """
+        if x is None:
+            x = self.largeur / 2
+        if y is None:
+            y = self.hauteur / 2
+        fixe = self.vers_monde(x, y)
+        self.zoom = min(max(self.zoom * facteur, ZOOM_MIN), ZOOM_MAX)
+        self.x = fixe[0] - x / self.zoom
+        self.y = fixe[1] - y / self.zoom
+
+    def réinitialiser(self):
+        """Revient à la vue initiale : origine du monde, sans zoom
+        """
+        self.x = 0
+        self.y = 0
+        self.zoom = 1
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Suivi incrémental de la connexité d'un graphe
+
+Les composantes connexes sont maintenues par une structure union-find dont
+les éléments sont les nœuds comme les liens. Les ajouts de relations sont
+pris en compte immédiatement ; une rupture de relation invalide la
+structure, qui sera reconstruite en une passe lors de la prochaine question.
+"""
+
+# Dépendance(s) standard(s)
+
+# Dépendance(s) interne(s)
+import graphe
+
+# Dépendance(s) externe(s)
+
+
+class Connexité(graphe.Observateur):
+
+    def __init__(self, graphe):
+        self.graphe = graphe
+        self.parents = dict()
+        self.tailles = dict()
+        # Compteur des changements de topologie
+        self.version = 0
+        self.à_reconstruire = True
+        graphe.abonner(self)
+
+    def reconstruire(self):
+        self.parents.clear()
+        self.tailles.clear()
+        for l in self.graphe.iter_liens():
+            for n in l.liaisons:
+                self.unir(l, n)
+        self.à_reconstruire = False
+
+    def racine(self, item):
+        racine = item
+        parent = self.parents.get(racine, racine)
+        while parent is not racine:
+            racine = parent
+            parent = self.parents.get(racine, racine)
+        # Compression du chemin parcouru
+        while item is not racine:
+            suivant = self.parents[item]
+            self.parents[item] = racine
+            item = suivant
+        return racine
+
+    def unir(self, a, b):
+        ra = self.racine(a)
+        rb = self.racine(b)
+        if ra is not rb:
+            ta = self.tailles.get(ra, 1)
+            tb = self.tailles.get(rb, 1)
+            if ta < tb:
+                ra, rb = rb, ra
+            self.parents[rb] = ra
+            self.tailles[ra] = ta + tb
+
+    def sont_connectés(self, nid, but):
+        """Vrai ssi un chemin existe entre les deux éléments
+        """
+        if self.à_reconstruire:
+            self.reconstruire()
+        return self.racine(nid) is self.racine(but)
+
+    # Suivi des modifications du graphe
+
+    def associés(self, item, autre):
+        self.version += 1
+        if not self.à_reconstruire:
+            self.unir(item, autre)
+
+    def détachés(self, item, autre):
+        self.version += 1
+        self.à_reconstruire = True
+
+    def nœud_supprimé(self, nœud):
+        self.version += 1
+        self.à_reconstruire = True
+
+    def lien_supprimé(self, lien):
+        self.version += 1
+        self.à_reconstruire = True
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""Vérification incrémentale des règles de cohérence d'un réseau
+
+Les liens sont rangés par palier dans des grilles uniformes, tenues à jour au
+fil des modifications du graphe. Un mouvement de nœud ou un changement de
+palier n'est alors confronté qu'aux liens voisins du même palier, sans
+modifier le graphe.
+
+Les liens sont aussi répertoriés par direction : le critère d'intersection
+tient deux segments parallèles pour sécants dès qu'ils sont portés par la
+même droite, à n'importe quelle distance (voir «intersection_coordonnées»),
+ce qu'une grille ne voit pas.
+"""
+
+# Dépendance(s) standard(s)
+import fractions
+import importlib.util
+import math
+
+# Dépendance(s) interne(s)
+import balayage
+import géométrie
+import graphe
+import index_spatial
+
+# Dépendance(s) externe(s)
+
+
+def numpy_disponible():
+    """Vrai ssi NumPy, sur lequel repose le module «vectoriel», est
+    installé. Ce module n'est importé qu'au premier test par lots : NumPy
+    alourdit sensiblement le chargement du jeu.
+    """
+    return importlib.util.find_spec("numpy") is not None
+
+
+def direction(dx, dy):
+    """Clef commune à toutes les directions parallèles à (dx, dy) : la pente,
+    en valeur exacte, ou None pour une direction nulle
+    """
+    if dx == 0:
+        retour = None if dy == 0 else math.inf
+    else:
+        retour = fractions.Fraction(dy) / fractions.Fraction(dx)
+    return retour
+
+
+class MoteurContraintes(graphe.Observateur):
+    """Arbitre des mouvements de nœuds et des changements de palier.
+
+    'obstacles' est la liste (partagée) des obstacles du niveau, et 'critère'
+    la fonction de test d'intersection de deux segments, appelée sous la
+    forme critère(x1, y1, v1x, v1y, x2, y2, v2x, v2y). 'cache_géométrie' est
+    le cache de la géométrie des liens du graphe, et 'index_obstacles' l'index
+    des obstacles, tous deux créés au besoin.
+
+    Si 'vectoriel' est vrai, les candidats sont testés par lots à l'aide du
+    module «vectoriel» plutôt qu'un par un. Si 'colinéaires_lointains' est
+    faux, un segment n'est plus confronté qu'aux liens et aux obstacles qu'il
+    touche effectivement : les segments portés par la même droite que lui ne
+    comptent que s'ils recoupent sa boîte englobante (voir «candidats» et
+    «obstacles_voisins»).
+    """
+
+    def __init__(self, graphe, obstacles, critère, cache_géométrie=None,
+                 index_obstacles=None, côté=32):
+        self.graphe = graphe
+        self.obstacles = obstacles
+        if index_obstacles is None:
+            index_obstacles = index_spatial.IndexObstacles(obstacles)
+        self.index_obstacles = index_obstacles
+        self.critère = critère
+        if cache_géométrie is None:
+            cache_géométrie = géométrie.GéométrieLiens(graphe)
+        self.géométrie = cache_géométrie
+        self.côté = côté
+        self.vectoriel = False
+        self.colinéaires_lointains = True
+        self.paliers = dict()
+        # Par palier, liens selon leur direction (voir «direction»)
+        self.directions = dict()
+        self.rangements = dict()
+        for l in graphe.iter_liens():
+            self.ranger(l)
+        graphe.abonner(self)
+
+    def ranger(self, lien):
+        """(Re)place le lien dans la grille et le répertoire des directions
+        de son palier
+        """
+        rangement = self.rangements.pop(lien, None)
+        if rangement is not None:
+            palier, clef = rangement
+            self.paliers[palier].retirer(lien)
+            parallèles = self.directions[palier][clef]
+            parallèles.discard(lien)
+            if len(parallèles) == 0:
+                del self.directions[palier][clef]
+
+        if ("palier" in lien and len(lien.liaisons) == 2
+                and all("position" in n for n in lien.liaisons)):
+            palier = lien["palier"]
+            grille = self.paliers.setdefault(palier,
+                                             index_spatial.Grille(self.côté))
+            p0 = lien.liaisons[0]["position"]
+            p1 = lien.liaisons[1]["position"]
+            grille.insérer(lien, grille.cases_segment(
+                p0.largeur, p0.hauteur, p1.largeur, p1.hauteur))
+            clef = direction(p1.largeur - p0.largeur,
+                             p1.hauteur - p0.hauteur)
+            self.directions.setdefault(palier, dict()).setdefault(
+                clef, set()).add(lien)
+            self.rangements[lien] = (palier, clef)
+
+    def détacher(self):
+        """Cesse de suivre le graphe. Seuls restent disponibles les tests
+        contre les obstacles («obstacles_voisins»).
+        """
+        self.graphe.désabonner(self)
+        self.paliers = None
+        self.directions = None
+        self.rangements = None
+
+    def voisins(self, palier, p0, p1):
+        """Liens du palier susceptibles de croiser le segment [p0, p1]
+        """
+        if self.paliers is None:
+            raise RuntimeError("Arbitre des mouvements détaché du graphe")
+        retour = set()
+        grille = self.paliers.get(palier)
+        if grille is not None:
+            for c in grille.cases_segment(p0.largeur, p0.hauteur,
+                                          p1.largeur, p1.hauteur):
+                retour.update(grille.cases.get(c, ()))
+        return retour
+
+    def parallèles(self, palier, p0, p1):
+        """Liens du palier parallèles au segment [p0, p1], à n'importe quelle
+        distance, et liens réduits à un point (parallèles à tout segment)
+        """
+        retour = set()
+        directions = self.directions.get(palier)
+        clef = direction(p1.largeur - p0.largeur, p1.hauteur - p0.hauteur)
+        # Un segment réduit à un point ne coupe jamais un lien
+        if directions is not None and clef is not None:
+            retour.update(directions.get(clef, ()))
+            retour.update(directions.get(None, ()))
+        return retour
+
+    # Suivi des modifications du graphe
+
+    def lien_supprimé(self, lien):
+        self.ranger(lien)
+
+    def associés(self, item, autre):
+        self.ranger(item if item.est_arête else autre)
+
+    def détachés(self, item, autre):
+        self.ranger(item if item.est_arête else autre)
+
+    def attribut_modifié(self, item, clef, ancienne):
+        if item.est_arête:
+            if clef == "palier":
+                self.ranger(item)
+        elif clef == "position":
+            for l in item.liaisons:
+                self.ranger(l)
+
+    # Règles
+
+    def candidats(self, lien, palier, p0, p1, colinéaires=True):
+        """Liens du palier, sans nœud commun avec le lien, susceptibles de
+        croiser le segment [p0, p1]
+
+        Si 'colinéaires' est vrai, les liens portés par la même droite que le
+        segment sont sécants (critère de «mouvement_valide») : tous les liens
+        parallèles sont alors candidats, ou seulement ceux qui recoupent la
+        boîte englobante du segment si 'colinéaires_lointains' est faux.
+        """
+        proches = self.voisins(palier, p0, p1)
+        if colinéaires and self.colinéaires_lointains:
+            proches |= self.parallèles(palier, p0, p1)
+        elif colinéaires:
+            xmin, xmax = sorted((p0.largeur, p1.largeur))
+            ymin, ymax = sorted((p0.hauteur, p1.hauteur))
+            géométrie = self.géométrie
+            proches = [autre for autre in proches
+                       if géométrie[autre].xmin <= xmax
+                       and xmin <= géométrie[autre].xmax
+                       and géométrie[autre].ymin <= ymax
+                       and ymin <= géométrie[autre].ymax]
+        return [autre for autre in proches
+                if not any(n in lien.liaisons for n in autre.liaisons)]
+
+    def obstacles_voisins(self, p0, p1):
+        """Obstacles susceptibles de toucher le segment [p0, p1] : ceux qui
+        le touchent, et ceux dont un bord est porté par la même droite que
+        lui, à moins que 'colinéaires_lointains' soit faux (voir
+        «IndexObstacles.croisant»)
+        """
+        return self.index_obstacles.croisant(p0.largeur, p0.hauteur,
+                                             p1.largeur, p1.hauteur,
+                                             self.colinéaires_lointains)
+
+    def mouvement_valide(self, sommet, position):
+        """Vrai ssi aucun des liens du sommet, une fois celui-ci déplacé à la
+        position donnée, n'intersecte un obstacle ou un lien de même palier
+        sans nœud commun
+        """
+        retour = True
+        for lien in sommet.liaisons:
+            p0, p1 = [position if n is sommet else n["position"]
+                      for n in lien.liaisons]
+            candidats = self.candidats(lien, lien["palier"], p0, p1)
+            if self.vectoriel:
+                retour = not self.intersections_vectorielles(p0, p1,
+                                                             candidats)
+            else:
+                retour = not self.intersections_scalaires(p0, p1, candidats)
+            if not retour:
+                break
+
+        return retour
+
+    def intersections_scalaires(self, p0, p1, candidats):
+        retour = False
+        for o in self.obstacles_voisins(p0, p1):
+            if o.intersection(p0, p1):
+                retour = True
+                break
+
+        if not retour:
+            x = p0.largeur
+            y = p0.hauteur
+            vx = p1.largeur - x
+            vy = p1.hauteur - y
+            for autre in candidats:
+                g = self.géométrie[autre]
+                if self.critère(x, y, vx, vy, g.x, g.y, g.dx, g.dy):
+                    retour = True
+                    break
+        return retour
+
+    def intersections_vectorielles(self, p0, p1, candidats):
+        import vectoriel
+        nid = (p0.largeur, p0.hauteur)
+        v = (p1.largeur - p0.largeur, p1.hauteur - p0.hauteur)
+        retour = any(o.intersection(p0, p1)
+                     for o in self.obstacles_voisins(p0, p1))
+        if not retour and len(candidats) > 0:
+            segments = vectoriel.Segments.de_géométrie(
+                candidats, self.géométrie)
+            retour = vectoriel.intersections(
+                nid, v, segments.origines, segments.directions).any()
+        return bool(retour)
+
+    def palier_valide(self, lien, palier):
+        """Vrai ssi le lien peut passer au palier donné sans croiser un autre
+        lien de ce palier
+        """
+        retour = True
+        p0 = lien.liaisons[0]["position"]
+        p1 = lien.liaisons[1]["position"]
+        candidats = self.candidats(lien, palier, p0, p1, colinéaires=False)
+        if self.vectoriel:
+            if len(candidats) > 0:
+                import vectoriel
+                segments = vectoriel.Segments.de_géométrie(
+                    candidats, self.géométrie)
+                retour = not vectoriel.intersections(
+                    (p0.largeur, p0.hauteur),
+                    (p1.largeur - p0.largeur, p1.hauteur - p0.hauteur),
+                    segments.origines, segments.directions,
+                    colinéaires=False).any()
+        else:
+            for autre in candidats:
+                g = self.géométrie[autre]
+                if balayage.se_croisent(p0.largeur, p0.hauteur,
+                                        p1.largeur, p1.hauteur,
+                                        g.x, g.y, g.x + g.dx, g.y + g.dy):
+                    retour = False
+                    break
+        return retour
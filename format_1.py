@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 # Dépendance(s) standard(s)
+import argparse
+import concurrent.futures
 import json
 import logging
 import os
@@ -8,17 +10,23 @@ import os
 # Dépendance(s) interne(s)
 
 # Dépendance(s) externe(s)
-import jsonschema
+# jsonschema, importé à la première validation : un niveau lu depuis le
+# cache n'est pas revalidé
 
 
 class Validateur:
     """Validation JSON schema
+
+    Chaque schéma, ou sous-schéma de ses «$defs», n'est compilé qu'une fois,
+    à sa première utilisation, puis réutilisé d'une validation à l'autre.
     """
 
     def __init__(self, chemin):
         """Charge tous les schémas disponibles au chemin correspondant
         """
         self.schémas = dict()
+        # Validateurs compilés, par (nom du schéma, sous-référence)
+        self.compilés = dict()
         chemin, répertoires, fichiers = next(os.walk(chemin))
         for f in fichiers:
             if f.endswith(".schema.json"):
@@ -26,13 +34,31 @@ class Validateur:
                     schéma = json.loads(flux.read())
                     self.schémas[f[:-12]] = schéma
 
+    def compiler(self, nom_schéma, sous_réf):
+        """Validateur du schéma, ou de l'une de ses définitions
+        """
+        clef = (nom_schéma, sous_réf)
+        retour = self.compilés.get(clef)
+        if retour is None:
+            import jsonschema
+            schéma = self.schémas[nom_schéma]
+            classe = jsonschema.validators.validator_for(schéma)
+            classe.check_schema(schéma)
+            if sous_réf is not None:
+                # La définition est désignée depuis la racine du schéma, afin
+                # que ses propres références «#/$defs/…» y soient résolues
+                schéma = dict(schéma)
+                schéma.pop("oneOf", None)
+                schéma["$ref"] = f"#/$defs/{sous_réf}"
+            retour = classe(schéma)
+            self.compilés[clef] = retour
+        return retour
+
     def valider(self, nom_schéma, sous_réf, contenu):
+        import jsonschema
         retour = True
         try:
-            schéma = self.schémas[nom_schéma]
-            if sous_réf is not None:
-                schéma = schéma["$defs"][sous_réf]
-            jsonschema.validate(contenu, schéma)
+            self.compiler(nom_schéma, sous_réf).validate(contenu)
         except jsonschema.exceptions.ValidationError as e:
             logging.warning(f"Non-respect du format «{nom_schéma}»")
             logging.warning(e)
@@ -44,11 +70,111 @@ class Validateur:
         return retour
 
 
+# Validateurs déjà construits, par répertoire de schémas
+VALIDATEURS = dict()
+
+
+def validateur(chemin):
+    """Validateur des schémas du répertoire, construit au premier appel puis
+    partagé
+    """
+    clef = os.path.realpath(chemin)
+    retour = VALIDATEURS.get(clef)
+    if retour is None:
+        retour = Validateur(clef)
+        VALIDATEURS[clef] = retour
+    return retour
+
+
+# Définition du schéma décrivant chaque version du format
+DÉFINITIONS = {"1": "niveau", "2": "monde"}
+
+
+def définition(contenu):
+    """Définition du schéma à laquelle le contenu doit se conformer, selon
+    sa version
+    """
+    version = contenu.get("version") if isinstance(contenu, dict) else None
+    return DÉFINITIONS.get(version, "niveau")
+
+
 def charger(nom_fichier, nom_schéma, validateur):
-    contenu = dict()
     with open(nom_fichier, "rt") as entrée:
         données = entrée.read()
-        contenu = json.loads(données)
-    # if not validateur.valider(nom_schéma, "niveau", contenu):
-    #    logging.warning(f"Pas moyen de valider '{nom_fichier}'")
+    return décoder(données, nom_fichier, nom_schéma, validateur)
+
+
+def décoder(données, nom_fichier, nom_schéma, validateur):
+    """Contenu du texte JSON lu dans le fichier, vérifié selon le schéma
+    """
+    contenu, _ = décoder_et_valider(données, nom_fichier, nom_schéma,
+                                    validateur)
     return contenu
+
+
+def décoder_et_valider(données, nom_fichier, nom_schéma, validateur):
+    """Contenu du texte JSON lu dans le fichier, et vrai ssi il se conforme
+    au schéma
+    """
+    contenu = json.loads(données)
+    valide = validateur.valider(nom_schéma, définition(contenu), contenu)
+    if not valide:
+        logging.warning(f"Pas moyen de valider '{nom_fichier}'")
+    return contenu, valide
+
+
+def valider_fichier(nom_fichier, nom_schéma, sous_réf, chemin_schémas):
+    """Vrai ssi le fichier respecte le schéma ('sous_réf' valant None,
+    selon sa version). Destinée à être exécutée dans un processus de
+    «valider_répertoire», où le validateur est conservé d'un fichier à
+    l'autre.
+    """
+    try:
+        with open(nom_fichier, "rt") as entrée:
+            contenu = json.loads(entrée.read())
+    except (OSError, ValueError) as e:
+        logging.warning(f"Pas moyen de lire '{nom_fichier}'")
+        logging.warning(e)
+        retour = False
+    else:
+        if sous_réf is None:
+            sous_réf = définition(contenu)
+        retour = validateur(chemin_schémas).valider(nom_schéma, sous_réf,
+                                                    contenu)
+    return retour
+
+
+def valider_répertoire(chemin, nom_schéma, sous_réf=None,
+                       chemin_schémas=".", processus=None):
+    """Valide en parallèle tous les fichiers JSON du répertoire (hors
+    schémas), et retourne le résultat de chacun, par nom de fichier
+    """
+    fichiers = sorted(os.path.join(chemin, f) for f in os.listdir(chemin)
+                      if f.endswith(".json")
+                      and not f.endswith(".schema.json"))
+    n = len(fichiers)
+    lot = max(1, n // (4 * (processus or os.cpu_count() or 1)))
+    with concurrent.futures.ProcessPoolExecutor(processus) as exécuteur:
+        résultats = exécuteur.map(valider_fichier, fichiers,
+                                  [nom_schéma] * n, [sous_réf] * n,
+                                  [chemin_schémas] * n, chunksize=lot)
+        retour = dict(zip(fichiers, résultats))
+    return retour
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(
+        description="Validation d'un répertoire de niveaux")
+    analyseur.add_argument("répertoire")
+    analyseur.add_argument("--schéma", default="échangeur")
+    analyseur.add_argument("--schémas", default=".",
+                           help="répertoire des fichiers «*.schema.json»")
+    analyseur.add_argument("--processus", type=int)
+    arguments = analyseur.parse_args()
+
+    résultats = valider_répertoire(arguments.répertoire, arguments.schéma,
+                                   chemin_schémas=arguments.schémas,
+                                   processus=arguments.processus)
+    for f, valide in résultats.items():
+        print(f"{'ok' if valide else 'KO'}\t{f}")
+    raise SystemExit(0 if all(résultats.values()) else 1)
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""Forme compilée des niveaux
+
+Un niveau décrit en JSON est compilé en un fichier binaire de tableaux
+compacts (extrémités des routes, rectangles des obstacles, liaisons), placé
+dans le répertoire «__pycache__» voisin. Ce fichier porte l'empreinte du
+JSON d'origine, ainsi que sa taille et sa date de modification : tant que
+celles-ci sont inchangées, le JSON n'est pas relu ; sinon, il n'est
+recompilé que si son empreinte a changé. Le niveau compilé est projeté en
+mémoire puis lu directement, sans construire l'arbre de dictionnaires.
+
+Les obstacles sont regroupés par région : cases de côté fixe d'un monde
+(format 2), ou région unique d'un niveau au format 1 (côté nul). Chaque
+région porte l'étendue de ses obstacles, afin qu'un niveau puisse n'en lire
+que les régions recoupant une zone donnée.
+
+Disposition (petit-boutiste) :
+- en-tête : «ENTÊTE» ;
+- routes : «ROUTE» (nom, présence de l'entrée et de la sortie, coordonnées
+  de l'entrée puis de la sortie) ;
+- régions : «RÉGION» (colonne, ligne, rang du premier obstacle, nombre
+  d'obstacles, étendue de ceux-ci) ;
+- obstacles : «OBSTACLE» (rôle, coin inférieur, coin supérieur), région par
+  région ;
+- liaisons : «LIAISON» (route de départ, route d'arrivée, flux) ;
+- chaînes : positions de début de chaque chaîne, puis texte UTF-8. La
+  chaîne n°0 est le nom du niveau.
+
+Les coordonnées sont des entiers signés sur 32 bits : un niveau qui sort de
+ces bornes est refusé à la compilation.
+
+Seul un JSON conforme au schéma est conservé sous forme compilée : un niveau
+invalide est recompilé, et signalé, à chaque chargement.
+"""
+
+# Dépendance(s) standard(s)
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
+# Dépendance(s) interne(s)
+import format_1
+
+# Dépendance(s) externe(s)
+
+
+MAGIQUE = b"ECHG"
+VERSION = 3
+EXTENSION = "niveau"
+
+# Magique, version, empreinte du JSON, taille et date de modification (en
+# nanosecondes) du JSON, nombre de routes, de régions, d'obstacles, de
+# liaisons et de chaînes, taille du texte des chaînes, côté des régions,
+# dimensions du monde
+ENTÊTE = struct.Struct("<4sH32sQqIIIIIIIII")
+ROUTE = struct.Struct("<IBxxxiiii")
+RÉGION = struct.Struct("<iiIIiiii")
+OBSTACLE = struct.Struct("<Iiiii")
+LIAISON = struct.Struct("<iii")
+POSITION = struct.Struct("<I")
+
+ENTRÉE = 1
+SORTIE = 2
+
+# Bornes des coordonnées (entiers signés sur 32 bits)
+COORDONNÉE_MIN = -(1 << 31)
+COORDONNÉE_MAX = (1 << 31) - 1
+
+
+# Taille des blocs lus pour calculer l'empreinte d'un fichier
+BLOC = 1 << 20
+
+
+def empreinte(source):
+    return hashlib.sha256(source).digest()
+
+
+def empreinte_fichier(nom_fichier):
+    """Empreinte du contenu du fichier, lu bloc par bloc
+    """
+    condensé = hashlib.sha256()
+    with open(nom_fichier, "rb") as entrée:
+        for bloc in iter(lambda: entrée.read(BLOC), b""):
+            condensé.update(bloc)
+    return condensé.digest()
+
+
+def état_fichier(nom_fichier):
+    """(taille, date de modification en nanosecondes) du fichier
+    """
+    état = os.stat(nom_fichier)
+    return (état.st_size, état.st_mtime_ns)
+
+
+def coordonnées(position, élément):
+    """(largeur, hauteur) de la position, qui doit être représentable dans
+    le format compilé
+    """
+    retour = (position["largeur"], position["hauteur"])
+    if not all(COORDONNÉE_MIN <= c <= COORDONNÉE_MAX for c in retour):
+        raise ValueError(f"{élément} : coordonnées {retour} hors des bornes "
+                         f"[{COORDONNÉE_MIN}, {COORDONNÉE_MAX}]")
+    return retour
+
+
+def compiler(contenu, clef, source=(0, 0)):
+    """Forme compilée, sous forme d'octets, du niveau décrit par 'contenu',
+    dont le JSON d'origine a pour empreinte 'clef' et pour taille et date
+    'source'
+    """
+    chaînes = [contenu.get("nom", "")]
+    indices = dict()
+
+    def chaîne(texte):
+        retour = indices.get(texte)
+        if retour is None:
+            retour = len(chaînes)
+            chaînes.append(texte)
+            indices[texte] = retour
+        return retour
+
+    routes = list()
+    numéros = dict()
+    présences = list()
+    for r in contenu["routes"]:
+        présence = 0
+        entrée = sortie = (0, 0)
+        if "entrée" in r:
+            présence |= ENTRÉE
+            entrée = coordonnées(r["entrée"], f"route/{r['nom']}")
+        if "sortie" in r:
+            présence |= SORTIE
+            sortie = coordonnées(r["sortie"], f"route/{r['nom']}")
+        numéros[r["nom"]] = len(routes)
+        présences.append(présence)
+        routes.append(ROUTE.pack(chaîne(r["nom"]), présence, *entrée,
+                                 *sortie))
+
+    if contenu.get("version") == "2":
+        côté = contenu["côté"]
+        dimensions = coordonnées(contenu["dimensions"], "dimensions")
+        groupes = [(r["colonne"], r["ligne"], r["obstacles"])
+                   for r in contenu.get("régions", ())]
+    else:
+        côté = 0
+        dimensions = (0, 0)
+        groupes = [(0, 0, contenu.get("obstacles", ()))]
+
+    régions = list()
+    obstacles = list()
+    cases = set()
+    for colonne, ligne, blocs in groupes:
+        if (colonne, ligne) in cases:
+            raise ValueError(f"région/{colonne},{ligne} en double")
+        cases.add((colonne, ligne))
+        if len(blocs) == 0:
+            continue
+        premier = len(obstacles)
+        élément = f"région/{colonne},{ligne}"
+        for o in blocs:
+            inf = coordonnées(o["position"]["inf"], élément)
+            sup = coordonnées(o["position"]["sup"], élément)
+            if côté != 0 and (inf[0] // côté != colonne
+                              or inf[1] // côté != ligne):
+                raise ValueError(f"{élément} : obstacle hors de la région")
+            obstacles.append((chaîne(o["rôle"]), *inf, *sup))
+        bloc = obstacles[premier:]
+        régions.append(RÉGION.pack(colonne, ligne, premier, len(bloc),
+                                   min(o[1] for o in bloc),
+                                   min(o[2] for o in bloc),
+                                   max(o[3] for o in bloc),
+                                   max(o[4] for o in bloc)))
+
+    liaisons = list()
+    for l in contenu["liaisons"]:
+        # Le départ d'une liaison est la sortie d'une route, et son arrivée
+        # l'entrée d'une autre
+        nid = numéros.get(l["nid"])
+        if nid is None or not présences[nid] & SORTIE:
+            raise KeyError(f"nid/{l['nid']}")
+        but = numéros.get(l["but"])
+        if but is None or not présences[but] & ENTRÉE:
+            raise KeyError(f"but/{l['but']}")
+        liaisons.append(LIAISON.pack(nid, but, l["flux"]))
+
+    textes = [c.encode("utf-8") for c in chaînes]
+    positions = [0]
+    for t in textes:
+        positions.append(positions[-1] + len(t))
+
+    return b"".join([
+        ENTÊTE.pack(MAGIQUE, VERSION, clef, *source, len(routes),
+                    len(régions),
+                    len(obstacles), len(liaisons), len(chaînes),
+                    positions[-1], côté, *dimensions),
+        *routes, *régions, *[OBSTACLE.pack(*o) for o in obstacles],
+        *liaisons,
+        *[POSITION.pack(p) for p in positions], *textes])
+
+
+class NiveauCompilé:
+    """Lecture d'un niveau compilé, depuis des octets ou un fichier projeté
+    en mémoire
+    """
+
+    def __init__(self, tampon, projection=None):
+        self.projection = projection
+        self.tampon = memoryview(tampon)
+        try:
+            (magique, self.version, self.empreinte, taille_source,
+             date_source, self.nb_routes, self.nb_régions,
+             self.nb_obstacles, self.nb_liaisons, self.nb_chaînes, taille,
+             self.côté, *self.dimensions) = ENTÊTE.unpack_from(self.tampon)
+        except struct.error:
+            self.tampon.release()
+            raise ValueError("Niveau compilé tronqué")
+        # Taille et date de modification du JSON d'origine
+        self.source = (taille_source, date_source)
+        if magique != MAGIQUE:
+            self.tampon.release()
+            raise ValueError("Niveau compilé invalide")
+        self.début_routes = ENTÊTE.size
+        self.début_régions = self.début_routes + self.nb_routes * ROUTE.size
+        self.début_obstacles = (self.début_régions
+                                + self.nb_régions * RÉGION.size)
+        self.début_liaisons = (self.début_obstacles
+                               + self.nb_obstacles * OBSTACLE.size)
+        self.début_chaînes = (self.début_liaisons
+                              + self.nb_liaisons * LIAISON.size)
+        self.début_texte = (self.début_chaînes
+                            + (self.nb_chaînes + 1) * POSITION.size)
+        if len(self.tampon) != self.début_texte + taille:
+            self.tampon.release()
+            raise ValueError("Niveau compilé tronqué")
+        self.texte = None
+        self.table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def fermer(self):
+        self.tampon.release()
+        if self.projection is not None:
+            self.projection.close()
+            self.projection = None
+
+    def chaînes(self):
+        if self.texte is None:
+            positions = [p for p, in POSITION.iter_unpack(
+                self.tampon[self.début_chaînes:self.début_texte])]
+            texte = self.tampon[self.début_texte:]
+            self.texte = [str(texte[a:b], "utf-8")
+                          for a, b in zip(positions, positions[1:])]
+        return self.texte
+
+    @property
+    def nom(self):
+        return self.chaînes()[0]
+
+    @property
+    def découpé(self):
+        """Vrai ssi le niveau est un monde découpé en régions
+        """
+        return self.côté != 0
+
+    def routes(self):
+        """Suite de (nom, entrée, sortie), une extrémité absente valant None
+        """
+        chaînes = self.chaînes()
+        for nom, présence, ex, ey, sx, sy in ROUTE.iter_unpack(
+                self.tampon[self.début_routes:self.début_régions]):
+            yield (chaînes[nom],
+                   (ex, ey) if présence & ENTRÉE else None,
+                   (sx, sy) if présence & SORTIE else None)
+
+    def régions(self):
+        """Liste des (colonne, ligne, premier obstacle, nombre d'obstacles,
+        xmin, ymin, xmax, ymax) des régions, lue une seule fois
+        """
+        if self.table is None:
+            self.table = list(RÉGION.iter_unpack(
+                self.tampon[self.début_régions:self.début_obstacles]))
+        return self.table
+
+    def obstacles(self, région=None):
+        """Suite de (rôle, xmin, ymin, xmax, ymax) des obstacles de la
+        région de rang donné, ou de toutes les régions
+        """
+        début, fin = self.début_obstacles, self.début_liaisons
+        if région is not None:
+            _, _, premier, nombre, *_ = self.régions()[région]
+            début += premier * OBSTACLE.size
+            fin = début + nombre * OBSTACLE.size
+        chaînes = self.chaînes()
+        for rôle, x0, y0, x1, y1 in OBSTACLE.iter_unpack(
+                self.tampon[début:fin]):
+            yield chaînes[rôle], x0, y0, x1, y1
+
+    def liaisons(self):
+        """Suite de (numéro de la route de départ, numéro de la route
+        d'arrivée, flux)
+        """
+        return LIAISON.iter_unpack(
+            self.tampon[self.début_liaisons:self.début_chaînes])
+
+
+def chemin_cache(nom_fichier):
+    répertoire, nom = os.path.split(os.path.abspath(nom_fichier))
+    return os.path.join(répertoire, "__pycache__", f"{nom}.{EXTENSION}")
+
+
+def ouvrir(chemin, nom_fichier, source):
+    """Niveau compilé projeté en mémoire depuis le fichier, s'il existe et
+    correspond au contenu actuel du JSON 'nom_fichier', de taille et date
+    'source' ; None sinon. Le JSON n'est relu pour en comparer l'empreinte
+    que si sa taille ou sa date diffèrent de celles de la compilation.
+    """
+    retour = None
+    try:
+        with open(chemin, "rb") as fichier:
+            projection = mmap.mmap(fichier.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        projection = None
+    if projection is not None:
+        try:
+            retour = NiveauCompilé(projection, projection)
+        except ValueError:
+            projection.close()
+        else:
+            if retour.version != VERSION or (
+                    retour.source != source
+                    and retour.empreinte != empreinte_fichier(nom_fichier)):
+                retour.fermer()
+                retour = None
+    return retour
+
+
+def enregistrer(chemin, compilé):
+    """Écrit le niveau compilé de façon atomique ; vrai en cas de succès
+    """
+    retour = True
+    temporaire = None
+    try:
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(
+            dir=os.path.dirname(chemin), suffix=".tmp")
+        with os.fdopen(descripteur, "wb") as fichier:
+            fichier.write(compilé)
+        os.replace(temporaire, chemin)
+    except OSError as e:
+        logging.debug("Pas moyen d'écrire '%s' : %s", chemin, e)
+        if temporaire is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temporaire)
+        retour = False
+    return retour
+
+
+def charger(nom_fichier, nom_schéma, validateur):
+    """Niveau compilé correspondant au fichier JSON, (re)compilé au besoin.
+
+    À refermer après usage, par exemple au moyen d'un bloc «with».
+    """
+    chemin = chemin_cache(nom_fichier)
+    # Relevé avant la lecture : une modification survenue ensuite changera
+    # la date, et fera comparer les empreintes au prochain chargement
+    état = état_fichier(nom_fichier)
+    retour = ouvrir(chemin, nom_fichier, état)
+    if retour is None:
+        with open(nom_fichier, "rb") as entrée:
+            source = entrée.read()
+        clef = empreinte(source)
+        contenu, valide = format_1.décoder_et_valider(
+            source.decode("utf-8"), nom_fichier, nom_schéma, validateur)
+        compilé = compiler(contenu, clef, état)
+        if valide and enregistrer(chemin, compilé):
+            retour = ouvrir(chemin, nom_fichier, état)
+        if retour is None:
+            retour = NiveauCompilé(compilé)
+    return retour
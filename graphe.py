@@ -1,108 +1,332 @@
 # -*- coding: utf-8 -*-
 """Modélisation d'un graphe quelconque
+
+Chaque élément du graphe est repéré par un identifiant entier, unique au sein
+de son graphe. Les attributs des éléments sont rangés par colonnes (une
+table par nom d'attribut, indexée par identifiant) détenues par le graphe ;
+les objets «Item» ne sont que des poignées vers ces colonnes.
 """
 
+# Dépendance(s) standard(s)
+import itertools
+
+# Dépendance(s) interne(s)
+
+# Dépendance(s) externe(s)
+
+
+# Colonnes d'attributs créées d'office
+COLONNES = ("amovible", "biome", "couleur", "palier", "position")
+
+
+class Liaisons:
+    """Ensemble ordonné des voisins d'un élément.
+
+    Les ajouts, retraits et tests d'appartenance sont en temps constant.
+    L'accès par indice reste possible, mais en temps linéaire : il n'est
+    destiné qu'aux liens, qui n'ont que deux extrémités.
+    """
+
+    __slots__ = ("voisins",)
+
+    def __init__(self):
+        self.voisins = dict()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self.voisins)})"
+
+    def __len__(self):
+        return len(self.voisins)
+
+    def __iter__(self):
+        return iter(self.voisins)
+
+    def __contains__(self, item):
+        return item in self.voisins
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            retour = list(self.voisins)[indice]
+        else:
+            if indice < 0:
+                indice += len(self.voisins)
+            if not 0 <= indice < len(self.voisins):
+                raise IndexError(indice)
+            retour = next(itertools.islice(self.voisins, indice, None))
+        return retour
 
-class Item(dict):
+    def append(self, item):
+        self.voisins[item] = None
+
+    def insérer(self, indice, item):
+        """Ajoute l'élément au rang donné, en temps linéaire
+        """
+        voisins = list(self.voisins)
+        voisins.insert(indice, item)
+        self.voisins = dict.fromkeys(voisins)
+
+    def rang(self, item):
+        """Rang de l'élément, en temps linéaire
+        """
+        try:
+            return list(self.voisins).index(item)
+        except ValueError:
+            raise ValueError(item) from None
+
+    def remove(self, item):
+        try:
+            del self.voisins[item]
+        except KeyError:
+            raise ValueError(item) from None
+
+
+class Item:
     """Élément du graphe, utilisé indifféremment pour les arêtes comme pour
     les sommets.
 
-    À FAIRE : le fait que cette classe hérite de «dict» est une mauvaise idée.
-    L'origine de cet héritage était par fainéantise et ne pas vouloir définir
-    les méthodes «(get/set/del)item», mais a conduit à redéfinir «eq» et
-    certainement d'autres, comme «hash». De même qu'un Item conserve un lien
-    vers son graphe parent, il doit prévoir un unique attribut «étiquette» ou
-    quelque chose du genre.
+    Les attributs sont accessibles comme dans un dictionnaire, mais sont
+    stockés dans les colonnes du graphe parent. Une fois l'élément retiré de
+    son graphe, ses attributs sont conservés par l'élément lui-même.
     """
-    def __init__(self, graphe, *, est_arête, **attributs):
-        super().__init__(attributs)
 
+    __slots__ = ("graphe", "ident", "est_arête", "liaisons", "hors_graphe")
+
+    def __init__(self, graphe, ident, *, est_arête):
         self.graphe = graphe
+        self.ident = ident
         self.est_arête = est_arête
-        self.liaisons = list()
-
-    def __eq__(self, autre):
-        return id(self) == id(autre)
+        self.liaisons = Liaisons()
+        self.hors_graphe = None
 
     def __repr__(self):
-        return f"{self.__class__.__name__}(0x{id(self):x})(est_arête={self.est_arête})"
+        return f"{self.__class__.__name__}({self.ident})(est_arête={self.est_arête})"
 
-    # def __del__(self):
-    #     self.détacher(*self.liaisons)
-    #     if self.est_arête:
-    #         self.graphe.liens.remove(self)
-    #     else:
-    #         self.graphe.nœuds.remove(self)
-    #     self.graphe = None
+    def __getitem__(self, clef):
+        if self.graphe is None:
+            return self.hors_graphe[clef]
+        return self.graphe.colonnes[clef][self.ident]
+
+    def __setitem__(self, clef, valeur):
+        if self.graphe is None:
+            self.hors_graphe[clef] = valeur
+        else:
+            colonne = self.graphe.colonnes.setdefault(clef, dict())
+            ancienne = colonne.get(self.ident)
+            colonne[self.ident] = valeur
+            self.graphe.notifier("attribut_modifié", self, clef, ancienne)
+
+    def __delitem__(self, clef):
+        if self.graphe is None:
+            del self.hors_graphe[clef]
+        else:
+            ancienne = self.graphe.colonnes[clef].pop(self.ident)
+            self.graphe.notifier("attribut_modifié", self, clef, ancienne)
+
+    def __contains__(self, clef):
+        if self.graphe is None:
+            return clef in self.hors_graphe
+        colonne = self.graphe.colonnes.get(clef)
+        return colonne is not None and self.ident in colonne
+
+    def get(self, clef, défaut=None):
+        try:
+            return self[clef]
+        except KeyError:
+            return défaut
+
+    def attributs(self):
+        """Copie de tous les attributs de l'élément
+        """
+        if self.graphe is None:
+            return dict(self.hors_graphe)
+        return {clef: colonne[self.ident]
+                for clef, colonne in self.graphe.colonnes.items()
+                if self.ident in colonne}
 
     def associer(self, *autres):
         for a in autres:
             self.liaisons.append(a)
             a.liaisons.append(self)
+            if self.graphe is not None:
+                self.graphe.notifier("associés", self, a)
+
+    def réassocier(self, autre, rang, rang_autre):
+        """Associe l'élément à 'autre', placé au rang 'rang' des liaisons de
+        l'élément, qui est lui-même placé au rang 'rang_autre' de celles de
+        'autre'
+        """
+        self.liaisons.insérer(rang, autre)
+        autre.liaisons.insérer(rang_autre, self)
+        if self.graphe is not None:
+            self.graphe.notifier("associés", self, autre)
 
     def détacher(self, *autres):
         for a in autres:
+            if self.graphe is not None:
+                self.graphe.notifier("détachement", self, a)
             a.liaisons.remove(self)
             self.liaisons.remove(a)
+            if self.graphe is not None:
+                self.graphe.notifier("détachés", self, a)
 
     def est_similaire(self, autre):
-        retour = (self.est_arête == autre.est_arête
-                  and len(self.liaisons) == len(autre.liaisons))
+        return (self.est_arête == autre.est_arête
+                and len(self.liaisons) == len(autre.liaisons)
+                and all(l in autre.liaisons for l in self.liaisons))
 
-        i = 0
-        while retour and i < len(self.liaisons):
-            try:
-                autre.liaisons.index(self.liaisons[i])
-                i += 1
-            except ValueError:
-                retour = False
 
-        return retour
+class Observateur:
+    """Suivi des modifications d'un graphe.
+
+    Les classes dérivées ne redéfinissent que les méthodes qui les
+    intéressent. Les notifications de suppression sont émises une fois
+    l'élément détaché de tous ses voisins, mais avant que son attribut
+    «graphe» ne soit effacé.
+    """
+
+    def nœud_ajouté(self, nœud):
+        pass
+
+    def lien_ajouté(self, lien):
+        pass
+
+    def nœud_supprimé(self, nœud):
+        pass
+
+    def lien_supprimé(self, lien):
+        pass
+
+    def nœuds_fusionnés(self, nid, but):
+        """Annonce le report des liens de 'nid' sur 'but', et la
+        suppression de 'nid', notifiés ensuite
+        """
+        pass
+
+    def associés(self, item, autre):
+        pass
+
+    def détachement(self, item, autre):
+        """Annonce le détachement de 'item' et 'autre', notifié ensuite
+        """
+        pass
+
+    def détachés(self, item, autre):
+        pass
+
+    def attribut_modifié(self, item, clef, ancienne):
+        pass
 
 
 class Graphe:
     def __init__(self):
-        # Sommets
-        self.nœuds = list()
-        # Arêtes
-        self.liens = list()
+        # Sommets et arêtes, indexés par identifiant
+        self.sommets = dict()
+        self.arêtes = dict()
+        self.identifiants = itertools.count()
+        # Attributs des éléments, par colonne
+        self.colonnes = {clef: dict() for clef in COLONNES}
+        # Suivi des modifications
+        self.observateurs = list()
+
+    @property
+    def nœuds(self):
+        """Nouvelle liste des nœuds, à chaque accès : «iter_nœuds» les
+        parcourt sans copie
+        """
+        return list(self.sommets.values())
+
+    @property
+    def liens(self):
+        """Nouvelle liste des liens, à chaque accès : «iter_liens» les
+        parcourt sans copie
+        """
+        return list(self.arêtes.values())
 
     def __repr__(self):
         lignes = list()
-        for i, n in enumerate(self.nœuds):
+        for n in self.sommets.values():
             assert (not n.est_arête)
-            liens = list()
-            for l in n.liaisons:
-                assert (l.est_arête)
-                j = self.liens.index(l)
-                liens.append(f"L{j}")
-            liens.sort()
-            lignes.append(f"Nœud N{i} → {', '.join(liens)}")
-
-        for i, l in enumerate(self.liens):
+            liens = sorted(l.ident for l in n.liaisons)
+            lignes.append(f"Nœud N{n.ident} → "
+                          f"{', '.join(f'L{i}' for i in liens)}")
+
+        for l in self.arêtes.values():
             assert (l.est_arête)
-            nœuds = list()
-            for n in l.liaisons:
-                assert (not n.est_arête)
-                j = self.nœuds.index(n)
-                nœuds.append(f"N{j}")
-            nœuds.sort()
-            lignes.append(f"Lien L{i} → {', '.join(nœuds)}")
+            nœuds = sorted(n.ident for n in l.liaisons)
+            lignes.append(f"Lien L{l.ident} → "
+                          f"{', '.join(f'N{i}' for i in nœuds)}")
 
         return "\n".join(lignes)
 
+    def abonner(self, observateur):
+        self.observateurs.append(observateur)
+
+    def désabonner(self, observateur):
+        self.observateurs.remove(observateur)
+
+    def notifier(self, évènement, *arguments):
+        for o in self.observateurs:
+            getattr(o, évènement)(*arguments)
+
+    def item(self, ident):
+        """Élément du graphe portant l'identifiant donné
+        """
+        retour = self.sommets.get(ident)
+        if retour is None:
+            retour = self.arêtes[ident]
+        return retour
+
     def ajouter_nœud(self):
-        retour = Item(self, est_arête=False)
-        self.nœuds.append(retour)
+        retour = Item(self, next(self.identifiants), est_arête=False)
+        self.sommets[retour.ident] = retour
+        self.notifier("nœud_ajouté", retour)
         return retour
 
     def ajouter_lien(self):
-        retour = Item(self, est_arête=True)
-        self.liens.append(retour)
+        retour = Item(self, next(self.identifiants), est_arête=True)
+        self.arêtes[retour.ident] = retour
+        self.notifier("lien_ajouté", retour)
         return retour
 
     def fusionner_nœuds(self, nid, but):
-        # Remplacement de 'nid' par 'but' dans tous ses liens
+        self.reporter_liens(nid, but)
+        self.dédoublonner(but)
+
+    def fusionner_plusieurs(self, paires):
+        """Fusion de plusieurs paires (nid, but) de nœuds, avec le même
+        résultat que des appels successifs à «fusionner_nœuds», mais une
+        unique élimination des liens en double. Seul peut différer, entre
+        deux liens en double, celui qui est conservé.
+        """
+        # Nœud absorbant chacun des nœuds fusionnés
+        cibles = dict()
+
+        def cible(nœud):
+            retour = nœud
+            while retour in cibles:
+                retour = cibles[retour]
+            while nœud in cibles:
+                cibles[nœud], nœud = retour, cibles[nœud]
+            return retour
+
+        for nid, but in paires:
+            nid = cible(nid)
+            but = cible(but)
+            if nid is not but:
+                cibles[nid] = but
+
+        survivants = dict()
+        for nid in list(cibles):
+            but = cible(nid)
+            self.reporter_liens(nid, but)
+            survivants[but] = None
+        self.dédoublonner(*survivants)
+
+    def reporter_liens(self, nid, but):
+        """Remplacement de 'nid' par 'but' dans tous ses liens, puis
+        suppression de 'nid'
+        """
+        self.notifier("nœuds_fusionnés", nid, but)
         for l in list(nid.liaisons):
             if but not in l.liaisons:
                 l.associer(but)
@@ -114,24 +338,24 @@ class Graphe:
         assert (len(nid.liaisons) == 0)
         self.supprimer_nœud(nid)
 
-        # Suppression des relations identiques
-        recommencer = True
-        while recommencer:
-            recommencer = False
-            for i, l in enumerate(but.liaisons):
-                for k in but.liaisons[i + 1:]:
-                    if l.est_similaire(k):
-                        recommencer = True
-                        self.supprimer_lien(k)
-                        break
-                if recommencer:
-                    break
+    def dédoublonner(self, *nœuds):
+        """Suppression des liens des nœuds donnés qui relient exactement les
+        mêmes nœuds qu'un lien précédent
+        """
+        for n in nœuds:
+            vus = set()
+            for l in list(n.liaisons):
+                extrémités = frozenset(l.liaisons)
+                if extrémités in vus:
+                    self.supprimer_lien(l)
+                else:
+                    vus.add(extrémités)
 
     def iter_nœuds(self):
-        yield from self.nœuds
+        yield from self.sommets.values()
 
     def iter_liens(self):
-        yield from self.liens
+        yield from self.arêtes.values()
 
     def supprimer_nœud(self, nœud):
         """La suppression d'un nœud provoque la suppression de tous les liens
@@ -141,10 +365,39 @@ class Graphe:
         for l in liaisons:
             self.supprimer_lien(l)
         assert (len(nœud.liaisons) == 0)
-        self.nœuds.remove(nœud)
-        nœud.graphe = None
+        del self.sommets[nœud.ident]
+        self.notifier("nœud_supprimé", nœud)
+        self.libérer(nœud)
 
     def supprimer_lien(self, lien):
         lien.détacher(*lien.liaisons)
-        self.liens.remove(lien)
-        lien.graphe = None
+        del self.arêtes[lien.ident]
+        self.notifier("lien_supprimé", lien)
+        self.libérer(lien)
+
+    def rétablir(self, item):
+        """Réinsère dans le graphe un élément qui en a été supprimé, avec
+        ses attributs mais sans ses liaisons
+        """
+        assert (item.graphe is None and len(item.liaisons) == 0)
+        attributs = item.hors_graphe
+        item.graphe = self
+        item.hors_graphe = None
+        if item.est_arête:
+            self.arêtes[item.ident] = item
+            self.notifier("lien_ajouté", item)
+        else:
+            self.sommets[item.ident] = item
+            self.notifier("nœud_ajouté", item)
+        for clef, valeur in attributs.items():
+            item[clef] = valeur
+
+    def libérer(self, item):
+        """Retire les attributs de l'élément des colonnes du graphe, pour les
+        lui confier
+        """
+        item.hors_graphe = dict()
+        for clef, colonne in self.colonnes.items():
+            if item.ident in colonne:
+                item.hors_graphe[clef] = colonne.pop(item.ident)
+        item.graphe = None
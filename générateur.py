@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Génération procédurale de niveaux et de réseaux, reproductible à partir
+d'une graine
+
+Les niveaux produits respectent le format décrit par
+«échangeur.schema.json», et peuvent donc être écrits tels quels dans un
+fichier puis chargés par «Niveau.charger».
+"""
+
+# Dépendance(s) standard(s)
+import random
+
+# Dépendance(s) interne(s)
+import échangeur
+
+# Dépendance(s) externe(s)
+
+
+LARGEUR = 640
+HAUTEUR = 480
+# Côté des régions des mondes
+CÔTÉ = 512
+
+RÔLES = ("USINE", "FORÊT")
+
+
+def position(largeur, hauteur):
+    return {"largeur": largeur, "hauteur": hauteur}
+
+
+def niveau(graine, routes, obstacles, liaisons, largeur=LARGEUR,
+           hauteur=HAUTEUR, taille=None):
+    """Description d'un niveau aléatoire, comptant le nombre de routes,
+    d'obstacles et de liaisons demandés. Les côtés des obstacles ne
+    dépassent pas 'taille' (par défaut, un seizième de la carte).
+
+    Une liaison relie deux routes distinctes : il en faut au moins deux dès
+    qu'une liaison est demandée.
+    """
+    if liaisons > 0 and routes < 2:
+        raise ValueError(f"{liaisons} liaison(s) demandée(s) pour {routes} "
+                         "route(s) : il faut au moins deux routes")
+    aléa = random.Random(graine)
+    retour = {"version": "1", "nom": f"Niveau généré n°{graine}",
+              "routes": list(), "obstacles": list(), "liaisons": list()}
+
+    # Routes, dont les extrémités sont réparties en bordure de carte
+    occupés = set()
+    for k in range(routes):
+        while True:
+            bord = aléa.randrange(4)
+            if bord < 2:
+                x = aléa.randrange(10, largeur - 30)
+                y = 10 if bord == 0 else hauteur - 10
+                dx, dy = 20, 0
+            else:
+                x = 10 if bord == 2 else largeur - 10
+                y = aléa.randrange(10, hauteur - 30)
+                dx, dy = 0, 20
+            if (x, y) not in occupés and (x + dx, y + dy) not in occupés:
+                occupés.update([(x, y), (x + dx, y + dy)])
+                break
+        retour["routes"].append({"nom": f"R{k}",
+                                 "sortie": position(x, y),
+                                 "entrée": position(x + dx, y + dy)})
+
+    # Obstacles, à l'écart des bordures
+    for _ in range(obstacles):
+        l = aléa.randint(5, max(5, largeur // 16 if taille is None
+                                else taille))
+        h = aléa.randint(5, max(5, hauteur // 16 if taille is None
+                                else taille))
+        x = aléa.randrange(40, largeur - 40 - l)
+        y = aléa.randrange(40, hauteur - 40 - h)
+        retour["obstacles"].append({
+            "rôle": aléa.choice(RÔLES),
+            "position": {"inf": position(x, y),
+                         "sup": position(x + l, y + h)}})
+
+    # Liaisons entre routes distinctes
+    for _ in range(liaisons):
+        nid, but = aléa.sample(range(routes), 2)
+        retour["liaisons"].append({"nid": f"R{nid}", "but": f"R{but}",
+                                   "flux": aléa.randint(1, 30)})
+
+    return retour
+
+
+def découper(description, largeur, hauteur, côté=CÔTÉ):
+    """Description au format 2, découpée en régions de côté donné, du
+    niveau décrit au format 1
+    """
+    régions = dict()
+    for o in description.get("obstacles", ()):
+        inf = o["position"]["inf"]
+        case = (inf["largeur"] // côté, inf["hauteur"] // côté)
+        régions.setdefault(case, list()).append(o)
+    retour = {k: v for k, v in description.items() if k != "obstacles"}
+    retour.update(version="2", dimensions=position(largeur, hauteur),
+                  côté=côté,
+                  régions=[{"colonne": i, "ligne": j, "obstacles": o}
+                           for (i, j), o in sorted(régions.items())])
+    return retour
+
+
+def monde(graine, routes, obstacles, liaisons, largeur, hauteur,
+          côté=CÔTÉ, taille=40):
+    """Description d'un monde aléatoire de grande taille, découpé en
+    régions
+    """
+    return découper(niveau(graine, routes, obstacles, liaisons, largeur,
+                           hauteur, taille), largeur, hauteur, côté)
+
+
+def réseau(niveau, graine, nœuds, liens, voisins=6):
+    """Peuple le graphe du niveau d'un réseau aléatoire : des nœuds amovibles
+    hors des obstacles, reliés à certains de leurs plus proches voisins.
+
+    Le réseau obtenu n'est pas nécessairement valide. Retourne la liste des
+    nœuds créés.
+    """
+    aléa = random.Random(graine)
+    créés = list()
+    while len(créés) < nœuds:
+        p = échangeur.V2(aléa.uniform(0, LARGEUR), aléa.uniform(0, HAUTEUR))
+        if not niveau.est_dans_un_obstacle(p):
+            n = niveau.graphe.ajouter_nœud()
+            n["position"] = p
+            n["amovible"] = True
+            n["palier"] = 0
+            n["couleur"] = (255, 255, 255)
+            créés.append(n)
+
+    for _ in range(liens):
+        a = aléa.choice(créés)
+        proches = niveau.plus_proches_nœuds(a["position"], voisins, a)
+        if len(proches) > 0:
+            b, _ = aléa.choice(proches)
+            l = niveau.graphe.ajouter_lien()
+            l["palier"] = aléa.randrange(échangeur.PALIERS)
+            l["couleur"] = (255, 255, 255)
+            l.associer(a, b)
+
+    return créés
+
+
+def raccorder(niveau):
+    """Relie chaque nœud fixe (entrées et sorties des routes) au nœud
+    amovible le plus proche, afin que les liaisons puissent emprunter le
+    réseau
+    """
+    fixes = [n for n in niveau.graphe.iter_nœuds()
+             if not n.get("amovible", True)]
+    for n in fixes:
+        proche, _ = niveau.nœud_proche(n["position"], *fixes)
+        if proche is not None:
+            l = niveau.graphe.ajouter_lien()
+            l["palier"] = 0
+            l["couleur"] = (255, 255, 255)
+            l.associer(n, proche)
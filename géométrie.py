@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Géométrie des liens d'un graphe, calculée à la demande et conservée
+jusqu'au déplacement de l'une de leurs extrémités
+"""
+
+# Dépendance(s) standard(s)
+
+# Dépendance(s) interne(s)
+import graphe
+
+# Dépendance(s) externe(s)
+
+
+class Géométrie:
+    """Segment porté par un lien binaire
+    """
+
+    __slots__ = ("x", "y", "dx", "dy", "norme2", "xmin", "ymin", "xmax",
+                 "ymax")
+
+    def __init__(self, lien):
+        p0 = lien.liaisons[0]["position"]
+        p1 = lien.liaisons[1]["position"]
+        # Origine
+        self.x = p0.largeur
+        self.y = p0.hauteur
+        # Direction
+        self.dx = p1.largeur - p0.largeur
+        self.dy = p1.hauteur - p0.hauteur
+        self.norme2 = self.dx * self.dx + self.dy * self.dy
+        # Boîte englobante
+        self.xmin = min(p0.largeur, p1.largeur)
+        self.ymin = min(p0.hauteur, p1.hauteur)
+        self.xmax = max(p0.largeur, p1.largeur)
+        self.ymax = max(p0.hauteur, p1.hauteur)
+
+
+class GéométrieLiens(graphe.Observateur):
+    """Cache de la géométrie des liens d'un graphe
+    """
+
+    def __init__(self, graphe):
+        self.graphe = graphe
+        self.cache = dict()
+        graphe.abonner(self)
+
+    def __getitem__(self, lien):
+        retour = self.cache.get(lien)
+        if retour is None:
+            retour = Géométrie(lien)
+            self.cache[lien] = retour
+        return retour
+
+    def invalider(self, lien):
+        self.cache.pop(lien, None)
+
+    # Suivi des modifications du graphe
+
+    def lien_supprimé(self, lien):
+        self.invalider(lien)
+
+    def associés(self, item, autre):
+        self.invalider(item if item.est_arête else autre)
+
+    def détachés(self, item, autre):
+        self.invalider(item if item.est_arête else autre)
+
+    def attribut_modifié(self, item, clef, ancienne):
+        if clef == "position" and not item.est_arête:
+            for l in item.liaisons:
+                self.invalider(l)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""Annulation et rétablissement des modifications d'un graphe
+
+L'historique tient le journal des opérations élémentaires notifiées par le
+graphe (ajout, suppression, association, détachement, changement
+d'attribut), regroupées en transactions : une par action du joueur. Annuler
+une transaction revient à appliquer, en sens inverse, l'opération contraire
+de chacune des siennes ; les notifications ainsi émises forment la
+transaction qui permettra de la rétablir. Le coût d'une annulation est donc
+proportionnel à la taille de la modification, et non à celle du graphe.
+
+Les éléments supprimés ne sont pas copiés : l'élément lui-même, qui conserve
+ses attributs hors du graphe, est réinséré tel quel.
+"""
+
+# Dépendance(s) standard(s)
+import collections
+import contextlib
+
+# Dépendance(s) interne(s)
+import graphe
+
+# Dépendance(s) externe(s)
+
+
+class Historique(graphe.Observateur):
+    """Historique des transactions d'un graphe.
+
+    'capacité' borne le nombre total d'opérations élémentaires conservées
+    pour l'annulation ; au-delà, les transactions les plus anciennes sont
+    oubliées.
+    """
+
+    def __init__(self, graphe, capacité=100000):
+        self.graphe = graphe
+        self.capacité = capacité
+        self.annulables = collections.deque()
+        self.rétablissables = list()
+        # Nombre d'opérations élémentaires des transactions annulables
+        self.taille = 0
+        # Opérations de la transaction en cours, le cas échéant
+        self.en_cours = None
+        self.rejeu = False
+        graphe.abonner(self)
+
+    # Transactions
+
+    def commencer(self):
+        self.terminer()
+        self.en_cours = list()
+
+    def terminer(self):
+        """Clôt la transaction en cours ; une transaction vide est ignorée
+        """
+        if self.en_cours is not None:
+            opérations = self.en_cours
+            self.en_cours = None
+            if len(opérations) > 0:
+                self.empiler(opérations)
+                self.rétablissables.clear()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.commencer()
+        try:
+            yield self
+        finally:
+            self.terminer()
+
+    def empiler(self, opérations):
+        self.annulables.append(opérations)
+        self.taille += len(opérations)
+        while self.taille > self.capacité and len(self.annulables) > 1:
+            self.taille -= len(self.annulables.popleft())
+
+    def enregistrer(self, *opération):
+        if self.en_cours is None:
+            # Modification hors transaction : elle forme la sienne
+            self.empiler([opération])
+            if not self.rejeu:
+                self.rétablissables.clear()
+        else:
+            self.en_cours.append(opération)
+
+    # Annulation
+
+    def annuler(self):
+        """Annule la dernière transaction ; vrai s'il y en avait une
+        """
+        self.terminer()
+        retour = len(self.annulables) > 0
+        if retour:
+            opérations = self.annulables.pop()
+            self.taille -= len(opérations)
+            self.rétablissables.append(self.rejouer(opérations))
+        return retour
+
+    def rétablir(self):
+        """Rétablit la dernière transaction annulée ; vrai s'il y en avait
+        une
+        """
+        self.terminer()
+        retour = len(self.rétablissables) > 0
+        if retour:
+            self.empiler(self.rejouer(self.rétablissables.pop()))
+        return retour
+
+    def rejouer(self, opérations):
+        """Applique l'opération contraire de chacune des opérations, en
+        sens inverse, et retourne la transaction ainsi produite
+        """
+        self.en_cours = list()
+        self.rejeu = True
+        try:
+            for opération in reversed(opérations):
+                self.inverser(*opération)
+        finally:
+            retour = self.en_cours
+            self.en_cours = None
+            self.rejeu = False
+        return retour
+
+    def inverser(self, nature, item, *arguments):
+        if nature == "ajouté":
+            if item.est_arête:
+                self.graphe.supprimer_lien(item)
+            else:
+                self.graphe.supprimer_nœud(item)
+        elif nature == "supprimé":
+            self.graphe.rétablir(item)
+        elif nature == "associés":
+            item.détacher(*arguments)
+        elif nature == "détachés":
+            item.réassocier(*arguments)
+        else:
+            clef, ancienne = arguments
+            if ancienne is None:
+                del item[clef]
+            else:
+                item[clef] = ancienne
+
+    # Suivi des modifications du graphe
+
+    def nœud_ajouté(self, nœud):
+        self.enregistrer("ajouté", nœud)
+
+    def lien_ajouté(self, lien):
+        self.enregistrer("ajouté", lien)
+
+    def nœud_supprimé(self, nœud):
+        self.enregistrer("supprimé", nœud)
+
+    def lien_supprimé(self, lien):
+        self.enregistrer("supprimé", lien)
+
+    def associés(self, item, autre):
+        self.enregistrer("associés", item, autre)
+
+    def détachement(self, item, autre):
+        # Les rangs sont relevés avant le détachement : l'annulation rend
+        # aux liaisons des deux éléments leur ordre d'origine
+        self.enregistrer("détachés", item, autre, item.liaisons.rang(autre),
+                         autre.liaisons.rang(item))
+
+    def attribut_modifié(self, item, clef, ancienne):
+        # Les changements successifs d'un même attribut, lors d'un
+        # déplacement par exemple, n'en forment qu'un
+        if (self.en_cours is not None and len(self.en_cours) > 0
+                and self.en_cours[-1][:3] == ("attribut", item, clef)):
+            return
+        self.enregistrer("attribut", item, clef, ancienne)
@@ -0,0 +1,485 @@
+# -*- coding: utf-8 -*-
+"""Index spatial des éléments d'un graphe plan
+
+Les nœuds et les liens sont répartis dans une grille uniforme de cases
+carrées. Les requêtes de proximité ne consultent que les cases voisines de
+la position recherchée, en s'éloignant anneau par anneau tant qu'un meilleur
+candidat reste possible.
+
+Les positions sont manipulées au travers de leurs attributs «largeur» et
+«hauteur», sans dépendre de la classe qui les porte.
+"""
+
+# Dépendance(s) standard(s)
+import bisect
+import heapq
+import math
+
+# Dépendance(s) interne(s)
+import géométrie
+import graphe
+
+# Dépendance(s) externe(s)
+
+
+class Grille:
+    """Répartition d'objets dans des cases carrées de côté fixe.
+
+    Chaque objet occupe un ensemble de cases, fourni lors de son insertion.
+    """
+
+    def __init__(self, côté=32):
+        self.côté = côté
+        self.cases = dict()
+        self.emprises = dict()
+
+    def __len__(self):
+        return len(self.emprises)
+
+    def __contains__(self, objet):
+        return objet in self.emprises
+
+    def case(self, x, y):
+        return (math.floor(x / self.côté), math.floor(y / self.côté))
+
+    def cases_rectangle(self, xmin, ymin, xmax, ymax):
+        """Cases recouvertes par le rectangle donné
+        """
+        i0, j0 = self.case(xmin, ymin)
+        i1, j1 = self.case(xmax, ymax)
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                yield (i, j)
+
+    def cases_segment(self, x0, y0, x1, y1):
+        """Cases traversées par le segment donné
+        """
+        if x0 > x1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        i0, _ = self.case(x0, y0)
+        i1, _ = self.case(x1, y1)
+        for i in range(i0, i1 + 1):
+            # Portion du segment comprise dans la colonne de cases
+            xa = max(x0, i * self.côté)
+            xb = min(x1, (i + 1) * self.côté)
+            if x1 != x0:
+                ya = y0 + (y1 - y0) * (xa - x0) / (x1 - x0)
+                yb = y0 + (y1 - y0) * (xb - x0) / (x1 - x0)
+            else:
+                ya, yb = y0, y1
+            _, ja = self.case(xa, min(ya, yb))
+            _, jb = self.case(xa, max(ya, yb))
+            for j in range(ja, jb + 1):
+                yield (i, j)
+
+    def insérer(self, objet, cases):
+        self.retirer(objet)
+        emprise = frozenset(cases)
+        self.emprises[objet] = emprise
+        for c in emprise:
+            self.cases.setdefault(c, set()).add(objet)
+
+    def retirer(self, objet):
+        emprise = self.emprises.pop(objet, ())
+        for c in emprise:
+            contenu = self.cases[c]
+            contenu.discard(objet)
+            if len(contenu) == 0:
+                del self.cases[c]
+
+    def dans_rectangle(self, xmin, ymin, xmax, ymax):
+        """Objets occupant au moins une case du rectangle donné
+        """
+        retour = set()
+        if len(self.cases) < (xmax - xmin) * (ymax - ymin) / self.côté ** 2:
+            # Peu de cases occupées : on les parcourt directement
+            i0, j0 = self.case(xmin, ymin)
+            i1, j1 = self.case(xmax, ymax)
+            for (i, j), contenu in self.cases.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    retour.update(contenu)
+        else:
+            for c in self.cases_rectangle(xmin, ymin, xmax, ymax):
+                retour.update(self.cases.get(c, ()))
+        return retour
+
+    def anneaux(self, x, y):
+        """Contenu des cases entourant la position, anneau par anneau.
+
+        Chaque anneau est accompagné d'une minoration de la distance entre la
+        position et les objets qu'il contient. Le parcours s'arrête une fois
+        toutes les cases occupées visitées.
+        """
+        ic, jc = self.case(x, y)
+        restantes = len(self.cases)
+        r = 0
+        while restantes > 0 and 8 * r <= restantes:
+            if r == 0:
+                cases = [(ic, jc)]
+            else:
+                cases = [(i, j) for i in range(ic - r, ic + r + 1)
+                         for j in (jc - r, jc + r)]
+                cases += [(i, j) for j in range(jc - r + 1, jc + r)
+                          for i in (ic - r, ic + r)]
+            contenu = set()
+            for c in cases:
+                if c in self.cases:
+                    contenu.update(self.cases[c])
+                    restantes -= 1
+            yield max(r - 1, 0) * self.côté, contenu
+            r += 1
+
+        if restantes > 0:
+            # Les anneaux deviennent plus grands que le nombre de cases
+            # occupées restantes : ces dernières sont parcourues directement
+            anneaux = dict()
+            for (i, j), contenu in self.cases.items():
+                s = max(abs(i - ic), abs(j - jc))
+                if s >= r:
+                    anneaux.setdefault(s, set()).update(contenu)
+            for s in sorted(anneaux):
+                yield (s - 1) * self.côté, anneaux[s]
+
+
+def distance_lien(segment, x, y):
+    """Distance entre la position et le segment d'un lien (voir
+    «géométrie.Géométrie»), pour peu que la projection de la position tombe
+    sur le segment. Sinon, la distance est infinie.
+    """
+    px = x - segment.x
+    py = y - segment.y
+    retour = math.inf
+    if (segment.norme2 != 0
+            and 0 <= segment.dx * px + segment.dy * py <= segment.norme2):
+        retour = (abs(segment.dx * py - segment.dy * px)
+                  / math.sqrt(segment.norme2))
+    return retour
+
+
+def coupe_contour(x, y, dx, dy, xmin, ymin, xmax, ymax):
+    """Vrai ssi le segment d'origine (x, y) et de direction (dx, dy), ni
+    horizontal ni vertical, touche le contour du rectangle donné.
+
+    Le segment est d'abord découpé par les quatre bords du rectangle
+    (Liang–Barsky) ; s'il en reste une portion, il touche le contour, à
+    moins d'être tout entier strictement à l'intérieur.
+    """
+    t0 = 0.0
+    t1 = 1.0
+    for p, q in ((-dx, x - xmin), (dx, xmax - x),
+                 (-dy, y - ymin), (dy, ymax - y)):
+        r = q / p
+        if p < 0:
+            if r > t1:
+                return False
+            if r > t0:
+                t0 = r
+        else:
+            if r < t0:
+                return False
+            if r < t1:
+                t1 = r
+    return not (xmin < x < xmax and ymin < y < ymax
+                and xmin < x + dx < xmax and ymin < y + dy < ymax)
+
+
+# Écart relatif maximal d'un point à une droite pour que le critère
+# d'intersection («intersection_coordonnées») tienne le point pour porté par
+# celle-ci : cos ≥ 1 - 1e-7 entraîne écart ≤ 4,48e-4 × distance
+TOLÉRANCE_COLINÉAIRE = 5e-4
+
+
+class Droites:
+    """Rangs d'objets selon une coordonnée (ordonnée des droites
+    horizontales ou abscisse des droites verticales), interrogeables par
+    intervalle
+    """
+
+    def __init__(self):
+        self.rangs = dict()
+        # Coordonnées triées, recalculées à la première requête qui suit un
+        # ajout
+        self.triées = list()
+
+    def ajouter(self, coordonnée, rang):
+        if coordonnée not in self.rangs:
+            self.rangs[coordonnée] = list()
+            self.triées = None
+        self.rangs[coordonnée].append(rang)
+
+    def entre(self, bas, haut):
+        """Rangs rangés à une coordonnée de l'intervalle [bas, haut]
+        """
+        if bas == haut:
+            return self.rangs.get(bas, ())
+        if self.triées is None:
+            self.triées = sorted(self.rangs)
+        début = bisect.bisect_left(self.triées, bas)
+        fin = bisect.bisect_right(self.triées, haut)
+        return [k for c in self.triées[début:fin] for k in self.rangs[c]]
+
+
+class IndexObstacles:
+    """Index des rectangles d'une liste d'obstacles (attributs «coin_min» et
+    «coin_max»).
+
+    La liste étant partagée, l'index est tenu à jour à chaque requête : les
+    obstacles ajoutés en fin de liste y sont insérés, et il est reconstruit
+    si la liste a raccourci. Qui en remplace des éléments doit appeler
+    «indexer».
+
+    Outre la grille, les coins des obstacles sont répertoriés par droite
+    horizontale et verticale : un segment horizontal ou vertical est tenu
+    pour sécant d'un obstacle dont un coin est porté par la même droite que
+    lui, à n'importe quelle distance (voir «Obstacle.intersection»).
+    """
+
+    def __init__(self, obstacles, côté=64):
+        self.obstacles = obstacles
+        self.grille = Grille(côté)
+        self.nombre = None
+        self.lignes = Droites()
+        self.colonnes = Droites()
+        # Étendue (xmin, ymin, xmax, ymax) des obstacles indexés
+        self.étendue = None
+        # Obstacles d'aire nulle, dont les bords dégénérés sont parallèles à
+        # tout segment
+        self.plats = list()
+
+    def indexer(self):
+        self.grille = Grille(self.grille.côté)
+        self.lignes = Droites()
+        self.colonnes = Droites()
+        self.étendue = None
+        self.plats = list()
+        self.nombre = 0
+        self.compléter()
+
+    def compléter(self):
+        """Indexe les obstacles ajoutés en fin de liste depuis la dernière
+        mise à jour
+        """
+        # Les obstacles ne sont pas hachables : ils sont rangés par rang
+        for k in range(self.nombre or 0, len(self.obstacles)):
+            o = self.obstacles[k]
+            xmin, ymin, xmax, ymax = (o.coin_min.largeur, o.coin_min.hauteur,
+                                      o.coin_max.largeur, o.coin_max.hauteur)
+            self.grille.insérer(k, self.grille.cases_rectangle(xmin, ymin,
+                                                               xmax, ymax))
+            for x, y in ((xmin, ymin), (xmax, ymax)):
+                self.lignes.ajouter(y, k)
+                self.colonnes.ajouter(x, k)
+            if self.étendue is None:
+                self.étendue = (xmin, ymin, xmax, ymax)
+            else:
+                self.étendue = (min(self.étendue[0], xmin),
+                                min(self.étendue[1], ymin),
+                                max(self.étendue[2], xmax),
+                                max(self.étendue[3], ymax))
+            if xmin == xmax or ymin == ymax:
+                self.plats.append(k)
+        self.nombre = len(self.obstacles)
+
+    def à_jour(self):
+        if self.nombre is None or self.nombre > len(self.obstacles):
+            self.indexer()
+        elif self.nombre < len(self.obstacles):
+            self.compléter()
+        return self.grille
+
+    def contenant(self, x, y):
+        """Un obstacle contenant la position (bords compris), ou None
+        """
+        grille = self.à_jour()
+        for k in sorted(grille.cases.get(grille.case(x, y), ())):
+            o = self.obstacles[k]
+            if (o.coin_min.largeur <= x <= o.coin_max.largeur
+                    and o.coin_min.hauteur <= y <= o.coin_max.hauteur):
+                return o
+        return None
+
+    def alignés(self, x, y, horizontale):
+        """Rangs des obstacles dont un coin est porté, à la tolérance du
+        critère d'intersection près, par la droite horizontale (ou
+        verticale) passant par (x, y)
+        """
+        retour = ()
+        if self.étendue is not None:
+            xmin, ymin, xmax, ymax = self.étendue
+            if horizontale:
+                droites, c = self.lignes, y
+                distance = max(abs(x - xmin), abs(x - xmax))
+            else:
+                droites, c = self.colonnes, x
+                distance = max(abs(y - ymin), abs(y - ymax))
+            écart = TOLÉRANCE_COLINÉAIRE * distance
+            retour = droites.entre(c - écart, c + écart)
+        return retour
+
+    def croisant(self, x0, y0, x1, y1, colinéaires=True):
+        """Obstacles susceptibles de toucher le segment donné, dans l'ordre
+        de la liste.
+
+        Si 'colinéaires' est vrai, s'y ajoutent les obstacles dont un bord
+        est parallèle au segment et porté par la même droite, quelle que
+        soit la distance : ceux dont un coin est sur la droite d'un segment
+        horizontal ou vertical, et les obstacles plats pour tout autre
+        segment. Sinon, seuls restent ceux qui recoupent la boîte englobante
+        du segment.
+        """
+        grille = self.à_jour()
+        rangs = set()
+        for c in grille.cases_segment(x0, y0, x1, y1):
+            rangs.update(grille.cases.get(c, ()))
+        if not colinéaires:
+            xmin, xmax = sorted((x0, x1))
+            ymin, ymax = sorted((y0, y1))
+            rangs = [k for k in rangs
+                     if self.obstacles[k].coin_min.largeur <= xmax
+                     and xmin <= self.obstacles[k].coin_max.largeur
+                     and self.obstacles[k].coin_min.hauteur <= ymax
+                     and ymin <= self.obstacles[k].coin_max.hauteur]
+        elif y0 == y1 and x0 != x1:
+            rangs.update(self.alignés(x0, y0, True))
+        elif x0 == x1 and y0 != y1:
+            rangs.update(self.alignés(x0, y0, False))
+        elif x0 != x1:
+            rangs.update(self.plats)
+        return [self.obstacles[k] for k in sorted(rangs)]
+
+    def dans_rectangle(self, xmin, ymin, xmax, ymax):
+        """Obstacles recoupant le rectangle donné (bords compris), dans
+        l'ordre de la liste
+        """
+        grille = self.à_jour()
+        retour = list()
+        for k in sorted(grille.dans_rectangle(xmin, ymin, xmax, ymax)):
+            o = self.obstacles[k]
+            if (o.coin_min.largeur <= xmax and xmin <= o.coin_max.largeur
+                    and o.coin_min.hauteur <= ymax
+                    and ymin <= o.coin_max.hauteur):
+                retour.append(o)
+        return retour
+
+
+class IndexSpatial(graphe.Observateur):
+    """Index des nœuds et des liens d'un graphe, tenu à jour au fil de ses
+    modifications
+
+    'cache_géométrie' est le cache de la géométrie des liens du graphe,
+    créé au besoin.
+    """
+
+    def __init__(self, graphe, cache_géométrie=None, côté=32):
+        self.graphe = graphe
+        if cache_géométrie is None:
+            cache_géométrie = géométrie.GéométrieLiens(graphe)
+        self.géométrie = cache_géométrie
+        self.nœuds = Grille(côté)
+        self.liens = Grille(côté)
+        for n in graphe.iter_nœuds():
+            self.indexer_nœud(n)
+        for l in graphe.iter_liens():
+            self.indexer_lien(l)
+        graphe.abonner(self)
+
+    def indexer_nœud(self, nœud):
+        if "position" in nœud:
+            p = nœud["position"]
+            self.nœuds.insérer(nœud, [self.nœuds.case(p.largeur, p.hauteur)])
+        else:
+            self.nœuds.retirer(nœud)
+
+    def indexer_lien(self, lien):
+        # Seuls les liens binaires dont les extrémités sont placées ont une
+        # géométrie
+        if (len(lien.liaisons) == 2
+                and all("position" in n for n in lien.liaisons)):
+            p0 = lien.liaisons[0]["position"]
+            p1 = lien.liaisons[1]["position"]
+            self.liens.insérer(lien, self.liens.cases_segment(
+                p0.largeur, p0.hauteur, p1.largeur, p1.hauteur))
+        else:
+            self.liens.retirer(lien)
+
+    # Suivi des modifications du graphe
+
+    def nœud_supprimé(self, nœud):
+        self.nœuds.retirer(nœud)
+
+    def lien_supprimé(self, lien):
+        self.liens.retirer(lien)
+
+    def associés(self, item, autre):
+        self.indexer_lien(item if item.est_arête else autre)
+
+    def détachés(self, item, autre):
+        self.indexer_lien(item if item.est_arête else autre)
+
+    def attribut_modifié(self, item, clef, ancienne):
+        if clef == "position" and not item.est_arête:
+            self.indexer_nœud(item)
+            for l in item.liaisons:
+                self.indexer_lien(l)
+
+    # Requêtes
+
+    def nœud_proche(self, position, *exclus, rayon=math.inf):
+        """Nœud le plus proche de la position, et sa distance à celle-ci.
+
+        Seuls les nœuds situés à moins de 'rayon' sont pris en compte.
+        """
+        retour = self.plus_proches_nœuds(position, 1, *exclus, rayon=rayon)
+        if len(retour) == 0:
+            retour = [(None, math.inf)]
+        return retour[0]
+
+    def plus_proches_nœuds(self, position, k, *exclus, rayon=math.inf):
+        """Les 'k' nœuds les plus proches de la position, à moins de 'rayon',
+        accompagnés de leur distance et triés par distance croissante. À
+        distance égale, le nœud de plus petit identifiant passe en premier :
+        la réponse ne dépend pas de l'ordre de parcours des cases.
+        """
+        x = position.largeur
+        y = position.hauteur
+        # Tas des 'k' meilleurs candidats, le moins bon en tête
+        tas = list()
+        for minoration, contenu in self.nœuds.anneaux(x, y):
+            if minoration > rayon or (len(tas) == k
+                                      and minoration > -tas[0][0]):
+                break
+            for n in contenu:
+                if n not in exclus:
+                    p = n["position"]
+                    d = math.hypot(p.largeur - x, p.hauteur - y)
+                    if d <= rayon:
+                        élément = (-d, -n.ident, n)
+                        if len(tas) < k:
+                            heapq.heappush(tas, élément)
+                        elif élément[:2] > tas[0][:2]:
+                            heapq.heapreplace(tas, élément)
+        return [(n, -d) for d, _, n in sorted(tas, key=lambda e: e[:2],
+                                              reverse=True)]
+
+    def lien_proche(self, position, rayon=math.inf):
+        """Lien le plus proche de la position, à moins de 'rayon', et sa
+        distance à celle-ci. À distance égale, le lien de plus petit
+        identifiant est retenu.
+        """
+        x = position.largeur
+        y = position.hauteur
+        retour = None
+        distance = math.inf
+        vus = set()
+        for minoration, contenu in self.liens.anneaux(x, y):
+            if minoration > rayon or minoration > distance:
+                break
+            for l in sorted(contenu - vus, key=lambda l: l.ident):
+                h = distance_lien(self.géométrie[l], x, y)
+                if h <= rayon and (h < distance or (
+                        retour is not None and h == distance
+                        and l.ident < retour.ident)):
+                    retour = l
+                    distance = h
+            vus.update(contenu)
+        return retour, distance
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""Interface graphique du jeu, à l'aide de pygame
+
+Les actions du joueur sont traduites en opérations du niveau («Niveau» du
+module «échangeur», qui ne dépend pas de pygame) ; ce module n'est chargé
+que pour jouer ou rejouer une partie.
+
+Les flèches font défiler la vue, «+» et «-» la zooment autour du centre de
+l'écran, et «Début» la ramène à l'origine du monde.
+"""
+
+# Dépendance(s) standard(s)
+import logging
+import random
+
+# Dépendance(s) interne(s)
+import caméra
+import historique
+import journal
+import mesures
+import rendu
+import échangeur
+
+# Dépendance(s) externe(s)
+import pygame
+
+
+# Cadence de la boucle d'interaction
+IMAGES_PAR_SECONDE = 60
+# Rayon des nœuds, et distance de désignation d'un élément
+RAYON = 10
+# Dimensions de la fenêtre
+DIMENSIONS = échangeur.V2(640, 480)
+# Défilement de la vue par touche fléchée, en pixels
+DÉFILEMENT = 64
+# Facteur de zoom par appui sur «+» (et, inversé, sur «-»)
+ZOOM = 1.25
+
+DÉFILEMENTS = {
+    pygame.K_LEFT: (-DÉFILEMENT, 0),
+    pygame.K_RIGHT: (DÉFILEMENT, 0),
+    pygame.K_UP: (0, -DÉFILEMENT),
+    pygame.K_DOWN: (0, DÉFILEMENT),
+}
+ZOOMS = {
+    pygame.K_PLUS: ZOOM,
+    pygame.K_KP_PLUS: ZOOM,
+    pygame.K_EQUALS: ZOOM,
+    pygame.K_MINUS: 1 / ZOOM,
+    pygame.K_KP_MINUS: 1 / ZOOM,
+}
+
+
+class Interface:
+    """Traitement des actions du joueur, image par image.
+
+    Les événements reçus pendant une image sont traités dans leur ordre
+    d'arrivée, à ceci près que les déplacements successifs de la souris sont
+    regroupés : seule la dernière position demandée pour le nœud sélectionné
+    est validée, juste avant l'événement suivant ou en fin d'image. L'écran
+    est ensuite mis à jour une seule fois. Sans affichage ('affichage' vaut
+    None), seul le niveau est tenu à jour.
+
+    Les positions de la souris sont converties en coordonnées du monde par
+    la caméra de l'affichage, ou à défaut par une caméra aux dimensions de
+    la fenêtre : une session rejouée sans affichage suit la même vue.
+    """
+
+    def __init__(self, niveau, affichage, rayon, nom_fichier=None):
+        self.niveau = niveau
+        self.rendu = affichage
+        self.rayon = rayon
+        self.nom_fichier = nom_fichier
+        if affichage is not None:
+            self.caméra = affichage.caméra
+        else:
+            self.caméra = caméra.Caméra(*DIMENSIONS.en_tuple())
+        self.historique = historique.Historique(niveau.graphe)
+        # Modifications du graphe, détaillées au niveau DEBUG du journal
+        # «graphe»
+        self.journal = journal.Journal(niveau.graphe)
+        # Instrumentation, activée par F3 (et affichée en incrustation) ;
+        # F4 ajoute le bilan au fichier «mesures.jsonl»
+        self.mesures = mesures.Mesures()
+        # Nœud sélectionné, et dernière position demandée pour celui-ci,
+        # pas encore validée
+        self.point = None
+        self.cible = None
+        self.modif = True
+        self.complet = False
+        self.fini = False
+
+    def image(self, événements):
+        """Traite les événements reçus depuis l'image précédente, puis met
+        l'écran à jour
+        """
+        self.mesures.commencer_image()
+        for évt in événements:
+            if self.fini:
+                break
+            if évt.type == pygame.MOUSEMOTION:
+                if self.point is not None:
+                    self.cible = self.position(évt.pos)
+            else:
+                self.déplacer()
+                self.traiter(évt)
+        self.déplacer()
+
+        if self.modif:
+            if self.rendu is not None:
+                self.rendu.dessiner()
+            self.modif = False
+
+        complet = self.niveau.est_complet()
+        if complet and not self.complet:
+            logging.info("Bravo !")
+        self.complet = complet
+
+        if self.mesures.actif:
+            self.mesures.compter("événements", len(événements))
+            self.mesures.terminer_image()
+            if self.rendu is not None:
+                self.rendu.incruster(self.mesures.lignes())
+
+    def traiter(self, évt):
+        if (évt.type == pygame.QUIT
+                or (évt.type == pygame.KEYDOWN
+                    and évt.key == pygame.K_ESCAPE)):
+            self.fini = True
+        elif évt.type == pygame.KEYDOWN:
+            self.touche(évt.key, évt.mod)
+        elif évt.type == pygame.MOUSEBUTTONUP:
+            self.relâcher()
+        elif évt.type == pygame.MOUSEBUTTONDOWN:
+            self.appuyer(self.position(évt.pos), évt.button)
+
+    def position(self, pixel):
+        """Point du monde, en coordonnées entières, sous la position donnée
+        de l'écran
+        """
+        x, y = self.caméra.vers_monde(*pixel)
+        return échangeur.V2(round(x), round(y))
+
+    def touche(self, touche, modificateurs):
+        if touche == pygame.K_F3:
+            if self.mesures.actif:
+                self.mesures.retirer()
+                if self.rendu is not None:
+                    self.rendu.incruster([])
+            else:
+                échangeur.instrumenter(self.mesures, self.niveau, self.rendu)
+        elif touche == pygame.K_F4:
+            self.mesures.écrire("mesures.jsonl", niveau=self.nom_fichier,
+                                nœuds=len(self.niveau.graphe.sommets),
+                                liens=len(self.niveau.graphe.arêtes))
+        elif modificateurs & pygame.KMOD_CTRL:
+            # Ctrl+Z : annulation ; Ctrl+Y ou Ctrl+Maj+Z : rétablissement
+            fait = False
+            if (touche == pygame.K_z
+                    and not modificateurs & pygame.KMOD_SHIFT):
+                fait = self.historique.annuler()
+            elif touche in (pygame.K_y, pygame.K_z):
+                fait = self.historique.rétablir()
+            if fait:
+                self.point = None
+                self.modif = True
+        elif touche in DÉFILEMENTS:
+            self.caméra.défiler(*DÉFILEMENTS[touche])
+            self.recadrer()
+        elif touche in ZOOMS:
+            self.caméra.zoomer(ZOOMS[touche])
+            self.recadrer()
+        elif touche == pygame.K_HOME:
+            self.caméra.réinitialiser()
+            self.recadrer()
+
+    def recadrer(self):
+        """Prend en compte un changement de vue : tout l'écran est à
+        redessiner
+        """
+        if self.rendu is not None:
+            self.rendu.invalider_tout()
+        self.modif = True
+
+    def déplacer(self):
+        """Valide le déplacement en attente du nœud sélectionné. Lorsqu'il
+        viole une règle de cohérence, la sélection est perdue (voir
+        «règles.txt»).
+        """
+        position = self.cible
+        self.cible = None
+        if position is not None and self.point is not None:
+            if self.niveau.déplacer_nœud(self.point, position):
+                self.modif = True
+            else:
+                # La sélection du nœud est perdue : reprise de l'action
+                # 'pygame.MOUSEBUTTONUP'
+                self.relâcher()
+
+    def relâcher(self):
+        """Fin de l'action du joueur, qui forme une transaction : le nœud
+        sélectionné est fusionné avec celui sur lequel il est lâché
+        """
+        if self.point is not None:
+            if self.niveau.fusionner(self.point, self.rayon):
+                logging.info("Fusion de deux nœuds")
+                self.modif = True
+            self.point = None
+        self.historique.terminer()
+
+    def appuyer(self, position, bouton):
+        self.historique.commencer()
+        niveau = self.niveau
+        rayon = self.rayon
+        nœud, dn = niveau.nœud_proche(position, rayon=10 * rayon)
+        lien, dl = niveau.lien_proche(position, rayon=rayon / 2)
+        if dn <= rayon:
+            if nœud["amovible"]:
+                logging.info("Sélection d'un nœud")
+                if bouton == 1:
+                    # Bouton gauche : sélection du nœud
+                    self.point = nœud
+                elif bouton == 3:
+                    # Bouton droit : suppression du nœud
+                    niveau.graphe.supprimer_nœud(nœud)
+                    self.modif = True
+
+        elif dl <= rayon / 2:
+            logging.info("Sélection d'un lien")
+            if bouton == 1:
+                # Bouton gauche : césure du segment
+                self.point = niveau.couper_lien(lien, position)
+                self.modif = True
+            elif bouton == 3:
+                # Bouton droit: suppression du lien
+                niveau.graphe.supprimer_lien(lien)
+                self.modif = True
+            elif bouton in (4, 5):
+                # Molette haut → augmentation du palier, bas → diminution
+                if niveau.changer_palier(lien, 1 if bouton == 4 else -1):
+                    self.modif = True
+
+        else:
+            if niveau.est_dans_un_obstacle(position):
+                logging.debug("Intersection avec un obstacle")
+            else:
+                logging.info("Ajout d'un nœud/lien")
+                # Nouveau nœud, relié au nœud voisin le cas échéant
+                self.point = niveau.ajouter_nœud(
+                    position, nœud if dn <= 10 * rayon else None)
+                self.modif = True
+
+
+def jouer(nom_fichier, session=None, graine=1977):
+    """Boucle d'interaction sur le niveau, enregistrée dans le fichier
+    'session' s'il est fourni
+    """
+    random.seed(graine)
+    pygame.init()
+    écran = pygame.display.set_mode(DIMENSIONS.en_tuple())
+
+    # Chargement du niveau
+    niveau = échangeur.Niveau()
+    niveau.charger(nom_fichier)
+    affichage = rendu.Compositeur(écran, niveau, RAYON, échangeur.PALIERS)
+    interface = Interface(niveau, affichage, RAYON, nom_fichier)
+    enregistreur = None
+    if session is not None:
+        # Import à la demande : «session» dépend de ce module
+        import session as enregistrement
+        enregistreur = enregistrement.Enregistreur(session, nom_fichier,
+                                                   graine)
+
+    # Boucle d'interaction, à cadence fixe : tous les événements en attente
+    # sont traités à chaque image
+    horloge = pygame.time.Clock()
+    while not interface.fini:
+        événements = pygame.event.get()
+        if enregistreur is not None:
+            enregistreur.image(événements)
+        interface.image(événements)
+        horloge.tick(IMAGES_PAR_SECONDE)
+    if enregistreur is not None:
+        enregistreur.fermer()
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""Plus courts chemins des liaisons d'un niveau, tenus à jour au fil des
+modifications du réseau
+
+Pour chaque liaison sont conservés son plus court chemin (la longueur d'un
+lien étant la distance euclidienne entre ses extrémités), sa longueur «D»,
+et les distances au départ et à l'arrivée des nœuds qui en sont à moins de
+«D». Après une modification :
+
+- un lien qui disparaît ou s'allonge n'invalide que les chemins qui
+  l'empruntent ;
+- un lien qui apparaît ou raccourcit n'invalide un chemin que s'il permet
+  de le raccourcir, ce qui se lit directement dans les distances
+  conservées ; sinon, ces distances sont abaissées de proche en proche
+  (Dijkstra dynamique), sans recalcul complet.
+
+Les chemins invalidés sont recalculés à la demande.
+"""
+
+# Dépendance(s) standard(s)
+import heapq
+import itertools
+import math
+
+# Dépendance(s) interne(s)
+import graphe
+
+# Dépendance(s) externe(s)
+
+
+def est_parcourable(lien):
+    return (len(lien.liaisons) == 2
+            and all("position" in n for n in lien.liaisons))
+
+
+def autre_extrémité(lien, nœud):
+    return lien.liaisons[1 if lien.liaisons[0] is nœud else 0]
+
+
+def dijkstra(distances, précédents, file, longueur, borne=math.inf,
+             arrivée=None):
+    """Étend les distances depuis les nœuds de la file de priorité, sans
+    dépasser 'borne'. La recherche s'interrompt sur 'arrivée', s'il est
+    fourni, une fois celui-ci atteint.
+
+    'distances' ne peut que diminuer : les valeurs déjà présentes sont des
+    minorants des distances réelles.
+    """
+    ordre = itertools.count()
+    file = [(d, next(ordre), n) for d, n in file]
+    heapq.heapify(file)
+    while len(file) > 0:
+        d, _, nœud = heapq.heappop(file)
+        if d > distances.get(nœud, math.inf):
+            continue
+        if nœud is arrivée:
+            break
+        for lien in nœud.liaisons:
+            if not est_parcourable(lien):
+                continue
+            autre = autre_extrémité(lien, nœud)
+            distance = d + longueur(lien)
+            if (distance < distances.get(autre, math.inf)
+                    and distance <= borne):
+                distances[autre] = distance
+                if précédents is not None:
+                    précédents[autre] = lien
+                heapq.heappush(file, (distance, next(ordre), autre))
+
+
+def plus_court_chemin(départ, arrivée, longueur):
+    """Liste des liens du plus court chemin entre deux nœuds, ou None à
+    défaut de chemin. 'longueur' donne la longueur d'un lien.
+    """
+    distances = {départ: 0}
+    précédents = dict()
+    dijkstra(distances, précédents, [(0, départ)], longueur, arrivée=arrivée)
+    return remonter(départ, arrivée, distances, précédents)
+
+
+def remonter(départ, arrivée, distances, précédents):
+    retour = None
+    if arrivée in distances:
+        retour = list()
+        nœud = arrivée
+        while nœud is not départ:
+            lien = précédents[nœud]
+            retour.append(lien)
+            nœud = autre_extrémité(lien, nœud)
+        retour.reverse()
+    return retour
+
+
+class Itinéraire:
+    """Plus court chemin d'une liaison, et distances utiles à sa mise à jour
+    """
+
+    __slots__ = ("liaison", "chemin", "distance", "avant", "arrière",
+                 "éléments", "à_recalculer")
+
+    def __init__(self, liaison):
+        self.liaison = liaison
+        self.chemin = None
+        self.distance = math.inf
+        # Distances depuis le départ, et jusqu'à l'arrivée, des nœuds qui en
+        # sont à au plus «distance»
+        self.avant = dict()
+        self.arrière = dict()
+        # Liens et nœuds empruntés par le chemin
+        self.éléments = list()
+        self.à_recalculer = True
+
+
+class Itinéraires(graphe.Observateur):
+    """Service des plus courts chemins des liaisons d'un niveau
+    """
+
+    def __init__(self, niveau):
+        self.niveau = niveau
+        self.liste = list()
+        # Itinéraires (par numéro) empruntant chaque lien ou nœud
+        self.empruntés = dict()
+        # Longueur de chaque lien parcourable, lors de sa dernière prise en
+        # compte
+        self.longueurs = dict()
+        # Nombre de recalculs complets, pour le suivi des performances
+        self.recalculs = 0
+        niveau.graphe.abonner(self)
+
+    def longueur(self, lien):
+        return math.sqrt(self.niveau.géométrie[lien].norme2)
+
+    # Consultation
+
+    def synchroniser(self):
+        """Suit l'ajout ou le retrait de liaisons dans le niveau
+        """
+        flux = self.niveau.flux
+        if (len(self.liste) != len(flux)
+                or any(i.liaison is not f for i, f in zip(self.liste, flux))):
+            self.liste = [Itinéraire(f) for f in flux]
+            self.empruntés.clear()
+
+    def itinéraire(self, numéro):
+        self.synchroniser()
+        retour = self.liste[numéro]
+        if retour.à_recalculer:
+            self.recalculer(numéro)
+        return retour
+
+    def chemin(self, numéro):
+        """Liste des liens du plus court chemin de la liaison de ce numéro
+        dans «Niveau.flux», ou None à défaut de chemin
+        """
+        return self.itinéraire(numéro).chemin
+
+    def distance(self, numéro):
+        return self.itinéraire(numéro).distance
+
+    def chemins(self):
+        """Plus courts chemins de toutes les liaisons, dans l'ordre de
+        «Niveau.flux»
+        """
+        self.synchroniser()
+        return [self.chemin(k) for k in range(len(self.liste))]
+
+    def recalculer(self, numéro):
+        itinéraire = self.liste[numéro]
+        for e in itinéraire.éléments:
+            self.oublier(e, numéro)
+
+        nid = itinéraire.liaison.nid
+        but = itinéraire.liaison.but
+        précédents = dict()
+        avant = {nid: 0}
+        dijkstra(avant, précédents, [(0, nid)], self.longueur, arrivée=but)
+        itinéraire.chemin = remonter(nid, but, avant, précédents)
+        itinéraire.distance = avant.get(but, math.inf)
+        # Distances complètes jusqu'à la borne
+        dijkstra(avant, None, [(d, n) for n, d in avant.items()],
+                 self.longueur, itinéraire.distance)
+        itinéraire.avant = {n: d for n, d in avant.items()
+                            if d <= itinéraire.distance}
+        itinéraire.arrière = {but: 0}
+        dijkstra(itinéraire.arrière, None, [(0, but)], self.longueur,
+                 itinéraire.distance)
+        itinéraire.à_recalculer = False
+        self.recalculs += 1
+
+        itinéraire.éléments = list()
+        if itinéraire.chemin is not None:
+            nœud = nid
+            itinéraire.éléments.append(nœud)
+            for l in itinéraire.chemin:
+                nœud = autre_extrémité(l, nœud)
+                itinéraire.éléments.extend((l, nœud))
+                self.longueurs[l] = self.longueur(l)
+        for e in itinéraire.éléments:
+            self.empruntés.setdefault(e, set()).add(numéro)
+
+    def oublier(self, item, numéro):
+        numéros = self.empruntés.get(item)
+        if numéros is not None:
+            numéros.discard(numéro)
+            if len(numéros) == 0:
+                del self.empruntés[item]
+
+    # Invalidation
+
+    def invalider(self, item):
+        """Invalide les itinéraires empruntant le lien ou nœud
+        """
+        for k in self.empruntés.pop(item, ()):
+            self.liste[k].à_recalculer = True
+
+    def raccourci(self, lien):
+        """Prend en compte l'apparition ou le raccourcissement du lien
+        """
+        longueur = self.longueur(lien)
+        self.longueurs[lien] = longueur
+        u, v = lien.liaisons
+        for itinéraire in self.liste:
+            if itinéraire.à_recalculer:
+                continue
+            avant = itinéraire.avant
+            arrière = itinéraire.arrière
+            if (min(avant.get(u, math.inf) + arrière.get(v, math.inf),
+                    avant.get(v, math.inf) + arrière.get(u, math.inf))
+                    + longueur < itinéraire.distance):
+                itinéraire.à_recalculer = True
+            else:
+                for distances in (avant, arrière):
+                    file = list()
+                    for a, b in ((u, v), (v, u)):
+                        d = distances.get(a, math.inf) + longueur
+                        if (d < distances.get(b, math.inf)
+                                and d <= itinéraire.distance):
+                            distances[b] = d
+                            file.append((d, b))
+                    if len(file) > 0:
+                        dijkstra(distances, None, file, self.longueur,
+                                 itinéraire.distance)
+
+    # Suivi des modifications du graphe
+
+    def nœud_supprimé(self, nœud):
+        self.invalider(nœud)
+
+    def lien_supprimé(self, lien):
+        self.invalider(lien)
+        self.longueurs.pop(lien, None)
+
+    def associés(self, item, autre):
+        lien = item if item.est_arête else autre
+        if est_parcourable(lien):
+            self.raccourci(lien)
+
+    def détachés(self, item, autre):
+        lien = item if item.est_arête else autre
+        self.invalider(lien)
+        self.longueurs.pop(lien, None)
+        # Un lien reporté d'un nœud sur un autre («fusionner_nœuds») relie
+        # à nouveau deux nœuds une fois l'ancien détaché
+        if est_parcourable(lien):
+            self.raccourci(lien)
+
+    def attribut_modifié(self, item, clef, ancienne):
+        if clef == "position" and not item.est_arête:
+            for lien in item.liaisons:
+                if not est_parcourable(lien):
+                    continue
+                self.invalider(lien)
+                longueur = self.longueur(lien)
+                if longueur < self.longueurs.get(lien, math.inf):
+                    self.raccourci(lien)
+                else:
+                    self.longueurs[lien] = longueur
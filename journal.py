@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Journal des modifications d'un graphe
+
+Chaque opération notifiée par le graphe donne une entrée compacte : son
+numéro d'ordre, sa nature, et les identifiants des éléments concernés,
+préfixés de «N» pour les nœuds et de «L» pour les liens. Les identifiants
+d'un graphe ne sont jamais réutilisés : ils désignent sans ambiguïté un même
+élément d'un bout à l'autre du journal. Les natures d'opérations sont :
+
+- «+» et «-» : ajout et suppression d'un élément ;
+- «fusion» : fusion d'un nœud dans un autre (suivie des reports de liens) ;
+- «lie» et «délie» : attache et détachement d'un lien et d'un nœud ;
+- «=» : nouvelle valeur d'un attribut (palier, position…).
+
+Les entrées sont conservées dans un tampon circulaire, et transmises au
+journal «graphe» du module «logging» au niveau DEBUG : tant que ce niveau
+n'est pas actif, rien n'est mis en forme.
+"""
+
+# Dépendance(s) standard(s)
+import collections
+import enum
+import itertools
+import json
+import logging
+
+# Dépendance(s) interne(s)
+import graphe
+
+# Dépendance(s) externe(s)
+
+
+JOURNAL = logging.getLogger("graphe")
+
+
+def nom(item):
+    """Identifiant stable de l'élément dans le journal
+    """
+    return f"{'L' if item.est_arête else 'N'}{item.ident}"
+
+
+def valeur_json(valeur):
+    """Représentation JSON des valeurs d'attributs
+    """
+    if isinstance(valeur, enum.Enum):
+        return valeur.name
+    if hasattr(valeur, "en_tuple"):
+        return list(valeur.en_tuple())
+    raise TypeError(valeur)
+
+
+def instantané(graphe):
+    """État complet du graphe : attributs des nœuds, extrémités et
+    attributs des liens, indexés par identifiant. Chaque colonne
+    d'attributs n'est parcourue qu'une fois.
+    """
+    nœuds = {nom(n): dict() for n in graphe.iter_nœuds()}
+    liens = {nom(l): {"nœuds": sorted(nom(n) for n in l.liaisons)}
+             for l in graphe.iter_liens()}
+    for clef, colonne in graphe.colonnes.items():
+        for ident, valeur in colonne.items():
+            if ident in graphe.sommets:
+                nœuds[f"N{ident}"][clef] = valeur
+            elif ident in graphe.arêtes:
+                liens[f"L{ident}"][clef] = valeur
+    return {"nœuds": nœuds, "liens": liens}
+
+
+class Journal(graphe.Observateur):
+    """Journal des opérations d'un graphe, limité aux 'capacité' dernières
+    """
+
+    def __init__(self, graphe, capacité=10000):
+        self.graphe = graphe
+        self.entrées = collections.deque(maxlen=capacité)
+        self.numéros = itertools.count()
+        graphe.abonner(self)
+
+    def enregistrer(self, *entrée):
+        entrée = (next(self.numéros), *entrée)
+        self.entrées.append(entrée)
+        if JOURNAL.isEnabledFor(logging.DEBUG):
+            JOURNAL.debug("%s", json.dumps(entrée, ensure_ascii=False,
+                                           default=valeur_json))
+
+    def écrire(self, fichier):
+        """Écrit les entrées conservées, au format JSON (une par ligne)
+        """
+        for e in self.entrées:
+            print(json.dumps(e, ensure_ascii=False, default=valeur_json),
+                  file=fichier)
+
+    # Suivi des modifications du graphe
+
+    def nœud_ajouté(self, nœud):
+        self.enregistrer("+", nom(nœud))
+
+    def lien_ajouté(self, lien):
+        self.enregistrer("+", nom(lien))
+
+    def nœud_supprimé(self, nœud):
+        self.enregistrer("-", nom(nœud))
+
+    def lien_supprimé(self, lien):
+        self.enregistrer("-", nom(lien))
+
+    def nœuds_fusionnés(self, nid, but):
+        self.enregistrer("fusion", nom(nid), nom(but))
+
+    def associés(self, item, autre):
+        lien, nœud = (item, autre) if item.est_arête else (autre, item)
+        self.enregistrer("lie", nom(lien), nom(nœud))
+
+    def détachés(self, item, autre):
+        lien, nœud = (item, autre) if item.est_arête else (autre, item)
+        self.enregistrer("délie", nom(lien), nom(nœud))
+
+    def attribut_modifié(self, item, clef, ancienne):
+        self.enregistrer("=", nom(item), clef, item.get(clef))
+
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Instrumentation des points chauds du jeu
+
+Les fonctions et méthodes à surveiller sont remplacées, sur l'objet qui les
+porte (instance, classe ou module), par une enveloppe qui compte leurs appels
+et cumule leur durée ; «retirer» remet les originales en place. Désactivée,
+l'instrumentation ne coûte donc rien : aucun code n'est interposé.
+
+Les durées sont réparties par image (voir «Mesures.commencer_image») et
+conservées sur une fenêtre glissante, dont «bilan» donne la moyenne par
+image de chaque point mesuré, et la part du temps de l'image qu'aucun d'eux
+ne couvre.
+"""
+
+# Dépendance(s) standard(s)
+import collections
+import contextlib
+import functools
+import json
+import time
+
+# Dépendance(s) interne(s)
+
+# Dépendance(s) externe(s)
+
+
+# Nombre d'images de la fenêtre glissante
+FENÊTRE = 120
+# Budget d'une image, en secondes
+BUDGET = 1 / 60
+
+
+class Mesures:
+    """Compteurs et chronomètres, cumulés image par image
+    """
+
+    def __init__(self, fenêtre=FENÊTRE, budget=BUDGET):
+        self.budget = budget
+        # Fonctions remplacées : (objet, nom, original, attribut propre)
+        self.originaux = list()
+        # Image en cours : nom → [appels, durée]
+        self.courante = collections.defaultdict(lambda: [0, 0.0])
+        # Images passées : (durée de l'image, {nom: (appels, durée)})
+        self.images = collections.deque(maxlen=fenêtre)
+        # Niveau d'imbrication des appels mesurés, et durée cumulée des
+        # appels de premier niveau de l'image en cours
+        self.profondeur = 0
+        self.couvert = 0.0
+        # Instant d'ouverture de l'image en cours, None hors image
+        self.début = None
+
+    @property
+    def actif(self):
+        return len(self.originaux) > 0
+
+    # Instrumentation
+
+    def instrumenter(self, objet, nom, clef=None):
+        """Remplace l'attribut 'nom' de l'objet par une version mesurée,
+        comptabilisée sous 'clef' (par défaut, 'nom')
+        """
+        propre = nom in vars(objet)
+        original = getattr(objet, nom)
+        setattr(objet, nom, self.envelopper(original, clef or nom))
+        self.originaux.append((objet, nom, original, propre))
+
+    def retirer(self):
+        """Remet en place toutes les fonctions instrumentées
+        """
+        for objet, nom, original, propre in reversed(self.originaux):
+            if propre:
+                setattr(objet, nom, original)
+            else:
+                delattr(objet, nom)
+        self.originaux.clear()
+
+    def envelopper(self, fonction, clef):
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            with self.chronomètre(clef):
+                return fonction(*args, **kwargs)
+        return enveloppe
+
+    @contextlib.contextmanager
+    def chronomètre(self, clef):
+        """Mesure la durée du bloc, comptabilisée sous 'clef'
+        """
+        self.profondeur += 1
+        début = time.perf_counter()
+        try:
+            yield
+        finally:
+            durée = time.perf_counter() - début
+            self.profondeur -= 1
+            compte = self.courante[clef]
+            compte[0] += 1
+            compte[1] += durée
+            if self.profondeur == 0:
+                self.couvert += durée
+
+    def compter(self, clef, nombre=1):
+        """Incrémente un compteur, sans mesure de durée
+        """
+        self.courante[clef][0] += nombre
+
+    # Images
+
+    def commencer_image(self):
+        """Ouvre une image : les mesures qui suivent lui sont rattachées
+        """
+        if self.actif:
+            self.courante.clear()
+            self.couvert = 0.0
+            self.début = time.perf_counter()
+
+    def terminer_image(self):
+        """Clôt l'image ouverte, le cas échéant, et l'ajoute à la fenêtre
+        """
+        if self.actif and self.début is not None:
+            durée = time.perf_counter() - self.début
+            comptes = {c: tuple(v) for c, v in self.courante.items()}
+            comptes["(autre)"] = (0, max(durée - self.couvert, 0.0))
+            self.images.append((durée, comptes))
+        self.début = None
+
+    def bilan(self):
+        """Moyennes par image sur la fenêtre glissante : liste de (clef,
+        appels, durée en secondes), par durée décroissante, précédée de la
+        durée totale de l'image
+        """
+        nombre = len(self.images)
+        appels = collections.Counter()
+        durées = collections.Counter()
+        for _, comptes in self.images:
+            for clef, (n, d) in comptes.items():
+                appels[clef] += n
+                durées[clef] += d
+        retour = list()
+        if nombre > 0:
+            total = sum(d for d, _ in self.images)
+            retour.append(("image", nombre, total / nombre))
+            for clef, d in durées.most_common():
+                retour.append((clef, appels[clef] / nombre, d / nombre))
+        return retour
+
+    def lignes(self):
+        """Bilan mis en forme, une ligne par point mesuré
+        """
+        retour = list()
+        for clef, appels, durée in self.bilan():
+            part = durée / self.budget
+            if clef == "image":
+                retour.append("image : %.2f ms (%.0f %% du budget, sur %d)"
+                              % (durée * 1000, part * 100, appels))
+            else:
+                retour.append("%-20s %8.3f ms %7.1f appels %5.1f %%"
+                              % (clef, durée * 1000, appels, part * 100))
+        return retour
+
+    def écrire(self, nom_fichier, **contexte):
+        """Ajoute le bilan au fichier, au format JSON (un objet par ligne)
+        """
+        entrée = dict(contexte, budget=self.budget, mesures=[
+            {"clef": c, "appels": a, "secondes": d}
+            for c, a, d in self.bilan()])
+        with open(nom_fichier, "at", encoding="utf-8") as fichier:
+            print(json.dumps(entrée, ensure_ascii=False), file=fichier)
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""Affichage d'un niveau à l'aide de pygame
+
+En mode «RECTANGLES», le rendu suit les modifications du graphe et ne
+redessine que les zones de l'écran qu'elles ont touchées (ancienne et
+nouvelle emprise d'un nœud déplacé, d'un lien coupé, supprimé ou changé de
+palier). Le mode «COMPLET» redessine tout l'écran à chaque fois.
+
+Le «Compositeur» conserve en outre une couche pré-dessinée par palier, une
+pour les nœuds amovibles et une pour le décor, recomposées à chaque image.
+
+L'écran montre la portion du monde choisie par une «caméra.Caméra». Seuls
+les éléments recoupant une zone à redessiner sont tracés, retrouvés au moyen
+des index spatiaux du niveau : le coût d'une image dépend de ce qui est vu,
+non de la taille du monde. Un changement de vue redessine tout l'écran, et
+ne garde en mémoire que les régions du monde visibles (voir
+«Niveau.cadrer»).
+"""
+
+# Dépendance(s) standard(s)
+import enum
+import math
+
+# Dépendance(s) interne(s)
+import caméra
+import graphe
+
+# Dépendance(s) externe(s)
+import pygame
+
+
+NOIR = (0, 0, 0)
+VERT = (0, 255, 0)
+
+# Au-delà de ce nombre de zones à redessiner, elles sont fusionnées en une
+RECTANGLES_MAX = 32
+
+
+class Mode(enum.IntEnum):
+
+    COMPLET = enum.auto()
+    RECTANGLES = enum.auto()
+
+
+def dessiner_lien(surface, lien, rayon, vue):
+    """Trace le lien, vu par la caméra 'vue', comme un rectangle d'épaisseur
+    'rayon' (à l'échelle du monde).
+
+    Contrairement à «pygame.draw.line», le tracé d'un polygone ne dépend pas
+    de la zone de découpe de la surface : une zone redessinée seule est
+    identique au même endroit d'un écran redessiné entièrement.
+    """
+    x0, y0 = vue.vers_écran(*lien.liaisons[0]["position"].en_tuple())
+    x1, y1 = vue.vers_écran(*lien.liaisons[1]["position"].en_tuple())
+    dx = x1 - x0
+    dy = y1 - y0
+    norme = math.hypot(dx, dy)
+    if norme != 0:
+        ox = -dy / norme * rayon * vue.zoom / 2
+        oy = dx / norme * rayon * vue.zoom / 2
+        pygame.draw.polygon(surface, lien["couleur"],
+                            [(x0 + ox, y0 + oy), (x1 + ox, y1 + oy),
+                             (x1 - ox, y1 - oy), (x0 - ox, y0 - oy)])
+
+
+def dessiner_nœud(surface, nœud, rayon, vue):
+    pygame.draw.circle(surface, nœud["couleur"],
+                       vue.vers_écran(*nœud["position"].en_tuple()),
+                       rayon * vue.zoom)
+
+
+def dessiner_obstacle(surface, obstacle, vue):
+    pygame.draw.rect(surface, VERT, rectangle_obstacle(obstacle, vue))
+
+
+def rectangle_obstacle(obstacle, vue):
+    x0, y0 = vue.vers_écran(*obstacle.coin_min.en_tuple())
+    x1, y1 = vue.vers_écran(*obstacle.coin_max.en_tuple())
+    return pygame.Rect(round(x0), round(y0), round(x1) - round(x0),
+                       round(y1) - round(y0))
+
+
+def regrouper(zones):
+    """Zones à redessiner, sans doublon, éventuellement fusionnées en une
+    seule lorsqu'elles sont trop nombreuses ou se recouvrent trop
+    """
+    retour = list()
+    for z in zones:
+        if z not in retour:
+            retour.append(z)
+    if len(retour) > 1:
+        union = retour[0].unionall(retour[1:])
+        if (len(retour) > RECTANGLES_MAX
+                or sum(z.width * z.height for z in retour)
+                >= union.width * union.height):
+            retour = [union]
+    return retour
+
+
+def est_dessinable(lien):
+    return (len(lien.liaisons) == 2
+            and all("position" in n for n in lien.liaisons))
+
+
+class Rendu(graphe.Observateur):
+    """Affichage du niveau vu par la caméra 'vue' (par défaut, l'origine du
+    monde sans zoom)
+    """
+
+    def __init__(self, écran, niveau, rayon, mode=Mode.RECTANGLES,
+                 vue=None):
+        self.écran = écran
+        self.niveau = niveau
+        self.rayon = rayon
+        self.mode = mode
+        if vue is None:
+            vue = caméra.Caméra(*écran.get_size())
+        self.caméra = vue
+        # Zones de l'écran à redessiner, associées à la couche touchée ;
+        # None pour l'écran entier
+        self.zones = None
+        # Emprise du dernier texte incrusté, et police utilisée
+        self.incrustation = None
+        self.police = None
+        niveau.graphe.abonner(self)
+
+    def invalider(self, couche, *positions):
+        """Marque à redessiner la zone de la couche englobant les positions
+        données
+        """
+        if self.zones is not None and len(positions) > 0:
+            points = [self.caméra.vers_écran(p.largeur, p.hauteur)
+                      for p in positions]
+            xmin = math.floor(min(x for x, _ in points))
+            ymin = math.floor(min(y for _, y in points))
+            zone = pygame.Rect(xmin, ymin,
+                               math.ceil(max(x for x, _ in points)) - xmin,
+                               math.ceil(max(y for _, y in points)) - ymin)
+            # Épaisseur des liens et rayon des nœuds
+            marge = 2 * math.ceil(self.rayon * self.caméra.zoom) + 2
+            zone.inflate_ip(marge, marge)
+            zone = zone.clip(self.écran.get_rect())
+            if zone.width > 0 and zone.height > 0:
+                self.zones.append((couche, zone))
+
+    def invalider_tout(self):
+        self.zones = None
+
+    def invalider_lien(self, lien, *autres, palier=None):
+        if palier is None:
+            palier = lien.get("palier")
+        self.invalider(("palier", palier),
+                       *[n["position"] for n in (*lien.liaisons, *autres)
+                         if "position" in n])
+
+    def invalider_nœud(self, nœud, position, couche=None):
+        if couche is None:
+            couche = "nœuds" if nœud.get("amovible", True) else "décor"
+        self.invalider(couche, position)
+
+    # Suivi des modifications du graphe
+
+    def nœud_supprimé(self, nœud):
+        if "position" in nœud:
+            self.invalider_nœud(nœud, nœud["position"])
+
+    def associés(self, item, autre):
+        if item.est_arête:
+            self.invalider_lien(item)
+        else:
+            self.invalider_lien(autre)
+
+    def détachés(self, item, autre):
+        # Le nœud détaché fait partie de l'ancienne emprise du lien
+        if item.est_arête:
+            self.invalider_lien(item, autre)
+        else:
+            self.invalider_lien(autre, item)
+
+    def attribut_modifié(self, item, clef, ancienne):
+        if item.est_arête:
+            self.invalider_lien(item)
+            if clef == "palier" and ancienne is not None:
+                self.invalider_lien(item, palier=ancienne)
+        else:
+            if clef == "amovible" and "position" in item:
+                self.invalider_nœud(item, item["position"], "nœuds")
+                self.invalider_nœud(item, item["position"], "décor")
+            if clef == "position" and ancienne is not None:
+                self.invalider_nœud(item, ancienne)
+                for l in item.liaisons:
+                    self.invalider(("palier", l.get("palier")), ancienne,
+                                   *[n["position"] for n in l.liaisons
+                                     if n is not item and "position" in n])
+            if "position" in item:
+                self.invalider_nœud(item, item["position"])
+                for l in item.liaisons:
+                    self.invalider_lien(l)
+
+    # Affichage
+
+    def zones_écran(self):
+        """Zones de l'écran à mettre à jour, toutes couches confondues
+        """
+        return regrouper([z for _, z in self.zones])
+
+    def cadrer(self):
+        """Ne garde en mémoire que les régions du monde visibles
+        """
+        self.niveau.cadrer(*self.caméra.visible(self.rayon))
+
+    def dessiner(self):
+        """Met à jour l'écran
+        """
+        if self.mode == Mode.COMPLET or self.zones is None:
+            if self.zones is None:
+                self.cadrer()
+            self.dessiner_tout()
+            pygame.display.flip()
+        elif len(self.zones) > 0:
+            zones = self.zones_écran()
+            for z in zones:
+                self.dessiner_zone(z)
+            pygame.display.update(zones)
+        self.zones = list()
+
+    def dessiner_tout(self):
+        self.dessiner_zone(self.écran.get_rect())
+
+    def étendue(self, zone):
+        """Rectangle de recherche, dans les index spatiaux du niveau, des
+        éléments dont le tracé peut recouper la zone de l'écran
+        """
+        marge = self.rayon * self.caméra.zoom
+        xmin, ymin = self.caméra.vers_monde(zone.left - marge,
+                                            zone.top - marge)
+        xmax, ymax = self.caméra.vers_monde(zone.right + marge,
+                                            zone.bottom + marge)
+        return (xmin, ymin, xmax, ymax)
+
+    def obstacles(self, zone):
+        """Obstacles recoupant la zone de l'écran
+        """
+        return [o for o in self.niveau.index_obstacles.dans_rectangle(
+                    *self.étendue(zone))
+                if zone.colliderect(rectangle_obstacle(o, self.caméra))]
+
+    def dessiner_zone(self, zone):
+        """Redessine les seuls éléments recoupant la zone, limitée à
+        celle-ci
+        """
+        self.écran.set_clip(zone)
+        self.écran.fill(NOIR, zone)
+        index = self.niveau.index
+
+        # Liaisons
+        liens = [l for l in index.liens.dans_rectangle(*self.étendue(zone))
+                 if est_dessinable(l)]
+        for l in sorted(liens, key=lambda l: (l["palier"], l.ident)):
+            dessiner_lien(self.écran, l, self.rayon, self.caméra)
+        # Sommets
+        for n in sorted(index.nœuds.dans_rectangle(*self.étendue(zone)),
+                        key=lambda n: n.ident):
+            dessiner_nœud(self.écran, n, self.rayon, self.caméra)
+        # Obstacles
+        for o in self.obstacles(zone):
+            dessiner_obstacle(self.écran, o, self.caméra)
+
+        self.écran.set_clip(None)
+
+    def fond(self, zone):
+        """Rétablit l'image du niveau dans la zone
+        """
+        self.dessiner_zone(zone)
+
+    def incruster(self, lignes):
+        """Affiche les lignes de texte dans le coin supérieur gauche de
+        l'écran, par-dessus le niveau ; une liste vide efface le texte
+        précédent
+        """
+        if self.police is None:
+            self.police = pygame.font.Font(None, 18)
+        textes = [self.police.render(l, True, VERT) for l in lignes]
+        zone = pygame.Rect(0, 0, 0, 0)
+        if len(textes) > 0:
+            zone.size = (max(t.get_width() for t in textes) + 8,
+                         sum(t.get_height() for t in textes) + 8)
+        à_mettre_à_jour = zone
+        if self.incrustation is not None:
+            à_mettre_à_jour = zone.union(self.incrustation)
+        if à_mettre_à_jour.width > 0 and à_mettre_à_jour.height > 0:
+            self.fond(à_mettre_à_jour)
+            hauteur = 4
+            for t in textes:
+                self.écran.blit(t, (4, hauteur))
+                hauteur += t.get_height()
+            pygame.display.update(à_mettre_à_jour)
+        self.incrustation = zone
+
+
+class Compositeur(Rendu):
+    """Rendu par superposition de couches conservées d'une image à l'autre.
+
+    Chaque palier dispose de sa propre couche de liens ; viennent ensuite la
+    couche du décor (nœuds fixes et obstacles), qui ne change plus une fois
+    le niveau chargé, puis celle des nœuds amovibles, que le joueur
+    manipule et qui restent donc au premier plan. Seules les zones modifiées
+    de chaque couche sont retracées, et l'image est obtenue en recopiant les
+    couches dans l'ordre.
+    """
+
+    def __init__(self, écran, niveau, rayon, paliers, vue=None):
+        super().__init__(écran, niveau, rayon, Mode.RECTANGLES, vue)
+        self.ordre = [("palier", p) for p in range(paliers)]
+        self.ordre += ["décor", "nœuds"]
+        self.couches = {c: pygame.Surface(écran.get_size(), pygame.SRCALPHA)
+                        for c in self.ordre}
+
+    def dessiner(self):
+        """Met à jour l'écran
+        """
+        if self.zones is None:
+            self.cadrer()
+            zone = self.écran.get_rect()
+            for c in self.ordre:
+                self.dessiner_couche(c, zone)
+            self.composer(zone)
+            pygame.display.flip()
+        elif len(self.zones) > 0:
+            for c in self.ordre:
+                for z in regrouper([z for d, z in self.zones if d == c]):
+                    self.dessiner_couche(c, z)
+            zones = self.zones_écran()
+            for z in zones:
+                self.composer(z)
+            pygame.display.update(zones)
+        self.zones = list()
+
+    def fond(self, zone):
+        self.composer(zone)
+
+    def composer(self, zone):
+        self.écran.fill(NOIR, zone)
+        for c in self.ordre:
+            self.écran.blit(self.couches[c], zone, zone)
+
+    def dessiner_couche(self, couche, zone):
+        """Retrace la couche dans la zone donnée
+        """
+        surface = self.couches[couche]
+        surface.set_clip(zone)
+        surface.fill((0, 0, 0, 0), zone)
+        étendue = self.étendue(zone)
+        index = self.niveau.index
+
+        if couche == "décor":
+            nœuds = [n for n in index.nœuds.dans_rectangle(*étendue)
+                     if not n.get("amovible", True)]
+            for n in sorted(nœuds, key=lambda n: n.ident):
+                dessiner_nœud(surface, n, self.rayon, self.caméra)
+            for o in self.obstacles(zone):
+                dessiner_obstacle(surface, o, self.caméra)
+        elif couche == "nœuds":
+            nœuds = [n for n in index.nœuds.dans_rectangle(*étendue)
+                     if n.get("amovible", True)]
+            for n in sorted(nœuds, key=lambda n: n.ident):
+                dessiner_nœud(surface, n, self.rayon, self.caméra)
+        else:
+            _, palier = couche
+            liens = [l for l in index.liens.dans_rectangle(*étendue)
+                     if est_dessinable(l) and l["palier"] == palier]
+            for l in sorted(liens, key=lambda l: l.ident):
+                dessiner_lien(surface, l, self.rayon, self.caméra)
+
+        surface.set_clip(None)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Enregistrement et rejeu des sessions de jeu
+
+Une session enregistrée est un fichier JSON, à raison d'un objet par ligne :
+une entête (niveau joué, graine du générateur aléatoire), puis une ligne par
+image de la boucle d'interaction ayant reçu des événements (numéro de
+l'image, et événements dans leur ordre d'arrivée).
+
+Le rejeu alimente l'«Interface» du jeu avec les mêmes événements, image par
+image, mais sans affichage : il reproduit exactement la partie et sert de
+banc de mesure, dont les résultats peuvent être comparés d'un moteur de
+calcul à l'autre.
+"""
+
+# Dépendance(s) standard(s)
+import argparse
+import hashlib
+import json
+import random
+import sys
+import time
+
+# Dépendance(s) interne(s)
+import banc
+import interface
+import mesures
+import échangeur
+
+# Dépendance(s) externe(s)
+import pygame
+
+
+FORMAT = 1
+
+# Événements enregistrés, et attributs conservés pour chacun
+ATTRIBUTS = {
+    pygame.MOUSEBUTTONDOWN: ("pos", "button"),
+    pygame.MOUSEBUTTONUP: ("pos", "button"),
+    pygame.MOUSEMOTION: ("pos",),
+    pygame.KEYDOWN: ("key", "mod"),
+    pygame.QUIT: (),
+}
+TYPES = {pygame.event.event_name(t): t for t in ATTRIBUTS}
+# Touches de commande de l'instrumentation, qui ne font pas partie de la
+# partie jouée
+IGNORÉES = (pygame.K_F3, pygame.K_F4)
+
+
+def encoder(évt):
+    """Représentation JSON d'un événement
+    """
+    retour = {"type": pygame.event.event_name(évt.type)}
+    for a in ATTRIBUTS[évt.type]:
+        valeur = getattr(évt, a)
+        retour[a] = list(valeur) if isinstance(valeur, tuple) else valeur
+    return retour
+
+
+def décoder(données):
+    """Événement pygame représenté par «encoder»
+    """
+    nature = TYPES[données["type"]]
+    attributs = {a: tuple(données[a]) if a == "pos" else données[a]
+                 for a in ATTRIBUTS[nature]}
+    return pygame.event.Event(nature, attributs)
+
+
+class Enregistreur:
+    """Enregistre, image par image, les événements traités par la boucle
+    d'interaction
+    """
+
+    def __init__(self, nom_fichier, niveau, graine):
+        self.fichier = open(nom_fichier, "wt", encoding="utf-8")
+        self.numéro = 0
+        self.écrire({"format": FORMAT, "niveau": niveau, "graine": graine})
+
+    def écrire(self, données):
+        print(json.dumps(données, ensure_ascii=False), file=self.fichier)
+
+    def image(self, événements):
+        événements = [encoder(e) for e in événements
+                      if e.type in ATTRIBUTS
+                      and not (e.type == pygame.KEYDOWN
+                               and e.key in IGNORÉES)]
+        if len(événements) > 0:
+            self.écrire({"image": self.numéro, "événements": événements})
+        self.numéro += 1
+
+    def fermer(self):
+        self.fichier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+def lire(nom_fichier):
+    """Entête et liste des images (numéro, événements) d'une session
+    """
+    with open(nom_fichier, "rt", encoding="utf-8") as fichier:
+        lignes = [json.loads(l) for l in fichier if l.strip()]
+    entête = lignes[0]
+    if entête.get("format") != FORMAT:
+        raise ValueError(f"{nom_fichier} : format de session inconnu")
+    images = [(l["image"], [décoder(e) for e in l["événements"]])
+              for l in lignes[1:]]
+    return entête, images
+
+
+def empreinte(graphe):
+    """Condensé de l'état du graphe : positions et paliers des nœuds,
+    extrémités et paliers des liens
+    """
+    nœuds = sorted((n.ident, tuple(n["position"].en_tuple()), n["palier"])
+                   for n in graphe.iter_nœuds())
+    liens = sorted((l.ident, tuple(sorted(n.ident for n in l.liaisons)),
+                    l["palier"])
+                   for l in graphe.iter_liens())
+    texte = json.dumps([nœuds, liens])
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+
+def rejouer(entête, images, moteur=None, instrumenté=False):
+    """Rejoue la session sans affichage, et en retourne le bilan
+    """
+    random.seed(entête["graine"])
+    niveau = échangeur.Niveau(moteur)
+    niveau.charger(entête["niveau"])
+    jeu = interface.Interface(niveau, None, interface.RAYON,
+                              entête["niveau"])
+    if instrumenté:
+        jeu.mesures = mesures.Mesures(fenêtre=None)
+        échangeur.instrumenter(jeu.mesures, niveau)
+
+    début = time.perf_counter()
+    for _, événements in images:
+        jeu.image(événements)
+        if jeu.fini:
+            break
+    durée = time.perf_counter() - début
+
+    retour = dict(niveau=entête["niveau"], moteur=niveau.moteur.name,
+                  images=len(images),
+                  événements=sum(len(e) for _, e in images),
+                  secondes=durée,
+                  nœuds=len(niveau.graphe.sommets),
+                  liens=len(niveau.graphe.arêtes),
+                  complet=niveau.est_complet(),
+                  empreinte=empreinte(niveau.graphe))
+    if instrumenté:
+        jeu.mesures.retirer()
+        retour["mesures"] = [{"clef": c, "appels": a, "secondes": d}
+                             for c, a, d in jeu.mesures.bilan()]
+    return retour
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(description=__doc__)
+    analyseur.add_argument("session", help="session enregistrée par "
+                           "«échangeur.py --enregistrer»")
+    analyseur.add_argument("--moteurs", nargs="+",
+                           choices=[m.name for m in échangeur.Moteur],
+                           default=[m.name for m in échangeur.Moteur])
+    analyseur.add_argument("--répétitions", type=int, default=1)
+    analyseur.add_argument("--mesures", action="store_true",
+                           help="détail par point de mesure")
+    arguments = analyseur.parse_args()
+
+    entête, images = lire(arguments.session)
+    environnement = banc.contexte()
+    empreintes = set()
+    for nom in arguments.moteurs:
+        for _ in range(arguments.répétitions):
+            résultat = rejouer(entête, images, échangeur.Moteur[nom],
+                               arguments.mesures)
+            empreintes.add(résultat["empreinte"])
+            print(json.dumps(dict(résultat, **environnement),
+                             ensure_ascii=False))
+            sys.stdout.flush()
+    if len(empreintes) > 1:
+        sys.exit("Les rejeux divergent : l'état final dépend du moteur")
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Recherche d'une solution à un niveau, sans interface graphique
+
+Une solution est un réseau de nœuds et de liens, répartis sur les paliers,
+qui relie chaque liaison objective du niveau en respectant les règles du
+jeu : aucun nœud dans un obstacle, aucun lien traversant un obstacle, aucun
+croisement entre liens de même palier.
+
+Chaque tentative route les liaisons l'une après l'autre, dans un ordre
+aléatoire, sur le graphe de visibilité des extrémités des routes, des coins
+des obstacles et de quelques points tirés au hasard. Les tronçons déjà posés
+sont réutilisés librement ; un nouveau tronçon est placé sur un palier où il
+ne croise aucun autre tronçon, et son coût croît avec le nombre de paliers
+où il en croiserait.
+
+Les tentatives sont réparties sur un ensemble de processus, dans la limite
+d'un budget de temps, et s'arrêtent dès qu'une solution est trouvée. Toute
+solution est vérifiée par les validateurs du jeu avant d'être retenue.
+"""
+
+# Dépendance(s) standard(s)
+import argparse
+import concurrent.futures
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import time
+
+# Dépendance(s) interne(s)
+import échangeur
+
+# Dépendance(s) externe(s)
+
+
+# Écart entre les coins des obstacles et les points de passage voisins
+MARGE = 4
+# Points de passage tirés au hasard à chaque tentative
+ÉCHANTILLONS = 12
+# Surcoût relatif d'un tronçon par palier sur lequel il croiserait un tronçon
+# déjà posé
+PÉNALITÉ = 1.0
+
+# État propre à chaque processus de recherche
+CONTEXTE = dict()
+
+
+class Recherche:
+    """Tentatives de construction d'une solution pour un niveau
+    """
+
+    def __init__(self, niveau):
+        self.niveau = niveau
+        self.points = [n["position"] for n in niveau.graphe.iter_nœuds()]
+        # Étendue de la carte, au-delà de laquelle aucun point n'est placé
+        self.étendue = (
+            max([p.largeur for p in self.points]
+                + [o.coin_max.largeur for o in niveau.obstacles]),
+            max([p.hauteur for p in self.points]
+                + [o.coin_max.hauteur for o in niveau.obstacles]))
+        for o in niveau.obstacles:
+            for x in (o.coin_min.largeur - MARGE, o.coin_max.largeur + MARGE):
+                for y in (o.coin_min.hauteur - MARGE,
+                          o.coin_max.hauteur + MARGE):
+                    p = échangeur.V2(x, y)
+                    if (0 <= x <= self.étendue[0] and 0 <= y <= self.étendue[1]
+                            and not niveau.est_dans_un_obstacle(p)):
+                        self.points.append(p)
+        self.numéros = {p: k for k, p in enumerate(self.points)}
+
+        self.voisins = [list() for _ in self.points]
+        for i, j in itertools.combinations(range(len(self.points)), 2):
+            self.relier(self.voisins, self.points, i, j)
+
+    def visible(self, p, q):
+        """Vrai ssi le tronçon [p, q] ne traverse aucun obstacle.
+
+        «Obstacle.intersection» tient pour sécant tout tronçon colinéaire à
+        l'un des bords, même éloigné : seuls les tronçons ni horizontaux ni
+        verticaux peuvent être écartés sur leur boîte englobante.
+        """
+        obstacles = self.niveau.obstacles
+        if p.largeur != q.largeur and p.hauteur != q.hauteur:
+            xmin, xmax = sorted((p.largeur, q.largeur))
+            ymin, ymax = sorted((p.hauteur, q.hauteur))
+            obstacles = [o for o in obstacles
+                         if xmin <= o.coin_max.largeur
+                         and o.coin_min.largeur <= xmax
+                         and ymin <= o.coin_max.hauteur
+                         and o.coin_min.hauteur <= ymax]
+        return not any(o.intersection(p, q) for o in obstacles)
+
+    def relier(self, voisins, points, i, j):
+        if self.visible(points[i], points[j]):
+            longueur = (points[j] - points[i]).norme()
+            voisins[i].append((j, longueur))
+            voisins[j].append((i, longueur))
+
+    def croisent(self, points, i, j, k, l):
+        """Vrai ssi les tronçons [i, j] et [k, l], sans extrémité commune, se
+        croisent
+        """
+        retour = False
+        if len({i, j, k, l}) == 4:
+            p, q = points[i], points[j]
+            r, s = points[k], points[l]
+            if (min(p.largeur, q.largeur) <= max(r.largeur, s.largeur)
+                    and min(r.largeur, s.largeur) <= max(p.largeur, q.largeur)
+                    and min(p.hauteur, q.hauteur) <= max(r.hauteur, s.hauteur)
+                    and min(r.hauteur, s.hauteur)
+                    <= max(p.hauteur, q.hauteur)):
+                retour = échangeur.intersection_coordonnées(
+                    p.largeur, p.hauteur, q.largeur - p.largeur,
+                    q.hauteur - p.hauteur, r.largeur, r.hauteur,
+                    s.largeur - r.largeur, s.hauteur - r.hauteur)
+        return retour
+
+    def conflits(self, points, i, j, paliers):
+        """Paliers sur lesquels le tronçon [i, j] croiserait un tronçon posé
+        """
+        return {palier for palier, tronçons in enumerate(paliers)
+                if any(self.croisent(points, i, j, k, l)
+                       for k, l in tronçons)}
+
+    def chemin(self, points, voisins, départ, arrivée, posés, conflits,
+               paliers, aléa):
+        """Suite de points du chemin le moins coûteux, ou None. 'conflits'
+        associe à chaque tronçon déjà évalué les paliers où il croise un
+        tronçon posé.
+        """
+        distances = {départ: 0}
+        précédents = dict()
+        ordre = itertools.count()
+        file = [(0, next(ordre), départ)]
+        while len(file) > 0:
+            d, _, i = heapq.heappop(file)
+            if i == arrivée:
+                break
+            if d > distances[i]:
+                continue
+            for j, longueur in voisins[i]:
+                coût = longueur * aléa.uniform(1, 1.2)
+                clef = frozenset((i, j))
+                if clef not in posés:
+                    occupés = conflits.get(clef)
+                    if occupés is None:
+                        occupés = self.conflits(points, i, j, paliers)
+                        conflits[clef] = occupés
+                    if len(occupés) == len(paliers):
+                        continue
+                    coût *= 1 + PÉNALITÉ * len(occupés)
+                if d + coût < distances.get(j, math.inf):
+                    distances[j] = d + coût
+                    précédents[j] = i
+                    heapq.heappush(file, (d + coût, next(ordre), j))
+
+        retour = None
+        if arrivée in distances:
+            retour = [arrivée]
+            while retour[-1] != départ:
+                retour.append(précédents[retour[-1]])
+            retour.reverse()
+        return retour
+
+    def essayer(self, graine, arrêt=None, échéance=math.inf):
+        """Réseau solution, sous la forme d'un témoin, ou None en cas
+        d'échec de la tentative, d'arrêt demandé ou d'échéance dépassée
+        """
+        aléa = random.Random(graine)
+        points = list(self.points)
+        voisins = [list(v) for v in self.voisins]
+        for _ in range(ÉCHANTILLONS):
+            p = échangeur.V2(aléa.uniform(0, self.étendue[0]),
+                             aléa.uniform(0, self.étendue[1]))
+            if not self.niveau.est_dans_un_obstacle(p):
+                points.append(p)
+                voisins.append(list())
+                for i in range(len(points) - 1):
+                    self.relier(voisins, points, i, len(points) - 1)
+
+        posés = dict()
+        conflits = dict()
+        paliers = [list() for _ in range(échangeur.PALIERS)]
+        liaisons = list(self.niveau.flux)
+        aléa.shuffle(liaisons)
+        for f in liaisons:
+            if ((arrêt is not None and arrêt.is_set())
+                    or time.time() > échéance):
+                return None
+            chemin = self.chemin(points, voisins,
+                                 self.numéros[f.nid["position"]],
+                                 self.numéros[f.but["position"]],
+                                 posés, conflits, paliers, aléa)
+            if chemin is None:
+                return None
+            for i, j in zip(chemin, chemin[1:]):
+                clef = frozenset((i, j))
+                if clef in posés:
+                    continue
+                libres = [p for p in range(len(paliers))
+                          if p not in self.conflits(points, i, j, paliers)]
+                if len(libres) == 0:
+                    return None
+                palier = aléa.choice(libres)
+                posés[clef] = palier
+                paliers[palier].append((i, j))
+                # Mise à jour des conflits des tronçons déjà évalués
+                conflits.pop(clef, None)
+                for (k, l), occupés in conflits.items():
+                    if (palier not in occupés
+                            and self.croisent(points, i, j, k, l)):
+                        occupés.add(palier)
+
+        # Témoin : points employés et tronçons
+        employés = sorted({i for t in posés for i in t})
+        renumérotés = {i: k for k, i in enumerate(employés)}
+        return {"nœuds": [[points[i].largeur, points[i].hauteur]
+                          for i in employés],
+                "liens": [sorted(renumérotés[i] for i in t) + [palier]
+                          for t, palier in posés.items()]}
+
+
+def appliquer(niveau, témoin, créés=None, graine=0):
+    """Construit le réseau du témoin dans le graphe du niveau. Les points
+    confondus avec un nœud existant désignent ce nœud.
+
+    Les éléments créés sont ajoutés au fur et à mesure à la liste 'créés',
+    si elle est fournie : même interrompue par une erreur, elle est
+    complète. Les couleurs des liens sont tirées d'un générateur propre,
+    initialisé par 'graine', sans toucher à l'état du module «random».
+    """
+    if créés is None:
+        créés = list()
+    aléa = random.Random(graine)
+    existants = {n["position"]: n for n in niveau.graphe.iter_nœuds()}
+    nœuds = list()
+    for x, y in témoin["nœuds"]:
+        position = échangeur.V2(x, y)
+        nœud = existants.get(position)
+        if nœud is None:
+            nœud = niveau.graphe.ajouter_nœud()
+            créés.append(nœud)
+            nœud["amovible"] = True
+            nœud["biome"] = échangeur.Biome.AUCUN
+            nœud["couleur"] = (255, 255, 255)
+            nœud["palier"] = 0
+            nœud["position"] = position
+        nœuds.append(nœud)
+    for i, j, palier in témoin["liens"]:
+        lien = niveau.graphe.ajouter_lien()
+        créés.append(lien)
+        lien["couleur"] = échangeur.couleur_aléatoire(palier, aléa)
+        lien["palier"] = palier
+        lien.associer(nœuds[i], nœuds[j])
+
+
+def est_solution(niveau):
+    """Vrai ssi le réseau du niveau respecte les règles du jeu et relie
+    toutes les liaisons
+    """
+    return (niveau.est_complet()
+            and not any(niveau.est_dans_un_obstacle(n["position"])
+                        for n in niveau.graphe.iter_nœuds())
+            and not any(o.intersection(l.liaisons[0]["position"],
+                                       l.liaisons[1]["position"])
+                        for l in niveau.graphe.iter_liens()
+                        for o in niveau.obstacles)
+            and niveau.carte_est_valide())
+
+
+def vérifier(nom_fichier, témoin):
+    niveau = échangeur.Niveau()
+    niveau.charger(nom_fichier, à_la_demande=False)
+    appliquer(niveau, témoin)
+    return est_solution(niveau)
+
+
+def initialiser(nom_fichier, arrêt):
+    """Prépare un processus de recherche : le niveau n'est chargé, et son
+    graphe de visibilité calculé, qu'une fois par processus
+    """
+    niveau = échangeur.Niveau()
+    niveau.charger(nom_fichier, à_la_demande=False)
+    CONTEXTE["recherche"] = Recherche(niveau)
+    CONTEXTE["arrêt"] = arrêt
+    CONTEXTE["niveau"] = nom_fichier
+
+
+def chercher(graine, pas, échéance):
+    """Enchaîne les tentatives, de graine en graine, jusqu'à trouver une
+    solution, épuiser le temps imparti ou être arrêté
+    """
+    recherche = CONTEXTE["recherche"]
+    arrêt = CONTEXTE["arrêt"]
+    retour = None
+    tentatives = 0
+    while retour is None and time.time() < échéance and not arrêt.is_set():
+        retour = recherche.essayer(graine, arrêt, échéance)
+        if retour is not None and not vérifier(CONTEXTE["niveau"], retour):
+            retour = None
+        graine += pas
+        tentatives += 1
+    return retour, tentatives
+
+
+def résoudre(nom_fichier, budget=30.0, processus=None, graine=0):
+    """Témoin d'une solution du niveau, ou None si aucune n'a été trouvée
+    dans le temps imparti (en secondes), et nombre de tentatives
+    """
+    processus = processus or multiprocessing.cpu_count()
+    échéance = time.time() + budget
+    retour = None
+    tentatives = 0
+    with multiprocessing.Manager() as gestionnaire:
+        arrêt = gestionnaire.Event()
+        with concurrent.futures.ProcessPoolExecutor(
+                processus, initializer=initialiser,
+                initargs=(nom_fichier, arrêt)) as exécuteur:
+            tâches = [exécuteur.submit(chercher, graine + k, processus,
+                                       échéance)
+                      for k in range(processus)]
+            for tâche in concurrent.futures.as_completed(tâches):
+                témoin, n = tâche.result()
+                tentatives += n
+                if retour is None and témoin is not None:
+                    retour = témoin
+                    arrêt.set()
+    return retour, tentatives
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(
+        description="Recherche d'une solution à un niveau")
+    analyseur.add_argument("niveau")
+    analyseur.add_argument("--budget", type=float, default=30.0,
+                           help="temps de recherche maximal, en secondes")
+    analyseur.add_argument("--processus", type=int)
+    analyseur.add_argument("--graine", type=int, default=0)
+    arguments = analyseur.parse_args()
+
+    début = time.time()
+    témoin, tentatives = résoudre(arguments.niveau, arguments.budget,
+                                  arguments.processus, arguments.graine)
+    durée = time.time() - début
+    if témoin is None:
+        print(f"Aucune solution trouvée ({tentatives} tentatives, "
+              f"{durée:.1f} s)")
+    else:
+        print(f"Solution trouvée ({tentatives} tentatives, {durée:.1f} s) :")
+        print(json.dumps(témoin))
+    raise SystemExit(0 if témoin is not None else 1)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Outils communs aux tests : les modules du jeu, rangés à la racine du
+dépôt, sont rendus importables, et des réseaux aléatoires sont construits à
+la demande
+"""
+
+# Dépendance(s) standard(s)
+import itertools
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+# Dépendance(s) interne(s)
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def peupler(niveau, graine, nœuds, liens, côté, paliers=2, entiers=True):
+    """Ajoute au graphe du niveau un réseau aléatoire de 'nœuds' nœuds,
+    placés dans un carré de côté donné, et d'au plus 'liens' liens entre des
+    nœuds quelconques. Des coordonnées entières sur un petit carré font
+    apparaître des segments parallèles, colinéaires ou qui se touchent.
+    """
+    aléa = random.Random(graine)
+    créés = list()
+    for _ in range(nœuds):
+        if entiers:
+            p = échangeur.V2(aléa.randint(0, côté), aléa.randint(0, côté))
+        else:
+            p = échangeur.V2(aléa.uniform(0, côté), aléa.uniform(0, côté))
+        n = niveau.graphe.ajouter_nœud()
+        n["amovible"] = True
+        n["biome"] = échangeur.Biome.AUCUN
+        n["couleur"] = (255, 255, 255)
+        n["palier"] = 0
+        n["position"] = p
+        créés.append(n)
+    for _ in range(liens):
+        a, b = aléa.sample(créés, 2)
+        l = niveau.graphe.ajouter_lien()
+        l["palier"] = aléa.randrange(paliers)
+        l["couleur"] = (255, 255, 255)
+        l.associer(a, b)
+    return créés
+
+
+@pytest.fixture
+def réseau():
+    """Fabrique de niveaux (moteur scalaire) peuplés d'un réseau aléatoire
+    """
+    def fabriquer(graine, nœuds, liens, côté, **options):
+        niveau = échangeur.Niveau(moteur=échangeur.Moteur.SCALAIRE)
+        peupler(niveau, graine, nœuds, liens, côté, **options)
+        return niveau
+    return fabriquer
+
+
+def cliché(graphe):
+    """État complet du graphe : pour chaque élément, par identifiant, ses
+    attributs et l'ordre de ses liaisons
+    """
+    return {i.ident: (i.est_arête, i.attributs(),
+                      [v.ident for v in i.liaisons])
+            for i in itertools.chain(graphe.iter_nœuds(),
+                                     graphe.iter_liens())}
+
+
+def retoucher(niveau, aléa, côté=200):
+    """Applique au niveau une opération du joueur tirée au hasard, sur des
+    positions entières d'un carré de côté donné. Comme dans le jeu, seuls
+    les nœuds amovibles sont déplacés, fusionnés ou supprimés.
+    """
+    def position():
+        return échangeur.V2(aléa.randint(0, côté), aléa.randint(0, côté))
+    tous = list(niveau.graphe.iter_nœuds())
+    nœuds = [n for n in tous if n["amovible"]]
+    liens = list(niveau.graphe.iter_liens())
+    choix = aléa.random()
+    if len(nœuds) < 4 or choix < 0.3:
+        voisin = aléa.choice(tous) if tous and aléa.random() < 0.8 else None
+        niveau.ajouter_nœud(position(), voisin)
+    elif choix < 0.45 and liens:
+        niveau.couper_lien(aléa.choice(liens), position())
+    elif choix < 0.6 and liens:
+        niveau.changer_palier(aléa.choice(liens), aléa.choice((1, -1)))
+    elif choix < 0.75:
+        niveau.déplacer_nœud(aléa.choice(nœuds), position())
+    elif choix < 0.85:
+        niveau.fusionner(aléa.choice(nœuds), côté / 5)
+    elif choix < 0.93 and liens:
+        niveau.graphe.supprimer_lien(aléa.choice(liens))
+    else:
+        niveau.graphe.supprimer_nœud(aléa.choice(nœuds))
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Le balayage et la version vectorielle de «carte_est_valide» donnent les
+mêmes réponses que l'implémentation de référence
+"""
+
+# Dépendance(s) standard(s)
+import itertools
+
+# Dépendance(s) interne(s)
+import balayage
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def croisements_exhaustifs(graphe):
+    """Paires de liens sécants, par comparaison de toutes les paires
+    """
+    retour = set()
+    for a, b in itertools.combinations(graphe.iter_liens(), 2):
+        if (a["palier"] == b["palier"]
+                and len(échangeur.nœuds_communs(a, b)) == 0):
+            p0, p1 = (n["position"] for n in a.liaisons)
+            p2, p3 = (n["position"] for n in b.liaisons)
+            if balayage.se_croisent(p0.largeur, p0.hauteur, p1.largeur,
+                                    p1.hauteur, p2.largeur, p2.hauteur,
+                                    p3.largeur, p3.hauteur):
+                retour.add(frozenset((a, b)))
+    return retour
+
+
+# (nœuds, liens, côté, coordonnées entières) : petits carrés entiers pour
+# les cas dégénérés, réseaux plus lâches pour obtenir des cartes valides
+CAS = [(6, 3, 8, True), (10, 5, 20, True), (30, 20, 10, True),
+       (12, 4, 640, False), (60, 40, 640, False)]
+
+
+@pytest.mark.parametrize("nœuds, liens, côté, entiers", CAS)
+def test_carte_est_valide(réseau, nœuds, liens, côté, entiers):
+    réponses = set()
+    for graine in range(40):
+        niveau = réseau(graine, nœuds, liens, côté, entiers=entiers)
+        attendu = échangeur.carte_est_valide(niveau.graphe)
+        assert balayage.carte_est_valide(niveau.graphe) == attendu
+        assert niveau.carte_est_valide() == attendu
+        réponses.add(attendu)
+    if nœuds <= 12:
+        # Les deux réponses sont effectivement mises à l'épreuve
+        assert réponses == {True, False}
+
+
+@pytest.mark.parametrize("nœuds, liens, côté, entiers", CAS)
+def test_croisements(réseau, nœuds, liens, côté, entiers):
+    for graine in range(20):
+        niveau = réseau(graine, nœuds, liens, côté, entiers=entiers)
+        obtenus = [frozenset(p) for p in balayage.croisements(niveau.graphe)]
+        # Chaque paire n'est énumérée qu'une fois
+        assert len(obtenus) == len(set(obtenus))
+        assert set(obtenus) == croisements_exhaustifs(niveau.graphe)
+
+
+def test_croisements_par_palier(réseau):
+    niveau = réseau(7, 30, 30, 10, paliers=3)
+    tous = set(frozenset(p) for p in balayage.croisements(niveau.graphe))
+    for palier in range(3):
+        paires = set(frozenset(p)
+                     for p in balayage.croisements(niveau.graphe, palier))
+        assert all(next(iter(p))["palier"] == palier for p in paires)
+        tous -= paires
+    assert tous == set()
+
+
+@pytest.mark.parametrize("nœuds, liens, côté, entiers", CAS)
+def test_vectoriel(réseau, nœuds, liens, côté, entiers):
+    pytest.importorskip("numpy")
+    import vectoriel
+    for graine in range(40):
+        niveau = réseau(graine, nœuds, liens, côté, entiers=entiers)
+        assert (vectoriel.carte_est_valide(niveau.graphe)
+                == échangeur.carte_est_valide(niveau.graphe))
+
+
+def test_segments_de_géométrie(réseau):
+    numpy = pytest.importorskip("numpy")
+    import vectoriel
+    niveau = réseau(3, 30, 20, 640, entiers=False)
+    liens = list(niveau.graphe.iter_liens())
+    for choix in (liens, liens[:1], []):
+        attendus = vectoriel.Segments(choix)
+        segments = vectoriel.Segments.de_géométrie(choix, niveau.géométrie)
+        assert segments.liens == attendus.liens
+        assert numpy.array_equal(segments.origines, attendus.origines)
+        assert numpy.array_equal(segments.directions, attendus.directions)
+
+
+def test_niveau_vectoriel(réseau):
+    pytest.importorskip("numpy")
+    for graine in range(40):
+        niveau = réseau(graine, 10, 5, 20)
+        niveau.choisir_moteur(échangeur.Moteur.NUMPY)
+        assert (niveau.carte_est_valide()
+                == échangeur.carte_est_valide(niveau.graphe))
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Les dépendances lourdes (NumPy, pygame) ne sont importées qu'au besoin
+"""
+
+# Dépendance(s) standard(s)
+import os
+import subprocess
+import sys
+
+# Dépendance(s) interne(s)
+
+# Dépendance(s) externe(s)
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importés(code):
+    """Modules lourds chargés par le code, exécuté dans un processus neuf
+    """
+    code += ("; import sys; "
+             "print(*sorted({'numpy', 'pygame'} & set(sys.modules)))")
+    sortie = subprocess.run([sys.executable, "-c", code], cwd=RACINE,
+                            capture_output=True, text=True, check=True)
+    return set(sortie.stdout.split())
+
+
+@pytest.mark.parametrize("module", ["échangeur", "banc", "évaluation",
+                                    "solveur"])
+def test_import(module):
+    assert importés(f"import {module}") == set()
+
+
+def test_niveau_scalaire():
+    code = ("import échangeur; "
+            "n = échangeur.Niveau(échangeur.Moteur.SCALAIRE); "
+            "n.charger('niveau-1.0.json'); n.carte_est_valide()")
+    assert importés(code) == set()
+
+
+def test_moteur_numpy():
+    pytest.importorskip("numpy")
+    code = ("import échangeur; "
+            "n = échangeur.Niveau(échangeur.Moteur.NUMPY); "
+            "n.charger('niveau-1.0.json'); "
+            "a = n.ajouter_nœud(échangeur.V2(300, 200)); "
+            "b = n.ajouter_nœud(échangeur.V2(320, 200), a); "
+            "c = n.ajouter_nœud(échangeur.V2(300, 250)); "
+            "d = n.ajouter_nœud(échangeur.V2(320, 250), c); "
+            "n.valider_mouvement(b, échangeur.V2(330, 260))")
+    # Le premier test par lots importe NumPy
+    assert importés(code) == {"numpy"}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""La connexité tenue à jour au fil des modifications, suppressions
+comprises, est celle d'un parcours en largeur
+"""
+
+# Dépendance(s) standard(s)
+import collections
+import random
+
+# Dépendance(s) interne(s)
+from conftest import peupler, retoucher
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def composante(départ):
+    """Nœuds accessibles depuis le départ, par un parcours en largeur
+    """
+    vus = {départ}
+    file = collections.deque([départ])
+    while file:
+        nœud = file.popleft()
+        for lien in nœud.liaisons:
+            for voisin in lien.liaisons:
+                if voisin not in vus:
+                    vus.add(voisin)
+                    file.append(voisin)
+    return vus
+
+
+def vérifier(niveau, aléa, fixes):
+    nœuds = list(niveau.graphe.iter_nœuds())
+    for a in aléa.sample(nœuds, min(len(nœuds), 5)) + fixes:
+        accessibles = composante(a)
+        for b in nœuds:
+            assert niveau.sont_connectés(a, b) == (b in accessibles)
+    attendu = all(l.but in composante(l.nid) for l in niveau.flux)
+    assert niveau.est_complet() == attendu
+    return attendu
+
+
+@pytest.mark.parametrize("graine", range(10))
+def test_modifications_aléatoires(graine):
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    nœuds = peupler(niveau, graine, 20, 14, 200, paliers=1)
+    aléa = random.Random(graine)
+    fixes = aléa.sample(nœuds, 4)
+    for n in fixes:
+        n["amovible"] = False
+    niveau.flux.append(échangeur.Liaison(fixes[0], fixes[1], 10))
+    niveau.flux.append(échangeur.Liaison(fixes[2], fixes[3], 10))
+    complets = 0
+    for _ in range(300):
+        retoucher(niveau, aléa)
+        if aléa.random() < 0.3:
+            # Reliement direct d'une liaison, pour alterner les réponses
+            a, b = aléa.choice([fixes[:2], fixes[2:]])
+            niveau.ajouter_nœud(b["position"], a)
+            niveau.fusionner(max(niveau.graphe.sommets.values(),
+                                 key=lambda n: n.ident), 1)
+        complets += vérifier(niveau, aléa, fixes)
+    assert complets > 0
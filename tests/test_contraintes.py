@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Les moteurs de contraintes, scalaire et vectoriel, rendent les verdicts
+de la validation exhaustive d'origine
+"""
+
+# Dépendance(s) standard(s)
+import random
+
+# Dépendance(s) interne(s)
+import balayage
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+V2 = échangeur.V2
+
+
+def obstacle_touché(obstacle, p0, p1):
+    """Test d'origine, bord par bord, du segment [p0, p1] contre l'obstacle
+    """
+    v = p1 - p0
+    vl = V2(obstacle.coin_max.largeur - obstacle.coin_min.largeur, 0)
+    vh = V2(0, obstacle.coin_max.hauteur - obstacle.coin_min.hauteur)
+    return (échangeur.intersection(p0, v, obstacle.coin_min, vl)
+            or échangeur.intersection(p0, v, obstacle.coin_min, vh)
+            or échangeur.intersection(p0, v, obstacle.coin_max, -vl)
+            or échangeur.intersection(p0, v, obstacle.coin_max, -vh))
+
+
+def mouvement_valide(niveau, sommet, position):
+    """Validation d'origine d'un mouvement : chaque lien du sommet est
+    confronté à tous les obstacles et à tous les liens de même palier
+    """
+    if any(o.coin_min.largeur <= position.largeur <= o.coin_max.largeur
+           and o.coin_min.hauteur <= position.hauteur <= o.coin_max.hauteur
+           for o in niveau.obstacles):
+        return False
+    for lien in sommet.liaisons:
+        p0, p1 = [position if n is sommet else n["position"]
+                  for n in lien.liaisons]
+        if any(obstacle_touché(o, p0, p1) for o in niveau.obstacles):
+            return False
+        for autre in niveau.graphe.iter_liens():
+            if (autre["palier"] == lien["palier"]
+                    and len(échangeur.nœuds_communs(lien, autre)) == 0):
+                q0, q1 = [n["position"] for n in autre.liaisons]
+                if échangeur.intersection(p0, p1 - p0, q0, q1 - q0):
+                    return False
+    return True
+
+
+MOTEURS = [échangeur.Moteur.SCALAIRE, échangeur.Moteur.NUMPY]
+NOMS = [m.name.lower() for m in MOTEURS]
+
+
+def moteur(niveau, choix):
+    if choix == échangeur.Moteur.NUMPY:
+        pytest.importorskip("numpy")
+    niveau.choisir_moteur(choix)
+
+
+def ajouter_nœud(niveau, x, y):
+    n = niveau.graphe.ajouter_nœud()
+    n["amovible"] = True
+    n["biome"] = échangeur.Biome.AUCUN
+    n["couleur"] = (255, 255, 255)
+    n["palier"] = 0
+    n["position"] = V2(x, y)
+    return n
+
+
+def ajouter_lien(niveau, a, b, palier=0):
+    l = niveau.graphe.ajouter_lien()
+    l["palier"] = palier
+    l["couleur"] = (255, 255, 255)
+    l.associer(a, b)
+    return l
+
+
+@pytest.mark.parametrize("choix", MOTEURS, ids=NOMS)
+def test_liens_colinéaires_lointains(choix):
+    niveau = échangeur.Niveau()
+    moteur(niveau, choix)
+    a = ajouter_nœud(niveau, 0, 0)
+    b = ajouter_nœud(niveau, 20, 0)
+    ajouter_lien(niveau, a, b)
+    ajouter_lien(niveau, ajouter_nœud(niveau, 500, 0),
+                 ajouter_nœud(niveau, 510, 0))
+    # Porté par la même droite qu'un lien lointain : refusé dans un niveau
+    assert not mouvement_valide(niveau, b, V2(10, 0))
+    assert not niveau.valider_mouvement(b, V2(10, 0))
+    assert niveau.valider_mouvement(b, V2(10, 1))
+    # Accepté dans un monde, où seuls comptent les liens touchés
+    niveau.contraintes.colinéaires_lointains = False
+    assert niveau.valider_mouvement(b, V2(10, 0))
+    assert not niveau.valider_mouvement(b, V2(505, 0))
+
+
+@pytest.mark.parametrize("choix", MOTEURS, ids=NOMS)
+def test_lien_réduit_à_un_point(choix):
+    niveau = échangeur.Niveau()
+    moteur(niveau, choix)
+    a = ajouter_nœud(niveau, 0, 0)
+    b = ajouter_nœud(niveau, 20, 20)
+    ajouter_lien(niveau, a, b)
+    ajouter_lien(niveau, ajouter_nœud(niveau, 300, 300),
+                 ajouter_nœud(niveau, 300, 300))
+    for position in (V2(10, 10), V2(10, 11), V2(300, 300)):
+        assert (niveau.valider_mouvement(b, position)
+                == mouvement_valide(niveau, b, position))
+
+
+def niveau_aléatoire(graine, côté, pas):
+    """Niveau à quelques obstacles et réseau dont les nœuds sont alignés sur
+    une trame de pas donné, pour multiplier les segments colinéaires
+    """
+    aléa = random.Random(graine)
+    niveau = échangeur.Niveau()
+    for _ in range(3):
+        x, y = aléa.randrange(côté), aléa.randrange(côté)
+        niveau.obstacles.append(échangeur.Obstacle(
+            V2(x, y), V2(x + aléa.randint(0, 3 * pas),
+                         y + aléa.randint(0, 3 * pas)),
+            échangeur.Biome.FORÊT))
+
+    # Nœuds distincts et hors des obstacles : le critère d'origine échoue
+    # (division par zéro) sur un segment réduit à un point ou qui part d'un
+    # coin d'obstacle
+    occupés = set()
+
+    def point():
+        while True:
+            p = V2(aléa.randrange(0, côté, pas), aléa.randrange(0, côté, pas))
+            if p not in occupés and not niveau.est_dans_un_obstacle(p):
+                return p
+
+    nœuds = list()
+    for _ in range(25):
+        p = point()
+        occupés.add(p)
+        nœuds.append(ajouter_nœud(niveau, p.largeur, p.hauteur))
+    for _ in range(20):
+        a, b = aléa.sample(nœuds, 2)
+        ajouter_lien(niveau, a, b, aléa.randrange(2))
+    mouvements = [(aléa.choice(nœuds), point()) for _ in range(60)]
+    return niveau, mouvements, occupés
+
+
+@pytest.mark.parametrize("choix", MOTEURS, ids=NOMS)
+@pytest.mark.parametrize("côté, pas", [(20, 1), (640, 40), (640, 1)])
+def test_mouvements_aléatoires(choix, côté, pas):
+    refus = 0
+    for graine in range(15):
+        niveau, mouvements, occupés = niveau_aléatoire(graine, côté,
+                                                      pas)
+        moteur(niveau, choix)
+        for sommet, position in mouvements:
+            attendu = mouvement_valide(niveau, sommet, position)
+            assert niveau.valider_mouvement(sommet, position) == attendu
+            refus += not attendu
+            # Le mouvement accepté est joué, et les index suivent
+            if attendu and position not in occupés:
+                occupés.discard(sommet["position"])
+                occupés.add(position)
+                sommet["position"] = position
+    assert refus > 0
+
+
+@pytest.mark.parametrize("choix", MOTEURS, ids=NOMS)
+def test_palier_valide(choix):
+    for graine in range(15):
+        niveau, *_ = niveau_aléatoire(graine, 20, 1)
+        moteur(niveau, choix)
+        for lien in list(niveau.graphe.iter_liens()):
+            for palier in range(échangeur.PALIERS):
+                ancien = lien["palier"]
+                lien["palier"] = palier
+                attendu = not any(lien in paire for paire in
+                                  balayage.croisements(niveau.graphe))
+                lien["palier"] = ancien
+                assert niveau.palier_valide(lien, palier) == attendu
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Validation des niveaux selon le schéma, fichier par fichier
+"""
+
+# Dépendance(s) standard(s)
+import json
+import os
+
+# Dépendance(s) interne(s)
+import format_1
+import générateur
+
+# Dépendance(s) externe(s)
+import pytest
+
+pytest.importorskip("jsonschema")
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def écrire(chemin, texte):
+    chemin.write_text(texte, encoding="utf-8")
+    return str(chemin)
+
+
+@pytest.fixture
+def répertoire(tmp_path):
+    """Répertoire de niveaux, valides ou non, et résultat attendu pour
+    chacun
+    """
+    invalide = générateur.niveau(3, 4, 5, 2)
+    invalide["liaisons"][0]["flux"] = 0
+    sans_routes = générateur.niveau(4, 4, 5, 2)
+    del sans_routes["routes"]
+    attendus = {
+        écrire(tmp_path / "a-niveau.json",
+               json.dumps(générateur.niveau(1, 4, 5, 2))): True,
+        écrire(tmp_path / "b-monde.json",
+               json.dumps(générateur.monde(2, 4, 50, 2, 2000, 1000))): True,
+        écrire(tmp_path / "c-flux-nul.json", json.dumps(invalide)): False,
+        écrire(tmp_path / "d-sans-routes.json",
+               json.dumps(sans_routes)): False,
+        écrire(tmp_path / "e-tronqué.json", "{\"nom\": "): False,
+    }
+    # Ni les schémas, ni les autres fichiers ne sont validés
+    écrire(tmp_path / "autre.schema.json", "{}")
+    écrire(tmp_path / "notes.txt", "")
+    return str(tmp_path), attendus
+
+
+@pytest.mark.parametrize("processus", [1, 2])
+def test_valider_répertoire(répertoire, processus):
+    chemin, attendus = répertoire
+    résultats = format_1.valider_répertoire(chemin, "échangeur",
+                                            chemin_schémas=RACINE,
+                                            processus=processus)
+    assert résultats == attendus
+    # Dans l'ordre des noms de fichiers
+    assert list(résultats) == sorted(attendus)
+
+
+def test_sous_référence_imposée(répertoire):
+    chemin, attendus = répertoire
+    résultats = format_1.valider_répertoire(chemin, "échangeur", "niveau",
+                                            chemin_schémas=RACINE,
+                                            processus=1)
+    # Un monde n'est pas un niveau au format 1
+    assert [f for f, v in résultats.items() if v] == [min(attendus)]
+
+
+def test_validateur_partagé():
+    validateur = format_1.validateur(RACINE)
+    assert format_1.validateur(os.path.join(RACINE, ".")) is validateur
+    contenu = générateur.niveau(5, 4, 5, 2)
+    assert validateur.valider("échangeur", "niveau", contenu)
+    compilé = validateur.compiler("échangeur", "niveau")
+    assert validateur.valider("échangeur", "niveau", contenu)
+    assert validateur.compiler("échangeur", "niveau") is compilé
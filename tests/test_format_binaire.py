@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Compilation des niveaux et cache de leur forme compilée
+"""
+
+# Dépendance(s) standard(s)
+import json
+import os
+
+# Dépendance(s) interne(s)
+import format_1
+import format_binaire
+import générateur
+
+# Dépendance(s) externe(s)
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def obstacles(description):
+    """(rôle, xmin, ymin, xmax, ymax) des obstacles décrits, dans l'ordre
+    """
+    if description["version"] == "2":
+        blocs = [o for r in description["régions"] for o in r["obstacles"]]
+    else:
+        blocs = description["obstacles"]
+    return [(o["rôle"], o["position"]["inf"]["largeur"],
+             o["position"]["inf"]["hauteur"],
+             o["position"]["sup"]["largeur"],
+             o["position"]["sup"]["hauteur"]) for o in blocs]
+
+
+@pytest.mark.parametrize("description", [
+    générateur.niveau(5, 6, 20, 4),
+    générateur.monde(5, 6, 300, 4, 4000, 3000)])
+def test_aller_retour(description):
+    clef = format_binaire.empreinte(b"source")
+    with format_binaire.NiveauCompilé(
+            format_binaire.compiler(description, clef)) as compilé:
+        assert compilé.empreinte == clef
+        assert compilé.nom == description["nom"]
+        assert compilé.découpé == (description["version"] == "2")
+        assert list(compilé.obstacles()) == obstacles(description)
+        assert [nom for nom, _, _ in compilé.routes()] == [
+            r["nom"] for r in description["routes"]]
+        assert len(list(compilé.liaisons())) == len(description["liaisons"])
+        # Les obstacles d'une région sont ceux qu'elle recouvre
+        for k, (*_, xmin, ymin, xmax, ymax) in enumerate(compilé.régions()):
+            for _, x0, y0, x1, y1 in compilé.obstacles(k):
+                assert xmin <= x0 and ymin <= y0
+                assert x1 <= xmax and y1 <= ymax
+
+
+@pytest.mark.parametrize("valeur", [1 << 31, -(1 << 31) - 1, 1 << 40])
+def test_coordonnées_hors_bornes(valeur):
+    description = générateur.niveau(5, 2, 1, 1)
+    description["obstacles"][0]["position"]["sup"]["largeur"] = valeur
+    with pytest.raises(ValueError, match="hors des bornes"):
+        format_binaire.compiler(description, bytes(32))
+    description = générateur.niveau(5, 2, 1, 1)
+    description["routes"][1]["entrée"]["hauteur"] = valeur
+    with pytest.raises(ValueError, match="route/R1"):
+        format_binaire.compiler(description, bytes(32))
+
+
+def test_coordonnées_extrêmes():
+    description = générateur.niveau(5, 2, 1, 1)
+    position = description["obstacles"][0]["position"]
+    position["inf"]["largeur"] = format_binaire.COORDONNÉE_MIN
+    position["sup"]["hauteur"] = format_binaire.COORDONNÉE_MAX
+    with format_binaire.NiveauCompilé(
+            format_binaire.compiler(description, bytes(32))) as compilé:
+        assert list(compilé.obstacles()) == obstacles(description)
+
+
+def test_enregistrer_échec(tmp_path, monkeypatch):
+    chemin = tmp_path / "__pycache__" / "niveau.json.niveau"
+
+    def échouer(*_):
+        raise OSError("disque plein")
+
+    monkeypatch.setattr(os, "replace", échouer)
+    assert not format_binaire.enregistrer(str(chemin), b"octets")
+    # Le fichier temporaire ne reste pas en place
+    assert os.listdir(chemin.parent) == []
+
+
+def test_enregistrer(tmp_path):
+    chemin = tmp_path / "__pycache__" / "niveau.json.niveau"
+    assert format_binaire.enregistrer(str(chemin), b"octets")
+    assert chemin.read_bytes() == b"octets"
+    assert os.listdir(chemin.parent) == [chemin.name]
+
+
+def écrire(chemin, description):
+    chemin.write_text(json.dumps(description, ensure_ascii=False),
+                      encoding="utf-8")
+    return str(chemin)
+
+
+def test_cache_des_seuls_niveaux_valides(tmp_path):
+    pytest.importorskip("jsonschema")
+    validateur = format_1.validateur(RACINE)
+    valide = générateur.niveau(8, 4, 5, 2)
+    invalide = générateur.niveau(8, 4, 5, 2)
+    # Compilable, mais contraire au schéma (flux d'au moins 1)
+    invalide["liaisons"][0]["flux"] = 0
+    for description, attendu in ((valide, True), (invalide, False)):
+        nom = écrire(tmp_path / f"{attendu}.json", description)
+        for _ in range(2):
+            with format_binaire.charger(nom, "échangeur",
+                                        validateur) as compilé:
+                assert list(compilé.obstacles()) == obstacles(description)
+            assert (os.path.exists(format_binaire.chemin_cache(nom))
+                    == attendu)
+
+
+def test_json_relu_seulement_s_il_a_changé(tmp_path, monkeypatch):
+    pytest.importorskip("jsonschema")
+    validateur = format_1.validateur(RACINE)
+    description = générateur.niveau(9, 4, 5, 2)
+    nom = écrire(tmp_path / "niveau.json", description)
+    format_binaire.charger(nom, "échangeur", validateur).fermer()
+    cache = format_binaire.chemin_cache(nom)
+    compilation = os.stat(cache).st_mtime_ns
+    empreintes = list()
+
+    def empreinte_fichier(nom_fichier):
+        empreintes.append(nom_fichier)
+        return original(nom_fichier)
+    original = format_binaire.empreinte_fichier
+    monkeypatch.setattr(format_binaire, "empreinte_fichier",
+                        empreinte_fichier)
+
+    # Taille et date inchangées : le JSON n'est pas relu
+    format_binaire.charger(nom, "échangeur", validateur).fermer()
+    assert empreintes == []
+    # Date changée, contenu identique : l'empreinte évite la recompilation
+    taille, date = format_binaire.état_fichier(nom)
+    os.utime(nom, ns=(date + 10 ** 9, date + 10 ** 9))
+    format_binaire.charger(nom, "échangeur", validateur).fermer()
+    assert empreintes == [nom]
+    assert os.stat(cache).st_mtime_ns == compilation
+    # Contenu changé : le JSON est relu et recompilé
+    description["liaisons"][0]["flux"] += 1
+    écrire(tmp_path / "niveau.json", description)
+    with format_binaire.charger(nom, "échangeur", validateur) as compilé:
+        flux = [f for *_, f in compilé.liaisons()]
+    assert flux[0] == description["liaisons"][0]["flux"]
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Fusions de nœuds, et réinsertion des éléments supprimés
+"""
+
+# Dépendance(s) standard(s)
+import random
+
+# Dépendance(s) interne(s)
+from conftest import cliché
+import graphe
+import historique
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def aléatoire(graine, nœuds=30, liens=60):
+    """Graphe aléatoire, avec des liens en double et des nœuds isolés
+    """
+    aléa = random.Random(graine)
+    retour = graphe.Graphe()
+    créés = list()
+    for k in range(nœuds):
+        n = retour.ajouter_nœud()
+        n["palier"] = k % 3
+        créés.append(n)
+    for _ in range(liens):
+        l = retour.ajouter_lien()
+        l["palier"] = aléa.randrange(3)
+        l.associer(*aléa.sample(créés, 2))
+    return retour
+
+
+def paires(graine, g, nombre):
+    """Paires (nid, but) de nœuds, désignés par identifiant, qui peuvent
+    former des chaînes ou des cycles de fusions
+    """
+    aléa = random.Random(graine)
+    idents = list(g.sommets)
+    return [tuple(aléa.sample(idents, 2)) for _ in range(nombre)]
+
+
+def structure(g):
+    """Nœuds (identifiant et attributs) et extrémités des liens du graphe.
+    Entre des liens en double, le lien conservé peut différer selon l'ordre
+    des reports.
+    """
+    return ({n.ident: n.attributs() for n in g.iter_nœuds()},
+            sorted(sorted(n.ident for n in l.liaisons)
+                   for l in g.iter_liens()))
+
+
+@pytest.mark.parametrize("graine", range(300))
+def test_fusion_groupée(graine):
+    successif = aléatoire(graine)
+    groupé = aléatoire(graine)
+    fusions = paires(graine, successif, random.Random(graine).randint(1, 12))
+
+    # Référence : appels successifs, chaque nœud déjà absorbé étant
+    # remplacé par celui qui l'a absorbé
+    absorbants = dict()
+
+    def absorbant(ident):
+        while ident in absorbants:
+            ident = absorbants[ident]
+        return ident
+
+    for nid, but in fusions:
+        nid = absorbant(nid)
+        but = absorbant(but)
+        if nid != but:
+            successif.fusionner_nœuds(successif.sommets[nid],
+                                      successif.sommets[but])
+            absorbants[nid] = but
+
+    groupé.fusionner_plusieurs([(groupé.sommets[nid], groupé.sommets[but])
+                                for nid, but in fusions])
+    assert structure(groupé) == structure(successif)
+    # Aucun lien en double autour des nœuds ayant absorbé les autres
+    for ident in {absorbant(i) for i in absorbants}:
+        extrémités = [frozenset(l.liaisons)
+                      for l in groupé.sommets[ident].liaisons]
+        assert len(extrémités) == len(set(extrémités))
+
+
+def test_liaisons():
+    g = aléatoire(0, nœuds=6, liens=0)
+    a, b, c, d = list(g.iter_nœuds())[:4]
+    liaisons = graphe.Liaisons()
+    for n in (a, b, c):
+        liaisons.append(n)
+    assert list(liaisons) == [a, b, c] and len(liaisons) == 3
+    assert liaisons[0] is a and liaisons[-1] is c and liaisons[1:] == [b, c]
+    assert b in liaisons and d not in liaisons
+    with pytest.raises(IndexError):
+        liaisons[3]
+    liaisons.remove(b)
+    assert list(liaisons) == [a, c]
+    with pytest.raises(ValueError):
+        liaisons.remove(b)
+    liaisons.insérer(1, d)
+    assert list(liaisons) == [a, d, c] and liaisons.rang(c) == 2
+
+
+def test_attributs_hors_graphe():
+    g = graphe.Graphe()
+    n = g.ajouter_nœud()
+    n["palier"] = 2
+    n["étiquette"] = "x"
+    assert "étiquette" in n and "biome" not in n
+    assert n.get("biome") is None
+    assert g.colonnes["étiquette"] == {n.ident: "x"}
+    g.supprimer_nœud(n)
+    # Les attributs quittent les colonnes du graphe avec l'élément
+    assert n.graphe is None
+    assert all(n.ident not in colonne for colonne in g.colonnes.values())
+    assert n.attributs() == {"palier": 2, "étiquette": "x"}
+    n["palier"] = 1
+    del n["étiquette"]
+    assert n.attributs() == {"palier": 1}
+
+
+def test_rétablir_lien():
+    g = aléatoire(1, nœuds=4, liens=0)
+    a, b = list(g.iter_nœuds())[:2]
+    lien = g.ajouter_lien()
+    lien["palier"] = 2
+    lien.associer(b, a)
+    g.supprimer_lien(lien)
+    assert len(lien.liaisons) == 0 and len(a.liaisons) == 0
+    g.rétablir(lien)
+    assert g.item(lien.ident) is lien and lien["palier"] == 2
+    assert g.colonnes["palier"][lien.ident] == 2
+
+
+@pytest.mark.parametrize("graine", range(20))
+def test_rétablir(graine):
+    """Un nœud supprimé avec ses liens est rétabli, liens compris, par
+    l'historique, qui en note les rangs
+    """
+    g = aléatoire(graine, nœuds=12, liens=30)
+    journal = historique.Historique(g)
+    avant = cliché(g)
+    nœud = random.Random(graine).choice(list(g.iter_nœuds()))
+    with journal.transaction():
+        g.supprimer_nœud(nœud)
+    assert nœud.ident not in g.sommets
+    assert journal.annuler()
+    assert g.item(nœud.ident) is nœud
+    assert cliché(g) == avant
+    # Les identifiants ne sont jamais réutilisés
+    assert g.ajouter_nœud().ident > max(avant)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Génération des niveaux et des mondes
+"""
+
+# Dépendance(s) standard(s)
+import os
+import subprocess
+import sys
+
+# Dépendance(s) interne(s)
+import format_1
+import générateur
+
+# Dépendance(s) externe(s)
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_reproductible():
+    assert (générateur.niveau(12, 5, 8, 4)
+            == générateur.niveau(12, 5, 8, 4))
+    assert générateur.niveau(12, 5, 8, 4) != générateur.niveau(13, 5, 8, 4)
+
+
+@pytest.mark.parametrize("routes", [0, 1])
+def test_liaisons_sans_deux_routes(routes):
+    with pytest.raises(ValueError):
+        générateur.niveau(1, routes, 3, 1)
+    # Sans liaison, une route seule (ou aucune) suffit
+    description = générateur.niveau(1, routes, 3, 0)
+    assert len(description["routes"]) == routes
+    assert description["liaisons"] == []
+
+
+def test_liaisons_entre_routes_distinctes():
+    description = générateur.niveau(4, 2, 0, 20)
+    assert all(l["nid"] != l["but"] for l in description["liaisons"])
+
+
+@pytest.mark.parametrize("description", [
+    générateur.niveau(3, 6, 10, 5),
+    générateur.monde(3, 6, 200, 5, 2000, 1500)])
+def test_conforme_au_schéma(description):
+    pytest.importorskip("jsonschema")
+    validateur = format_1.validateur(RACINE)
+    assert validateur.valider("échangeur", format_1.définition(description),
+                              description)
+
+
+def test_banc_sans_numpy_au_chargement():
+    # Le trafic, et donc NumPy, n'est importé que par le banc qui s'en sert
+    code = "import sys, banc; print('trafic' in sys.modules)"
+    sortie = subprocess.run([sys.executable, "-c", code], cwd=RACINE,
+                            capture_output=True, text=True, check=True)
+    assert sortie.stdout.strip() == "False"
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""L'annulation puis le rétablissement des transactions rendent exactement
+les états successifs du graphe
+"""
+
+# Dépendance(s) standard(s)
+import random
+
+# Dépendance(s) interne(s)
+from conftest import cliché, retoucher
+import historique
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def partie(graine, actions):
+    """Niveau modifié par des actions aléatoires, chacune formant une
+    transaction, et clichés du graphe avant chacune puis à la fin
+    """
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    journal = historique.Historique(niveau.graphe)
+    aléa = random.Random(graine)
+    clichés = [cliché(niveau.graphe)]
+    for _ in range(actions):
+        with journal.transaction():
+            retoucher(niveau, aléa)
+        clichés.append(cliché(niveau.graphe))
+    return niveau, journal, clichés
+
+
+@pytest.mark.parametrize("graine", range(40))
+def test_aller_retour(graine):
+    niveau, journal, clichés = partie(graine, 60)
+    final = clichés[-1]
+    while journal.annuler():
+        pass
+    assert cliché(niveau.graphe) == clichés[0]
+    while journal.rétablir():
+        pass
+    assert cliché(niveau.graphe) == final
+
+
+def test_états_intermédiaires():
+    niveau, journal, clichés = partie(3, 80)
+    # Les actions sans effet (mouvement refusé…) ne forment pas de
+    # transaction : seuls les états distincts successifs sont retrouvés
+    états = [clichés[0]]
+    for c in clichés[1:]:
+        if c != états[-1]:
+            états.append(c)
+    assert len(journal.annulables) == len(états) - 1
+    for attendu in reversed(états[:-1]):
+        assert journal.annuler()
+        assert cliché(niveau.graphe) == attendu
+    assert not journal.annuler()
+    for attendu in états[1:]:
+        assert journal.rétablir()
+        assert cliché(niveau.graphe) == attendu
+    assert not journal.rétablir()
+
+
+def test_transaction_vide():
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    journal = historique.Historique(niveau.graphe)
+    with journal.transaction():
+        pass
+    assert not journal.annuler()
+
+
+def test_nouvelle_action_après_annulation():
+    niveau, journal, _ = partie(5, 20)
+    assert journal.annuler()
+    with journal.transaction():
+        niveau.ajouter_nœud(échangeur.V2(1, 1))
+    assert not journal.rétablir()
+
+
+def test_mouvement_regroupé():
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    journal = historique.Historique(niveau.graphe)
+    nœud = niveau.ajouter_nœud(échangeur.V2(0, 0))
+    with journal.transaction():
+        for x in range(1, 50):
+            assert niveau.déplacer_nœud(nœud, échangeur.V2(x, x))
+    assert journal.annulables[-1] == [("attribut", nœud, "position",
+                                       échangeur.V2(0, 0))]
+    journal.annuler()
+    assert nœud["position"] == échangeur.V2(0, 0)
+
+
+def test_capacité():
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    journal = historique.Historique(niveau.graphe, capacité=30)
+    aléa = random.Random(8)
+    clichés = list()
+    for _ in range(40):
+        clichés.append(cliché(niveau.graphe))
+        with journal.transaction():
+            niveau.ajouter_nœud(échangeur.V2(aléa.randint(0, 200),
+                                             aléa.randint(0, 200)))
+    # Un nœud isolé : six opérations (ajout et cinq attributs)
+    assert journal.taille <= 30
+    assert len(journal.annulables) == 5
+    for _ in range(5):
+        assert journal.annuler()
+    assert not journal.annuler()
+    # Les transactions les plus anciennes ont été oubliées
+    assert cliché(niveau.graphe) == clichés[-5]
+    for _ in range(5):
+        assert journal.rétablir()
+    assert len(niveau.graphe.sommets) == 40
+
+
+def test_capacité_dépassée_par_une_transaction():
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    journal = historique.Historique(niveau.graphe, capacité=3)
+    with journal.transaction():
+        niveau.ajouter_nœud(échangeur.V2(0, 0))
+    # La dernière transaction est toujours conservée
+    assert len(journal.annulables) == 1
+    assert journal.annuler()
+    assert len(niveau.graphe.sommets) == 0
+
+
+def test_rejouer_inverse():
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    journal = historique.Historique(niveau.graphe)
+    a = niveau.ajouter_nœud(échangeur.V2(0, 0))
+    b = niveau.ajouter_nœud(échangeur.V2(10, 0), a)
+    avant = cliché(niveau.graphe)
+    with journal.transaction():
+        niveau.couper_lien(next(iter(b.liaisons)), échangeur.V2(5, 5))
+    après = cliché(niveau.graphe)
+    opérations = journal.annulables.pop()
+    inverse = journal.rejouer(opérations)
+    assert cliché(niveau.graphe) == avant
+    journal.rejouer(inverse)
+    assert cliché(niveau.graphe) == après
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Les requêtes des index spatiaux rendent les réponses des parcours
+exhaustifs
+"""
+
+# Dépendance(s) standard(s)
+import math
+import random
+
+# Dépendance(s) interne(s)
+import index_spatial
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+V2 = échangeur.V2
+
+
+def touche(obstacle, p0, p1):
+    """Test d'origine, bord par bord, du segment [p0, p1] contre l'obstacle
+    """
+    v = p1 - p0
+    vl = V2(obstacle.coin_max.largeur - obstacle.coin_min.largeur, 0)
+    vh = V2(0, obstacle.coin_max.hauteur - obstacle.coin_min.hauteur)
+    return (échangeur.intersection(p0, v, obstacle.coin_min, vl)
+            or échangeur.intersection(p0, v, obstacle.coin_min, vh)
+            or échangeur.intersection(p0, v, obstacle.coin_max, -vl)
+            or échangeur.intersection(p0, v, obstacle.coin_max, -vh))
+
+
+def recoupe(obstacle, p0, p1):
+    """Vrai ssi l'obstacle recoupe la boîte englobante du segment
+    """
+    return (obstacle.coin_min.largeur <= max(p0.largeur, p1.largeur)
+            and min(p0.largeur, p1.largeur) <= obstacle.coin_max.largeur
+            and obstacle.coin_min.hauteur <= max(p0.hauteur, p1.hauteur)
+            and min(p0.hauteur, p1.hauteur) <= obstacle.coin_max.hauteur)
+
+
+def obstacles_aléatoires(aléa, nombre, côté, taille):
+    """Obstacles à coordonnées entières, dont quelques-uns d'aire nulle
+    """
+    retour = list()
+    for _ in range(nombre):
+        x, y = aléa.randrange(côté), aléa.randrange(côté)
+        l = 0 if aléa.random() < 0.1 else aléa.randint(1, taille)
+        h = 0 if aléa.random() < 0.1 else aléa.randint(1, taille)
+        retour.append(échangeur.Obstacle(V2(x, y), V2(x + l, y + h),
+                                         échangeur.Biome.FORÊT))
+    return retour
+
+
+def segment_aléatoire(aléa, côté, obstacles):
+    """Segment quelconque, horizontal ou vertical, partant d'ailleurs que
+    d'un coin d'obstacle (le critère d'origine y divise par zéro)
+    """
+    coins = {c for o in obstacles for c in (o.coin_min, o.coin_max)}
+    while True:
+        p0 = V2(aléa.randrange(côté), aléa.randrange(côté))
+        forme = aléa.random()
+        if forme < 0.3:
+            p1 = V2(aléa.randrange(côté), p0.hauteur)
+        elif forme < 0.6:
+            p1 = V2(p0.largeur, aléa.randrange(côté))
+        else:
+            p1 = V2(aléa.randrange(côté), aléa.randrange(côté))
+        if p0 != p1 and p0 not in coins:
+            return p0, p1
+
+
+@pytest.mark.parametrize("côté, taille", [(40, 8), (640, 40), (5000, 60)])
+def test_obstacles_croisés(côté, taille):
+    aléa = random.Random(côté)
+    touchés = 0
+    for _ in range(20):
+        obstacles = obstacles_aléatoires(aléa, 30, côté, taille)
+        index = index_spatial.IndexObstacles(obstacles, côté=16)
+        for _ in range(100):
+            p0, p1 = segment_aléatoire(aléa, côté, obstacles)
+            attendus = [o for o in obstacles if touche(o, p0, p1)]
+            args = (p0.largeur, p0.hauteur, p1.largeur, p1.hauteur)
+            candidats = index.croisant(*args)
+            assert [o for o in candidats
+                    if o.intersection(p0, p1)] == attendus
+            # Sans les obstacles lointains, seuls restent ceux touchés
+            proches = index.croisant(*args, colinéaires=False)
+            assert [o for o in proches if o.intersection(p0, p1)] == [
+                o for o in attendus if recoupe(o, p0, p1)]
+            touchés += len(attendus)
+    assert touchés > 0
+
+
+def test_colinéaires_à_la_tolérance_près():
+    # Coin décalé d'une unité, à 4000 unités : tenu pour aligné par le
+    # critère d'intersection
+    obstacles = [échangeur.Obstacle(V2(4000, 1), V2(4010, 10),
+                                    échangeur.Biome.USINE),
+                 échangeur.Obstacle(V2(2000, 3), V2(2010, 10),
+                                    échangeur.Biome.USINE)]
+    index = index_spatial.IndexObstacles(obstacles)
+    p0, p1 = V2(0, 0), V2(5, 0)
+    assert [o for o in obstacles if touche(o, p0, p1)] == obstacles[:1]
+    assert obstacles[0] in index.croisant(0, 0, 5, 0)
+    assert obstacles[1] not in index.croisant(0, 0, 5, 0)
+    assert index.croisant(0, 0, 5, 0, colinéaires=False) == []
+
+
+def test_obstacles_ajoutés_puis_retirés():
+    aléa = random.Random(3)
+    obstacles = list()
+    index = index_spatial.IndexObstacles(obstacles)
+    for étape in range(6):
+        if étape == 4:
+            del obstacles[5:]
+        else:
+            obstacles.extend(obstacles_aléatoires(aléa, 10, 300, 30))
+        for _ in range(50):
+            p0, p1 = segment_aléatoire(aléa, 300, obstacles)
+            candidats = index.croisant(p0.largeur, p0.hauteur, p1.largeur,
+                                       p1.hauteur)
+            assert [o for o in candidats if o.intersection(p0, p1)] == [
+                o for o in obstacles if touche(o, p0, p1)]
+            x, y = p0.largeur, p0.hauteur
+            contenant = index.contenant(x, y)
+            dedans = [o for o in obstacles
+                      if o.coin_min.largeur <= x <= o.coin_max.largeur
+                      and o.coin_min.hauteur <= y <= o.coin_max.hauteur]
+            assert (contenant is None) == (len(dedans) == 0)
+            assert contenant is None or contenant in dedans
+            xmin, xmax = sorted((p0.largeur, p1.largeur))
+            ymin, ymax = sorted((p0.hauteur, p1.hauteur))
+            assert index.dans_rectangle(xmin, ymin, xmax, ymax) == [
+                o for o in obstacles if recoupe(o, p0, p1)]
+
+
+def test_proximité(réseau):
+    aléa = random.Random(11)
+    niveau = réseau(4, 300, 200, 640, entiers=False)
+    nœuds = list(niveau.graphe.iter_nœuds())
+    for _ in range(200):
+        p = V2(aléa.uniform(-50, 700), aléa.uniform(-50, 500))
+        exclus = aléa.sample(nœuds, 3)
+        nœud, distance = échangeur.nœud_proche(niveau.graphe, p, *exclus)
+        assert niveau.nœud_proche(p, *exclus) == (nœud,
+                                                  pytest.approx(distance))
+        distances = sorted(math.dist(n["position"].en_tuple(), p.en_tuple())
+                           for n in nœuds if n not in exclus)
+        proches = niveau.plus_proches_nœuds(p, 5, *exclus)
+        assert [d for _, d in proches] == pytest.approx(distances[:5])
+        lien, distance = échangeur.lien_proche(niveau.graphe, p)
+        obtenu, d = niveau.lien_proche(p)
+        assert d == pytest.approx(distance)
+        assert (obtenu is None) == (lien is None)
+
+
+def test_égalités(réseau):
+    """À distance égale, le plus petit identifiant l'emporte, quel que soit
+    l'ordre des cases parcourues
+    """
+    aléa = random.Random(3)
+    for _ in range(20):
+        niveau = réseau(0, 0, 0, 0)
+        centre = V2(aléa.randint(0, 640), aléa.randint(0, 480))
+        r = aléa.choice((5, 40, 100))
+        décalages = [(r, 0), (-r, 0), (0, r), (0, -r)]
+        aléa.shuffle(décalages)
+        nœuds = [niveau.ajouter_nœud(V2(centre.largeur + dx,
+                                        centre.hauteur + dy))
+                 for dx, dy in décalages]
+        attendu = sorted(nœuds, key=lambda n: n.ident)
+        assert niveau.nœud_proche(centre)[0] is attendu[0]
+        assert [n for n, _ in niveau.plus_proches_nœuds(centre, 3)] == \
+            attendu[:3]
+        # Deux liens parallèles, de part et d'autre du centre
+        liens = list()
+        for dy in aléa.sample((r, -r), 2):
+            a = niveau.ajouter_nœud(V2(centre.largeur - 3 * r,
+                                       centre.hauteur + dy))
+            niveau.ajouter_nœud(V2(centre.largeur + 3 * r,
+                                   centre.hauteur + dy), a)
+            liens.append(next(iter(a.liaisons)))
+        assert niveau.lien_proche(centre)[0] is min(liens,
+                                                    key=lambda l: l.ident)
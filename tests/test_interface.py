@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Traitement des actions du joueur, sans affichage
+"""
+
+# Dépendance(s) standard(s)
+import os
+
+# Dépendance(s) interne(s)
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+pygame = pytest.importorskip("pygame")
+interface = pytest.importorskip("interface")
+
+V2 = échangeur.V2
+
+
+def appui(x, y, bouton=1):
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(x, y),
+                              button=bouton)
+
+
+def relâche(x, y, bouton=1):
+    return pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(x, y),
+                              button=bouton)
+
+
+def mouvement(x, y):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0),
+                              buttons=(1, 0, 0))
+
+
+@pytest.fixture
+def partie():
+    """Interface sur un niveau où un nœud amovible, en (100, 100), est relié
+    à un nœud fixe, près d'un obstacle
+    """
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    niveau.obstacles.append(échangeur.Obstacle(V2(300, 50), V2(350, 150),
+                                               échangeur.Biome.FORÊT))
+    niveau.index_obstacles.indexer()
+    fixe = niveau.ajouter_nœud(V2(100, 300))
+    fixe["amovible"] = False
+    nœud = niveau.ajouter_nœud(V2(100, 100), fixe)
+    retour = interface.Interface(niveau, None, interface.RAYON)
+    validations = list()
+    déplacer_nœud = niveau.déplacer_nœud
+
+    def compter(n, position):
+        validations.append(position)
+        return déplacer_nœud(n, position)
+    niveau.déplacer_nœud = compter
+    return retour, nœud, validations
+
+
+def test_mouvements_regroupés(partie):
+    jeu, nœud, validations = partie
+    jeu.image([appui(100, 100)] + [mouvement(100 + k, 100 + k)
+                                   for k in range(1, 20)])
+    # Une seule validation par image, pour la dernière position demandée
+    assert validations == [V2(119, 119)]
+    assert nœud["position"] == V2(119, 119) and jeu.point is nœud
+    jeu.image([mouvement(150, 110), mouvement(160, 120), relâche(160, 120),
+               mouvement(170, 130)])
+    # Le mouvement en attente est validé avant le relâchement ; ceux qui
+    # suivent ne déplacent plus rien
+    assert validations[1:] == [V2(160, 120)]
+    assert nœud["position"] == V2(160, 120) and jeu.point is None
+    # Le geste entier forme une seule transaction
+    jeu.historique.annuler()
+    assert nœud["position"] == V2(100, 100)
+
+
+def test_sélection_perdue(partie):
+    jeu, nœud, validations = partie
+    jeu.image([appui(100, 100), mouvement(200, 100)])
+    assert nœud["position"] == V2(200, 100)
+    # Dans l'obstacle, le mouvement est refusé et la sélection perdue
+    jeu.image([mouvement(320, 100)])
+    assert jeu.point is None
+    assert nœud["position"] == V2(200, 100)
+    # Les mouvements suivants, même autorisés, sont sans effet
+    jeu.image([mouvement(250, 100), mouvement(260, 100)])
+    assert validations == [V2(200, 100), V2(320, 100)]
+    assert nœud["position"] == V2(200, 100)
+    # La transaction a été close par la perte de la sélection
+    assert jeu.historique.en_cours is None
+    jeu.historique.annuler()
+    assert nœud["position"] == V2(100, 100)
+
+
+def test_fin_de_partie(partie):
+    jeu, _, _ = partie
+    jeu.image([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE,
+                                  mod=0),
+               appui(100, 100), mouvement(120, 120)])
+    assert jeu.fini and jeu.point is None
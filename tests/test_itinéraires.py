@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""Les plus courts chemins tenus à jour au fil des modifications sont ceux
+d'un Dijkstra recalculé de zéro
+"""
+
+# Dépendance(s) standard(s)
+import heapq
+import math
+import random
+
+# Dépendance(s) interne(s)
+from conftest import peupler, retoucher
+import itinéraires
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def longueur(lien):
+    p, q = [n["position"] for n in lien.liaisons]
+    return (q - p).norme()
+
+
+def distances(graphe, départ):
+    """Dijkstra de référence : distances depuis le départ de tous les nœuds
+    accessibles
+    """
+    retour = {départ: 0}
+    file = [(0, départ.ident, départ)]
+    while file:
+        d, _, nœud = heapq.heappop(file)
+        if d > retour[nœud]:
+            continue
+        for lien in nœud.liaisons:
+            if not itinéraires.est_parcourable(lien):
+                continue
+            voisin = itinéraires.autre_extrémité(lien, nœud)
+            dv = d + longueur(lien)
+            if dv < retour.get(voisin, math.inf):
+                retour[voisin] = dv
+                heapq.heappush(file, (dv, voisin.ident, voisin))
+    return retour
+
+
+def vérifier(niveau):
+    for k, liaison in enumerate(niveau.flux):
+        référence = distances(niveau.graphe, liaison.nid)
+        attendue = référence.get(liaison.but, math.inf)
+        itinéraire = niveau.itinéraires.itinéraire(k)
+        assert itinéraire.distance == pytest.approx(attendue)
+        chemin = itinéraire.chemin
+        if attendue == math.inf:
+            assert chemin is None
+            continue
+        # Le chemin relie le départ à l'arrivée, et chaque nœud y est
+        # atteint par le lien qui le précède à sa distance de référence
+        nœud = liaison.nid
+        parcouru = 0
+        for lien in chemin:
+            assert lien.graphe is niveau.graphe and nœud in lien.liaisons
+            nœud = itinéraires.autre_extrémité(lien, nœud)
+            parcouru += longueur(lien)
+            assert parcouru == pytest.approx(référence[nœud])
+        assert nœud is liaison.but
+        # Les distances conservées ne surestiment aucune distance utile
+        for n, d in référence.items():
+            if d <= attendue:
+                assert itinéraire.avant.get(n, math.inf) <= d + 1e-6
+
+
+@pytest.mark.parametrize("graine", range(4))
+def test_modifications_aléatoires(graine):
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    nœuds = peupler(niveau, graine, 30, 45, 200, paliers=1)
+    aléa = random.Random(graine)
+    fixes = aléa.sample(nœuds, 6)
+    for n in fixes:
+        n["amovible"] = False
+    for a, b in zip(fixes[::2], fixes[1::2]):
+        niveau.flux.append(échangeur.Liaison(a, b, 10))
+    vérifier(niveau)
+    for _ in range(400):
+        retoucher(niveau, aléa)
+        vérifier(niveau)
+    # Trois liaisons consultées après chaque modification : les mises à
+    # jour incrémentales évitent la plupart des recalculs
+    assert niveau.itinéraires.recalculs < 400
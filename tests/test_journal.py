@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Le journal des opérations, rejoué depuis un instantané, mène à l'état
+final du graphe
+"""
+
+# Dépendance(s) standard(s)
+import io
+import json
+import logging
+import random
+
+# Dépendance(s) interne(s)
+from conftest import peupler, retoucher
+import journal
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+def rejouer(état, entrées):
+    """Applique les entrées du journal à un instantané
+    """
+    for _, nature, nom, *arguments in entrées:
+        table = état["liens" if nom.startswith("L") else "nœuds"]
+        if nature == "+":
+            table[nom] = {"nœuds": []} if nom.startswith("L") else dict()
+        elif nature == "-":
+            del table[nom]
+        elif nature == "lie":
+            table[nom]["nœuds"].append(arguments[0])
+        elif nature == "délie":
+            table[nom]["nœuds"].remove(arguments[0])
+        elif nature == "=":
+            clef, valeur = arguments
+            if valeur is None:
+                table[nom].pop(clef, None)
+            else:
+                table[nom][clef] = valeur
+    for lien in état["liens"].values():
+        lien["nœuds"].sort()
+    return état
+
+
+@pytest.mark.parametrize("graine", range(10))
+def test_rejeu(graine):
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    peupler(niveau, graine, 20, 20, 200)
+    avant = journal.instantané(niveau.graphe)
+    suivi = journal.Journal(niveau.graphe)
+    aléa = random.Random(graine)
+    for _ in range(200):
+        retoucher(niveau, aléa)
+    numéros = [e[0] for e in suivi.entrées]
+    assert numéros == list(range(len(numéros)))
+    assert rejouer(avant, suivi.entrées) == journal.instantané(
+        niveau.graphe)
+
+
+def test_capacité():
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    suivi = journal.Journal(niveau.graphe, capacité=10)
+    for k in range(5):
+        niveau.ajouter_nœud(échangeur.V2(k, k))
+    # Six entrées par nœud isolé : ajout et cinq attributs
+    assert len(suivi.entrées) == 10
+    assert [e[0] for e in suivi.entrées] == list(range(20, 30))
+
+
+def test_écriture(caplog):
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    suivi = journal.Journal(niveau.graphe)
+    a = niveau.ajouter_nœud(échangeur.V2(1, 2))
+    with caplog.at_level(logging.DEBUG, logger="graphe"):
+        b = niveau.ajouter_nœud(échangeur.V2(3, 4), a)
+        niveau.graphe.fusionner_nœuds(b, a)
+    sortie = io.StringIO()
+    suivi.écrire(sortie)
+    lignes = [json.loads(l) for l in sortie.getvalue().splitlines()]
+    assert lignes[:6] == [
+        [0, "+", "N0"], [1, "=", "N0", "position", [1, 2]],
+        [2, "=", "N0", "couleur", list(a["couleur"])],
+        [3, "=", "N0", "amovible", True],
+        [4, "=", "N0", "biome", échangeur.Biome.AUCUN],
+        [5, "=", "N0", "palier", 0]]
+    assert [l[1:] for l in lignes if l[1] in ("fusion", "lie", "délie")] \
+        == [["lie", "L2", "N0"], ["lie", "L2", "N1"],
+            ["fusion", "N1", "N0"], ["délie", "L2", "N1"],
+            ["délie", "L2", "N0"]]
+    # Les seules entrées émises au niveau DEBUG sont mises en forme
+    assert [json.loads(r.getMessage()) for r in caplog.records] \
+        == lignes[6:]
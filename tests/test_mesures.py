@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Compteurs et chronomètres de l'instrumentation, image par image
+"""
+
+# Dépendance(s) standard(s)
+import json
+import random
+
+# Dépendance(s) interne(s)
+from conftest import retoucher
+import mesures
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+
+class Horloge:
+    """Horloge factice, avancée à la main
+    """
+
+    def __init__(self):
+        self.instant = 0.0
+
+    def __call__(self):
+        return self.instant
+
+
+@pytest.fixture
+def horloge(monkeypatch):
+    retour = Horloge()
+    monkeypatch.setattr(mesures.time, "perf_counter", retour)
+    return retour
+
+
+class Calculs:
+
+    def __init__(self, horloge):
+        self.horloge = horloge
+
+    def feuille(self, durée):
+        self.horloge.instant += durée
+
+    def branche(self, durée):
+        self.horloge.instant += durée
+        self.feuille(durée)
+
+
+def test_durées_et_part_non_couverte(horloge):
+    m = mesures.Mesures(fenêtre=2, budget=1.0)
+    calculs = Calculs(horloge)
+    m.instrumenter(calculs, "feuille")
+    m.instrumenter(calculs, "branche")
+    for k in range(3):
+        m.commencer_image()
+        calculs.branche(0.1)
+        calculs.feuille(0.2)
+        m.compter("événements", k)
+        horloge.instant += 0.3
+        m.terminer_image()
+    bilan = {c: (a, pytest.approx(d)) for c, a, d in m.bilan()}
+    # Par image de la fenêtre (les deux dernières) : 0,2 s dans «branche»
+    # (dont 0,1 s dans «feuille»), 0,2 s d'un autre appel de «feuille»,
+    # 0,3 s hors des points mesurés
+    assert bilan == {"image": (2, pytest.approx(0.7)),
+                     "branche": (1, pytest.approx(0.2)),
+                     "feuille": (2, pytest.approx(0.3)),
+                     "(autre)": (0, pytest.approx(0.3)),
+                     "événements": (1.5, 0)}
+    assert m.lignes()[0].startswith("image : 700.00 ms (70 % du budget")
+
+
+def test_niveau_instrumenté(horloge):
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    aléa = random.Random(4)
+    for _ in range(30):
+        retoucher(niveau, aléa)
+    m = mesures.Mesures()
+    assert not m.actif
+    échangeur.instrumenter(m, niveau)
+    assert m.actif
+    appels = {"est_complet": 0, "nœud_proche": 0}
+    for _ in range(10):
+        m.commencer_image()
+        for _ in range(aléa.randint(0, 3)):
+            niveau.est_complet()
+            appels["est_complet"] += 1
+        niveau.nœud_proche(échangeur.V2(50, 50))
+        appels["nœud_proche"] += 1
+        m.terminer_image()
+    bilan = {c: a for c, a, _ in m.bilan()}
+    for clef, nombre in appels.items():
+        assert bilan[clef] == pytest.approx(nombre / 10)
+    # Retirée, l'instrumentation ne laisse aucune trace sur le niveau
+    m.retirer()
+    assert not m.actif
+    assert "est_complet" not in vars(niveau)
+    assert niveau.graphe.fusionner_nœuds.__self__ is niveau.graphe
+    m.commencer_image()
+    niveau.est_complet()
+    m.terminer_image()
+    assert len(m.images) == 10
+
+
+def test_écrire(tmp_path, horloge):
+    m = mesures.Mesures()
+    m.instrumenter(Calculs(horloge), "feuille")
+    m.commencer_image()
+    horloge.instant += 0.01
+    m.terminer_image()
+    nom = tmp_path / "mesures.jsonl"
+    m.écrire(str(nom), niveau="essai")
+    m.écrire(str(nom), niveau="essai")
+    entrées = [json.loads(l) for l in nom.read_text().splitlines()]
+    assert len(entrées) == 2
+    assert entrées[0]["niveau"] == "essai"
+    assert entrées[0]["mesures"][0] == {"clef": "image", "appels": 1,
+                                        "secondes": pytest.approx(0.01)}
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Un monde dont les régions sont chargées à la demande répond comme s'il
+était chargé en entier
+"""
+
+# Dépendance(s) standard(s)
+import json
+import random
+
+# Dépendance(s) interne(s)
+import générateur
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+V2 = échangeur.V2
+LARGEUR = 6000
+HAUTEUR = 4000
+
+
+@pytest.fixture(scope="module")
+def monde(tmp_path_factory):
+    chemin = tmp_path_factory.mktemp("monde") / "monde.json"
+    description = générateur.monde(7, 8, 3000, 4, LARGEUR, HAUTEUR,
+                                   côté=500)
+    chemin.write_text(json.dumps(description, ensure_ascii=False),
+                      encoding="utf-8")
+    return str(chemin)
+
+
+def niveaux(monde):
+    entier = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    entier.charger(monde, à_la_demande=False)
+    partiel = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    partiel.charger(monde)
+    return entier, partiel
+
+
+def test_chargement_à_la_demande(monde):
+    entier, partiel = niveaux(monde)
+    assert len(partiel.obstacles) == 0
+    aléa = random.Random(2)
+    for k in range(2000):
+        p = V2(aléa.randrange(LARGEUR), aléa.randrange(HAUTEUR))
+        q = V2(p.largeur + aléa.randint(-300, 300),
+               p.hauteur + aléa.randint(-300, 300))
+        if k % 3 == 0:
+            q = V2(q.largeur, p.hauteur)
+        assert (partiel.est_dans_un_obstacle(p)
+                == entier.est_dans_un_obstacle(p))
+        if p != q:
+            assert (partiel.touche_un_obstacle(p, q)
+                    == entier.touche_un_obstacle(p, q))
+        if k % 100 == 0:
+            # La vue se déplace : les régions hors de vue sont oubliées
+            partiel.cadrer(p.largeur, p.hauteur, p.largeur + 640,
+                           p.hauteur + 480)
+    assert 0 < len(partiel.obstacles) < len(entier.obstacles)
+
+
+def test_mouvements(monde):
+    entier, partiel = niveaux(monde)
+    aléa = random.Random(3)
+    paires = list()
+    for niveau in (entier, partiel):
+        a = niveau.ajouter_nœud(V2(10, 10))
+        b = niveau.ajouter_nœud(V2(20, 10), a)
+        paires.append((a, b))
+    for _ in range(300):
+        p = V2(aléa.randrange(LARGEUR), aléa.randrange(HAUTEUR))
+        (a, b), (c, d) = paires
+        valide = entier.valider_mouvement(b, p)
+        assert partiel.valider_mouvement(d, p) == valide
+        if valide:
+            b["position"] = p
+            d["position"] = p
+        elif not entier.est_dans_un_obstacle(p):
+            a["position"] = p
+            c["position"] = p
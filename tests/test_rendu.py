@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Superposition des couches du «Compositeur»
+"""
+
+# Dépendance(s) standard(s)
+import os
+import random
+
+# Dépendance(s) interne(s)
+from conftest import peupler, retoucher
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+rendu = pytest.importorskip("rendu")
+
+V2 = échangeur.V2
+
+
+@pytest.fixture
+def écran():
+    pygame.display.init()
+    yield pygame.display.set_mode((120, 80))
+    pygame.display.quit()
+
+
+def ajouter_nœud(niveau, position, amovible, couleur):
+    n = niveau.graphe.ajouter_nœud()
+    n["amovible"] = amovible
+    n["biome"] = échangeur.Biome.AUCUN
+    n["couleur"] = couleur
+    n["palier"] = 0
+    n["position"] = position
+    return n
+
+
+def test_nœuds_amovibles_au_premier_plan(écran):
+    niveau = échangeur.Niveau(moteur=échangeur.Moteur.SCALAIRE)
+    niveau.obstacles.append(échangeur.Obstacle(V2(40, 20), V2(80, 60),
+                                               échangeur.Biome.FORÊT))
+    # Un nœud amovible et un nœud fixe à cheval sur le bord de l'obstacle
+    amovible = ajouter_nœud(niveau, V2(38, 40), True, (255, 0, 0))
+    fixe = ajouter_nœud(niveau, V2(82, 40), False, (0, 0, 255))
+    l = niveau.graphe.ajouter_lien()
+    l["palier"] = 0
+    l["couleur"] = (255, 255, 255)
+    l.associer(amovible, fixe)
+
+    compositeur = rendu.Compositeur(écran, niveau, 5, échangeur.PALIERS)
+    compositeur.dessiner()
+    # Le nœud amovible recouvre l'obstacle, lequel recouvre le nœud fixe
+    assert tuple(écran.get_at((41, 40)))[:3] == (255, 0, 0)
+    assert tuple(écran.get_at((79, 40)))[:3] == rendu.VERT
+    assert tuple(écran.get_at((85, 40)))[:3] == (0, 0, 255)
+
+    # De même après un déplacement, qui ne retrace que les zones touchées
+    amovible["position"] = V2(38, 30)
+    compositeur.dessiner()
+    assert tuple(écran.get_at((41, 30)))[:3] == (255, 0, 0)
+    assert tuple(écran.get_at((41, 40)))[:3] == rendu.VERT
+
+
+def pixels(surface):
+    return pygame.image.tobytes(surface, "RGB")
+
+
+@pytest.mark.parametrize("graine", range(3))
+def test_zones_comme_image_complète(écran, graine):
+    """Après chaque action, les seules zones redessinées donnent l'image
+    qu'un rendu complet produit
+    """
+    aléa = random.Random(graine)
+    niveau = échangeur.Niveau(moteur=échangeur.Moteur.SCALAIRE)
+    for _ in range(3):
+        x, y = aléa.randint(0, 100), aléa.randint(0, 60)
+        niveau.obstacles.append(échangeur.Obstacle(
+            V2(x, y), V2(x + 15, y + 10), échangeur.Biome.FORÊT))
+    niveau.index_obstacles.indexer()
+    for n in peupler(niveau, graine, 12, 12, 120, paliers=2)[:3]:
+        n["amovible"] = False
+    incrémental = rendu.Rendu(écran, niveau, 3)
+    compositeur = rendu.Compositeur(pygame.Surface(écran.get_size()),
+                                    niveau, 3, échangeur.PALIERS)
+    for _ in range(60):
+        retoucher(niveau, aléa, côté=120)
+        incrémental.dessiner()
+        compositeur.dessiner()
+        complet = rendu.Rendu(pygame.Surface(écran.get_size()), niveau, 3,
+                              rendu.Mode.COMPLET)
+        recomposé = rendu.Compositeur(pygame.Surface(écran.get_size()),
+                                      niveau, 3, échangeur.PALIERS)
+        for référence in (complet, recomposé):
+            référence.dessiner()
+            niveau.graphe.désabonner(référence)
+        assert pixels(écran) == pixels(complet.écran)
+        assert pixels(compositeur.écran) == pixels(recomposé.écran)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Recherche de solutions et construction des réseaux témoins
+"""
+
+# Dépendance(s) standard(s)
+import os
+import random
+
+# Dépendance(s) interne(s)
+import solveur
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+NIVEAU = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), "niveau-1.0.json")
+
+
+@pytest.fixture(scope="module")
+def témoin():
+    niveau = échangeur.Niveau()
+    niveau.charger(NIVEAU, à_la_demande=False)
+    recherche = solveur.Recherche(niveau)
+    for graine in range(50):
+        retour = recherche.essayer(graine)
+        if retour is not None:
+            return retour
+    pytest.skip("aucune solution trouvée")
+
+
+def test_solution_vérifiée(témoin):
+    assert solveur.vérifier(NIVEAU, témoin)
+
+
+def test_appliquer(témoin):
+    niveau = échangeur.Niveau()
+    niveau.charger(NIVEAU, à_la_demande=False)
+    random.seed(1977)
+    état = random.getstate()
+    créés = list()
+    solveur.appliquer(niveau, témoin, créés)
+    # L'état du module «random», qui rejoue les parties, est préservé
+    assert random.getstate() == état
+    liens = [e for e in créés if e.est_arête]
+    assert len(liens) == len(témoin["liens"])
+    for l in liens:
+        assert "amovible" not in l and "biome" not in l
+        bas = round(255 * l["palier"] / échangeur.PALIERS)
+        haut = round(255 * (l["palier"] + 1) / échangeur.PALIERS)
+        assert all(bas <= c <= haut for c in l["couleur"])
+    assert solveur.est_solution(niveau)
+
+    # Les couleurs ne dépendent que de la graine
+    autre = échangeur.Niveau()
+    autre.charger(NIVEAU, à_la_demande=False)
+    recréés = list()
+    solveur.appliquer(autre, témoin, recréés)
+    assert ([e["couleur"] for e in recréés if e.est_arête]
+            == [l["couleur"] for l in liens])
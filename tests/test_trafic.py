@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Émission, progression et arrivée des véhicules, et cohérence des bilans
+lorsque le réseau change
+"""
+
+# Dépendance(s) standard(s)
+import random
+
+# Dépendance(s) interne(s)
+from conftest import peupler, retoucher
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+numpy = pytest.importorskip("numpy")
+import trafic
+
+V2 = échangeur.V2
+
+
+def détour():
+    """Liaison de A à B, par un chemin direct (A, M, B) de 200 pixels ou un
+    détour (A, D, B) plus long
+    """
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    a = niveau.ajouter_nœud(V2(0, 0))
+    m = niveau.ajouter_nœud(V2(100, 0), a)
+    b = niveau.ajouter_nœud(V2(200, 0), m)
+    d = niveau.ajouter_nœud(V2(100, 150), a)
+    lien = niveau.graphe.ajouter_lien()
+    lien["couleur"] = d["couleur"]
+    lien["palier"] = 0
+    lien.associer(d, b)
+    for n in (a, b):
+        n["amovible"] = False
+    niveau.flux.append(échangeur.Liaison(a, b, 60))
+    return niveau, m, d
+
+
+def équilibre(simulation):
+    """Chaque véhicule émis est arrivé, bloqué, retiré ou en route
+    """
+    en_route = numpy.bincount(simulation.liaison,
+                              minlength=len(simulation.niveau.flux))
+    for k, (_, émis, arrivés, bloqués, retirés) in enumerate(
+            simulation.bilan()):
+        assert émis == arrivés + bloqués + retirés + en_route[k]
+
+
+def test_émission_et_arrivée():
+    niveau, m, _ = détour()
+    simulation = trafic.Trafic(niveau)
+    # Un véhicule par seconde ; il faut au moins 200 / 60 s pour arriver
+    for _ in range(3):
+        simulation.avancer(1.0)
+    assert simulation.bilan()[0][2] == 0
+    for _ in range(7):
+        simulation.avancer(1.0)
+    (_, émis, arrivés, bloqués, retirés), = simulation.bilan()
+    assert émis == 10 and bloqués == 0 and retirés == 0
+    assert 0 < arrivés < émis
+    équilibre(simulation)
+    statistiques = simulation.statistiques()
+    premier, second = [statistiques[l] for l in m.liaisons]
+    assert second.passages == arrivés
+    assert premier.passages == arrivés + second.occupation
+    assert premier.débit == pytest.approx(premier.passages * 6)
+    # Les véhicules se gênent sur le chemin direct, seul emprunté
+    assert 0 < premier.congestion < 1
+    assert all(s.passages == 0 and s.congestion == 0
+               for l, s in statistiques.items() if l not in m.liaisons)
+
+
+def test_lien_coupé():
+    niveau, m, d = détour()
+    simulation = trafic.Trafic(niveau)
+    for _ in range(5):
+        simulation.avancer(1.0)
+    en_route = len(simulation)
+    assert en_route > 0
+    # Le chemin direct disparaît : les véhicules qui le suivaient sont
+    # retirés, les suivants prennent le détour
+    niveau.graphe.supprimer_lien(next(iter(m.liaisons)))
+    simulation.avancer(1.0)
+    (_, émis, arrivés, bloqués, retirés), = simulation.bilan()
+    assert retirés == en_route
+    assert len(simulation) == 1
+    équilibre(simulation)
+    for _ in range(10):
+        simulation.avancer(1.0)
+    statistiques = simulation.statistiques()
+    assert all(statistiques[l].passages > 0 for l in d.liaisons)
+    # Plus aucun chemin : les véhicules émis sont bloqués
+    niveau.graphe.supprimer_nœud(d)
+    simulation.avancer(3.0)
+    (_, _, _, bloqués, _), = simulation.bilan()
+    assert bloqués == 3 and len(simulation) == 0
+    équilibre(simulation)
+
+
+def test_itinéraire_inchangé():
+    niveau, m, d = détour()
+    simulation = trafic.Trafic(niveau)
+    for _ in range(5):
+        simulation.avancer(1.0)
+    en_route = len(simulation)
+    # Le détour s'allonge : le chemin direct reste le plus court
+    niveau.déplacer_nœud(d, V2(100, 200))
+    simulation.avancer(1.0)
+    (_, _, _, _, retirés), = simulation.bilan()
+    assert retirés == 0 and len(simulation) >= en_route
+
+
+@pytest.mark.parametrize("graine", range(4))
+def test_bilans_équilibrés(graine):
+    niveau = échangeur.Niveau(échangeur.Moteur.SCALAIRE)
+    nœuds = peupler(niveau, graine, 25, 40, 200, paliers=1)
+    aléa = random.Random(graine)
+    fixes = aléa.sample(nœuds, 4)
+    for n in fixes:
+        n["amovible"] = False
+    niveau.flux.append(échangeur.Liaison(fixes[0], fixes[1], 90))
+    niveau.flux.append(échangeur.Liaison(fixes[2], fixes[3], 150))
+    simulation = trafic.Trafic(niveau)
+    for _ in range(200):
+        if aléa.random() < 0.2:
+            retoucher(niveau, aléa)
+        simulation.avancer(0.5)
+        équilibre(simulation)
+        assert (simulation.abscisse >= 0).all()
+        assert (simulation.abscisse
+                <= simulation.longueurs[simulation.lien]).all()
+    émis = sum(b[1] for b in simulation.bilan())
+    assert émis == (90 + 150) * 200 * 0.5 // 60
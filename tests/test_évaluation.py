@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Évaluation de réseaux sur un niveau dont les services interactifs sont
+détachés
+"""
+
+# Dépendance(s) standard(s)
+import os
+import random
+
+# Dépendance(s) interne(s)
+import solveur
+import évaluation
+import échangeur
+
+# Dépendance(s) externe(s)
+import pytest
+
+NIVEAU = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))), "niveau-1.0.json")
+
+
+def niveau(détaché):
+    retour = échangeur.Niveau()
+    retour.charger(NIVEAU, à_la_demande=False)
+    if détaché:
+        retour.détacher_services()
+    return retour
+
+
+def empreinte(graphe):
+    return (sorted(n["position"].en_tuple() for n in graphe.iter_nœuds()),
+            sorted(sorted(n["position"].en_tuple() for n in l.liaisons)
+                   for l in graphe.iter_liens()))
+
+
+def réseaux(nombre):
+    """Réseaux aléatoires, parfois raccordés aux routes du niveau
+    """
+    routes = [list(n["position"].en_tuple())
+              for n in niveau(False).graphe.iter_nœuds()]
+    aléa = random.Random(5)
+    retour = list()
+    for _ in range(nombre):
+        nœuds = [[aléa.randrange(640), aléa.randrange(480)]
+                 for _ in range(aléa.randint(2, 12))]
+        nœuds += aléa.sample(routes, min(len(routes), 2))
+        liens = [sorted(aléa.sample(range(len(nœuds)), 2))
+                 + [aléa.randrange(échangeur.PALIERS)]
+                 for _ in range(aléa.randint(1, 15))]
+        retour.append({"nœuds": nœuds, "liens": liens})
+    return retour
+
+
+def test_mêmes_bilans():
+    détaché = niveau(True)
+    avant = empreinte(détaché.graphe)
+    for réseau in réseaux(40):
+        attendu = évaluation.évaluer(niveau(False), réseau)
+        assert évaluation.évaluer(détaché, réseau) == attendu
+        # Le niveau est rendu tel qu'il a été reçu
+        assert empreinte(détaché.graphe) == avant
+
+
+def test_réseau_mal_formé():
+    assert "erreur" in évaluation.évaluer(niveau(True),
+                                          {"nœuds": [[0, 0]],
+                                           "liens": [[0, 3, 0]]})
+
+
+def test_services_détachés():
+    détaché = niveau(True)
+    p = échangeur.V2(100, 100)
+    with pytest.raises(RuntimeError):
+        détaché.nœud_proche(p)
+    with pytest.raises(RuntimeError):
+        détaché.lien_proche(p)
+    with pytest.raises(RuntimeError):
+        détaché.itinéraires.chemins()
+    nœud = détaché.ajouter_nœud(p)
+    voisin = détaché.ajouter_nœud(échangeur.V2(150, 100), nœud)
+    with pytest.raises(RuntimeError):
+        détaché.valider_mouvement(nœud, échangeur.V2(110, 110))
+    with pytest.raises(RuntimeError):
+        détaché.palier_valide(next(iter(voisin.liaisons)), 1)
+    # Les tests globaux restent disponibles
+    assert détaché.carte_est_valide()
+    assert not détaché.est_complet()
+    assert (détaché.touche_un_obstacle(p, voisin["position"])
+            == niveau(False).touche_un_obstacle(p, voisin["position"]))
+
+
+NIVEAU_0 = os.path.join(os.path.dirname(NIVEAU), "niveau-0.0.json")
+
+DÉFAUTS = [
+    # Rang de nœud non entier
+    (NIVEAU, {"nœuds": [[0, 0], [5, 5]], "liens": [[0.0, 1, 0]]}),
+    (NIVEAU, {"nœuds": [[0, 0], [5, 5]], "liens": [[True, 0, 0]]}),
+    # Deux fois la même extrémité de route
+    (NIVEAU, {"nœuds": [[330, 10], [330, 10]], "liens": [[0, 1, 0]]}),
+    # Deux nœuds superposés, près d'un obstacle
+    (NIVEAU_0, {"nœuds": [[150, 100], [150, 100]], "liens": [[0, 1, 0]]}),
+]
+
+
+@pytest.mark.parametrize("nom, réseau", DÉFAUTS)
+@pytest.mark.parametrize("moteur", list(échangeur.Moteur))
+def test_réseau_dégénéré(nom, réseau, moteur):
+    niveau = échangeur.Niveau(moteur)
+    niveau.charger(nom, à_la_demande=False)
+    niveau.détacher_services()
+    avant = empreinte(niveau.graphe)
+    assert "erreur" in évaluation.évaluer(niveau, réseau)
+    assert empreinte(niveau.graphe) == avant
+
+
+def test_erreur_pendant_l_évaluation(monkeypatch):
+    détaché = niveau(True)
+    avant = empreinte(détaché.graphe)
+
+    def défaillance():
+        raise ZeroDivisionError("division par zéro")
+    monkeypatch.setattr(détaché, "est_complet", défaillance)
+    bilan = évaluation.évaluer(détaché, réseaux(1)[0])
+    assert "ZeroDivisionError" in bilan["erreur"]
+    assert empreinte(détaché.graphe) == avant
+
+
+def test_lot_poursuivi():
+    lot = [réseau for _, réseau in DÉFAUTS[:3]] + réseaux(2)
+    bilans = évaluation.évaluer_lot(NIVEAU, lot, processus=1)
+    assert ["erreur" in b for b in bilans] == [True] * 3 + [False] * 2
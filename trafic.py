@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""Simulation du trafic sur le réseau construit par le joueur
+
+Chaque liaison du niveau émet des véhicules à son nœud de départ («nid»), au
+rythme de son débit (en véhicules par minute), à destination de son nœud
+d'arrivée («but»). Les véhicules empruntent le plus court chemin du réseau
+fourni par «Niveau.itinéraires», les paliers n'étant que des ponts : seuls
+les nœuds permettent de passer d'un lien à l'autre.
+
+L'état des véhicules (lien courant, abscisse le long du lien, vitesse,
+itinéraire suivi et avancement dans celui-ci) est rangé dans des tableaux
+NumPy, mis à jour en bloc à chaque pas de temps. La vitesse sur un lien
+décroît linéairement avec la densité de véhicules qui l'occupent.
+"""
+
+# Dépendance(s) standard(s)
+import dataclasses
+import math
+
+# Dépendance(s) interne(s)
+import graphe
+
+# Dépendance(s) externe(s)
+import numpy
+
+
+# Vitesse d'un véhicule sur un lien dégagé, en pixels par seconde
+VITESSE = 60.0
+# Densité, en véhicules par pixel, à laquelle un lien est saturé
+DENSITÉ_MAX = 1 / 8
+# Fraction de la vitesse conservée sur un lien saturé
+FACTEUR_MIN = 0.05
+
+
+@dataclasses.dataclass
+class Statistiques:
+    """Bilan de la simulation pour un lien
+    """
+
+    # Véhicules ayant parcouru le lien de bout en bout
+    passages: int
+    # Passages par minute simulée
+    débit: float
+    # Véhicules présents sur le lien
+    occupation: int
+    # Perte de vitesse moyenne subie sur le lien, de 0 (fluide) à 1 (arrêt)
+    congestion: float
+
+
+class Trafic(graphe.Observateur):
+    """Simulation du trafic des liaisons d'un niveau.
+
+    Toute modification du graphe entraîne le recalcul des itinéraires avant
+    le pas de temps suivant ; les véhicules dont l'itinéraire est inchangé
+    poursuivent leur route, les autres sont retirés.
+    """
+
+    def __init__(self, niveau):
+        self.niveau = niveau
+        self.durée = 0.0
+
+        # Liens parcourables, et leur numéro dans les tableaux par lien
+        self.liens = list()
+        self.numéros = dict()
+        self.longueurs = numpy.zeros(0)
+        self.passages = numpy.zeros(0, dtype=numpy.int64)
+        # Somme, sur les pas de temps, des vitesses et du nombre des
+        # véhicules présents sur chaque lien
+        self.vitesses_cumulées = numpy.zeros(0)
+        self.présences_cumulées = numpy.zeros(0, dtype=numpy.int64)
+
+        self.réinitialiser()
+        niveau.graphe.abonner(self)
+
+    def réinitialiser(self):
+        """Retire tous les véhicules et remet à zéro les bilans des liaisons
+        """
+        nb_liaisons = len(self.niveau.flux)
+        # Itinéraires, par liaison : suites de liens mises bout à bout dans
+        # «étapes», la n-ième commençant à «débuts[n]»
+        self.itinéraires = [None] * nb_liaisons
+        self.étapes = numpy.zeros(0, dtype=numpy.int64)
+        self.débuts = numpy.zeros(nb_liaisons, dtype=numpy.int64)
+        self.nb_étapes = numpy.zeros(nb_liaisons, dtype=numpy.int64)
+
+        # Bilan par liaison
+        self.reliquats = numpy.zeros(nb_liaisons)
+        self.émis = numpy.zeros(nb_liaisons, dtype=numpy.int64)
+        self.arrivés = numpy.zeros(nb_liaisons, dtype=numpy.int64)
+        self.bloqués = numpy.zeros(nb_liaisons, dtype=numpy.int64)
+        self.retirés = numpy.zeros(nb_liaisons, dtype=numpy.int64)
+
+        # Véhicules
+        self.lien = numpy.zeros(0, dtype=numpy.int64)
+        self.abscisse = numpy.zeros(0)
+        self.vitesse = numpy.zeros(0)
+        self.liaison = numpy.zeros(0, dtype=numpy.int64)
+        self.étape = numpy.zeros(0, dtype=numpy.int64)
+        self.à_préparer = True
+
+    def __len__(self):
+        return len(self.lien)
+
+    # Suivi des modifications du graphe
+
+    def lien_supprimé(self, lien):
+        self.à_préparer = True
+
+    def associés(self, item, autre):
+        self.à_préparer = True
+
+    def détachés(self, item, autre):
+        self.à_préparer = True
+
+    def attribut_modifié(self, item, clef, ancienne):
+        if clef == "position":
+            self.à_préparer = True
+
+    # Préparation
+
+    def longueur(self, lien):
+        return math.sqrt(self.niveau.géométrie[lien].norme2)
+
+    def reporter(self, tableau, anciens):
+        """Tableau par lien, réindexé selon les liens actuels
+        """
+        retour = numpy.zeros(len(self.liens), dtype=tableau.dtype)
+        for k, l in enumerate(anciens):
+            n = self.numéros.get(l)
+            if n is not None:
+                retour[n] = tableau[k]
+        return retour
+
+    def préparer(self):
+        """Recalcule la table des liens et les itinéraires
+        """
+        if len(self.débuts) != len(self.niveau.flux):
+            # Liaisons du niveau changées depuis la création
+            self.réinitialiser()
+        anciens = self.liens
+        self.liens = [l for l in self.niveau.graphe.iter_liens()
+                      if len(l.liaisons) == 2
+                      and all("position" in n for n in l.liaisons)]
+        self.numéros = {l: k for k, l in enumerate(self.liens)}
+        self.longueurs = numpy.array([self.longueur(l) for l in self.liens],
+                                     dtype=float)
+        self.passages = self.reporter(self.passages, anciens)
+        self.vitesses_cumulées = self.reporter(self.vitesses_cumulées,
+                                               anciens)
+        self.présences_cumulées = self.reporter(self.présences_cumulées,
+                                                anciens)
+
+        précédents = self.itinéraires
+        self.itinéraires = self.niveau.itinéraires.chemins()
+        étapes = list()
+        for k, itinéraire in enumerate(self.itinéraires):
+            self.débuts[k] = len(étapes)
+            self.nb_étapes[k] = 0 if itinéraire is None else len(itinéraire)
+            if itinéraire is not None:
+                étapes.extend(self.numéros[l] for l in itinéraire)
+        self.étapes = numpy.array(étapes, dtype=numpy.int64)
+
+        # Seuls les véhicules dont l'itinéraire est inchangé sont conservés
+        inchangés = numpy.array([a is not None and a == b for a, b
+                                 in zip(précédents, self.itinéraires)],
+                                dtype=bool)
+        if len(self.lien) > 0:
+            masque = inchangés[self.liaison]
+            self.retirés += numpy.bincount(self.liaison[~masque],
+                                           minlength=len(self.retirés))
+            self.garder(masque)
+            self.lien = self.étapes[self.débuts[self.liaison] + self.étape]
+            self.abscisse = numpy.minimum(self.abscisse,
+                                          self.longueurs[self.lien])
+        self.à_préparer = False
+
+    def garder(self, masque):
+        self.lien = self.lien[masque]
+        self.abscisse = self.abscisse[masque]
+        self.vitesse = self.vitesse[masque]
+        self.liaison = self.liaison[masque]
+        self.étape = self.étape[masque]
+
+    # Simulation
+
+    def émettre(self, dt):
+        """Crée les véhicules émis par les liaisons pendant 'dt' secondes
+        """
+        débits = numpy.array([f.débit for f in self.niveau.flux], dtype=float)
+        self.reliquats += débits * dt / 60
+        nombres = numpy.floor(self.reliquats).astype(numpy.int64)
+        self.reliquats -= nombres
+        self.émis += nombres
+        desservies = self.nb_étapes > 0
+        self.bloqués += numpy.where(desservies, 0, nombres)
+        nombres = numpy.where(desservies, nombres, 0)
+
+        total = int(nombres.sum())
+        if total > 0:
+            liaisons = numpy.repeat(numpy.arange(len(nombres)), nombres)
+            self.lien = numpy.concatenate(
+                [self.lien, self.étapes[self.débuts[liaisons]]])
+            self.abscisse = numpy.concatenate([self.abscisse,
+                                               numpy.zeros(total)])
+            self.vitesse = numpy.concatenate([self.vitesse,
+                                              numpy.zeros(total)])
+            self.liaison = numpy.concatenate([self.liaison, liaisons])
+            self.étape = numpy.concatenate(
+                [self.étape, numpy.zeros(total, dtype=numpy.int64)])
+
+    def avancer(self, dt):
+        """Fait progresser la simulation de 'dt' secondes
+        """
+        if self.à_préparer:
+            self.préparer()
+        self.émettre(dt)
+        self.durée += dt
+
+        if len(self.lien) > 0:
+            nb_liens = len(self.liens)
+            présences = numpy.bincount(self.lien, minlength=nb_liens)
+            densités = présences / numpy.maximum(self.longueurs, 1)
+            facteurs = numpy.clip(1 - densités / DENSITÉ_MAX, FACTEUR_MIN, 1)
+            self.vitesse = VITESSE * facteurs[self.lien]
+            self.vitesses_cumulées += numpy.bincount(
+                self.lien, weights=self.vitesse, minlength=nb_liens)
+            self.présences_cumulées += présences
+            self.abscisse += self.vitesse * dt
+
+            # Passage au lien suivant, éventuellement plusieurs fois pour les
+            # liens plus courts que la distance parcourue
+            while True:
+                fins = self.abscisse >= self.longueurs[self.lien]
+                if not fins.any():
+                    break
+                self.passages += numpy.bincount(self.lien[fins],
+                                                minlength=nb_liens)
+                self.abscisse[fins] -= self.longueurs[self.lien[fins]]
+                self.étape[fins] += 1
+                arrivés = fins & (self.étape >= self.nb_étapes[self.liaison])
+                self.arrivés += numpy.bincount(self.liaison[arrivés],
+                                               minlength=len(self.arrivés))
+                self.garder(~arrivés)
+                fins = fins[~arrivés]
+                self.lien[fins] = self.étapes[self.débuts[self.liaison[fins]]
+                                              + self.étape[fins]]
+
+    # Bilans
+
+    def statistiques(self):
+        """Statistiques de chaque lien parcourable, par lien
+        """
+        if self.à_préparer:
+            self.préparer()
+        présences = numpy.bincount(self.lien, minlength=len(self.liens))
+        minutes = self.durée / 60
+        retour = dict()
+        for k, l in enumerate(self.liens):
+            congestion = 0.0
+            if self.présences_cumulées[k] > 0:
+                congestion = 1 - (self.vitesses_cumulées[k]
+                                  / self.présences_cumulées[k] / VITESSE)
+            retour[l] = Statistiques(
+                passages=int(self.passages[k]),
+                débit=float(self.passages[k] / minutes) if minutes else 0.0,
+                occupation=int(présences[k]),
+                congestion=float(congestion))
+        return retour
+
+    def bilan(self):
+        """Véhicules émis, arrivés, bloqués faute d'itinéraire et retirés
+        suite à un changement d'itinéraire, par liaison
+        """
+        return [(f, int(e), int(a), int(b), int(r)) for f, e, a, b, r
+                in zip(self.niveau.flux, self.émis, self.arrivés,
+                       self.bloqués, self.retirés)]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Tests d'intersection de segments par lots, à l'aide de NumPy
+
+Les segments sont rangés dans des tableaux contigus (origines et directions),
+et un segment est confronté à N segments, ou N segments à M segments, en un
+seul appel. Les calculs reproduisent exactement ceux de la version scalaire
+(«échangeur.intersection»), y compris le cas des segments colinéaires.
+
+NumPy est une dépendance facultative : en son absence, «disponible» est faux
+et les validateurs se rabattent sur leur version scalaire.
+"""
+
+# Dépendance(s) standard(s)
+
+# Dépendance(s) interne(s)
+import balayage
+
+# Dépendance(s) externe(s)
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+disponible = numpy is not None
+
+# Nombre de lignes traitées à la fois lors des confrontations N×M
+LOT = 256
+
+
+class Segments:
+    """Géométrie d'une liste de liens binaires, sous forme de tableaux
+    """
+
+    def __init__(self, liens):
+        self.liens = list(liens)
+        taille = len(self.liens)
+        self.origines = numpy.empty((taille, 2))
+        self.directions = numpy.empty((taille, 2))
+        self.extrémités = numpy.empty((taille, 2), dtype=numpy.int64)
+        for k, l in enumerate(self.liens):
+            n0, n1 = l.liaisons
+            p0 = n0["position"]
+            p1 = n1["position"]
+            self.origines[k] = (p0.largeur, p0.hauteur)
+            self.directions[k] = (p1.largeur - p0.largeur,
+                                  p1.hauteur - p0.hauteur)
+            self.extrémités[k] = (n0.ident, n1.ident)
+
+    def __len__(self):
+        return len(self.liens)
+
+    @staticmethod
+    def de_géométrie(liens, géométrie):
+        """Segments des liens, lus dans le cache de leur géométrie
+        («géométrie.GéométrieLiens») plutôt que sur leurs nœuds. Les
+        identifiants des extrémités ne sont pas renseignés.
+        """
+        retour = Segments(())
+        retour.liens = list(liens)
+        segments = numpy.array([(g.x, g.y, g.dx, g.dy) for g in map(
+            géométrie.__getitem__, retour.liens)], dtype=float)
+        segments = segments.reshape(-1, 4)
+        retour.origines = segments[:, :2]
+        retour.directions = segments[:, 2:]
+        return retour
+
+
+def intersections(nid, v, origines, directions, colinéaires=True):
+    """Pour chacun des N segments (origines, directions), vrai ssi il coupe
+    le segment d'origine 'nid' et de direction 'v'
+
+    Si 'colinéaires' est faux, les segments parallèles ne sont jamais
+    considérés comme sécants (critère de «carte_est_valide»).
+    """
+    return intersections_croisées(numpy.asarray(nid, dtype=float)[None, :],
+                                  numpy.asarray(v, dtype=float)[None, :],
+                                  origines, directions, colinéaires)[0]
+
+
+def intersections_croisées(nids, vs, origines, directions, colinéaires=True):
+    """Matrice N×M des intersections entre N segments (nids, vs) et M
+    segments (origines, directions)
+    """
+    v1x = vs[:, 0, None]
+    v1y = vs[:, 1, None]
+    v2x = directions[None, :, 0]
+    v2y = directions[None, :, 1]
+    ex = origines[None, :, 0] - nids[:, 0, None]
+    ey = origines[None, :, 1] - nids[:, 1, None]
+    # Équation à vérifier (en deux dimensions) :
+    # v1 * t1 - v2 * t2 = nid2 - nid1
+    # avec t1 ∈ [0, 1] et t2 ∈ [0, 1]
+    dét = v1y * v2x - v1x * v2y
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        t1 = (v2x * ey - v2y * ex) / dét
+        t2 = (v1x * ey - v1y * ex) / dét
+        retour = (dét != 0) & (0 <= t1) & (t1 <= 1) & (0 <= t2) & (t2 <= 1)
+        if colinéaires:
+            # Soit les points sont colinéaires, soit les segments sont
+            # parallèles
+            cos = numpy.abs(v1x * ex + v1y * ey) / numpy.sqrt(
+                (v1x * v1x + v1y * v1y) * (ex * ex + ey * ey))
+            retour |= (dét == 0) & (cos - 1 >= -1e-7)
+    return retour
+
+
+def sans_nœud_commun(extrémités, autres):
+    """Matrice N×M, vraie ssi les deux liens n'ont aucun nœud en commun
+    """
+    a0 = extrémités[:, 0, None]
+    a1 = extrémités[:, 1, None]
+    b0 = autres[None, :, 0]
+    b1 = autres[None, :, 1]
+    return (a0 != b0) & (a0 != b1) & (a1 != b0) & (a1 != b1)
+
+
+def croisements(segments):
+    """Énumère les paires de liens sécants, sans nœud commun, parmi les
+    segments donnés, tous supposés de même palier
+    """
+    for début in range(0, len(segments), LOT):
+        fin = min(début + LOT, len(segments))
+        sécants = intersections_croisées(segments.origines[début:fin],
+                                         segments.directions[début:fin],
+                                         segments.origines,
+                                         segments.directions,
+                                         colinéaires=False)
+        sécants &= sans_nœud_commun(segments.extrémités[début:fin],
+                                    segments.extrémités)
+        # Chaque paire n'est considérée qu'une fois
+        sécants &= (numpy.arange(début, fin)[:, None]
+                    < numpy.arange(len(segments))[None, :])
+        for i, j in zip(*numpy.nonzero(sécants)):
+            yield segments.liens[début + i], segments.liens[j]
+
+
+def carte_est_valide(graphe):
+    """Un graphe est valide si aucun lien ne croise un autre lien de même
+    'palier'
+    """
+    retour = True
+    for liens in balayage.par_palier(graphe).values():
+        for _ in croisements(Segments(liens)):
+            retour = False
+            break
+        if not retour:
+            break
+    return retour
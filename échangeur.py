@@ -1,29 +1,50 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Tentative de copie du jeu «Freeways»
+
+Ce module ne contient que les règles du jeu et les opérations sur un niveau,
+sans dépendre de pygame : l'interface graphique (module «interface») n'est
+chargée que pour jouer.
 """
 
 # Dépendance(s) standard(s)
+import argparse
 import dataclasses
 import enum
+import itertools
 import logging
 import math
 import random
 
 # Dépendance(s) interne(s)
+import connexité
+import contraintes
+import balayage
 import format_1
+import format_binaire
+import géométrie
 import graphe
+import index_spatial
+import itinéraires
 
 # Dépendance(s) externe(s)
-import pygame
 
 
 class V2:
-    """Vecteur à deux dimensions
+    """Vecteur à deux dimensions, immuable
     """
+
+    __slots__ = ("largeur", "hauteur")
+
     def __init__(self, largeur, hauteur):
-        self.largeur = largeur
-        self.hauteur = hauteur
+        object.__setattr__(self, "largeur", largeur)
+        object.__setattr__(self, "hauteur", hauteur)
+
+    def __setattr__(self, clef, valeur):
+        raise AttributeError(f"{self.__class__.__name__} est immuable")
+
+    def __delattr__(self, clef):
+        raise AttributeError(f"{self.__class__.__name__} est immuable")
 
     def __repr__(self):
         return f"{self.__class__.__name__}(0x{id(self):x}(largeur={self.largeur}, hauteur={self.hauteur})"
@@ -31,6 +52,13 @@ class V2:
     def __str__(self):
         return f"({self.largeur}, {self.hauteur})"
 
+    def __eq__(self, autre):
+        return (isinstance(autre, V2) and self.largeur == autre.largeur
+                and self.hauteur == autre.hauteur)
+
+    def __hash__(self):
+        return hash((self.largeur, self.hauteur))
+
     def __neg__(self):
         return V2(-self.largeur, -self.hauteur)
 
@@ -67,6 +95,14 @@ class Biome(enum.IntEnum):
     FLEUVE = enum.auto()
 
 
+class Moteur(enum.IntEnum):
+    """Implémentation des tests géométriques des validateurs
+    """
+
+    SCALAIRE = enum.auto()
+    NUMPY = enum.auto()
+
+
 @dataclasses.dataclass
 class Obstacle:
 
@@ -75,15 +111,34 @@ class Obstacle:
     biome: Biome
 
     def intersection(self, nid, but):
+        """Vrai ssi le segment [nid, but] touche un bord de l'obstacle.
+
+        Un segment ni horizontal ni vertical est confronté en une fois au
+        rectangle. Les autres, comme les obstacles d'aire nulle, ont un bord
+        parallèle : ils suivent le test bord par bord, où un segment porté
+        par la même droite qu'un bord le coupe, quelle que soit la distance
+        qui les sépare (voir «intersection_coordonnées»).
+        """
         retour = False
-        v = but - nid
-        vl = V2(self.coin_max.largeur - self.coin_min.largeur, 0)
-        vh = V2(0, self.coin_max.hauteur - self.coin_min.hauteur)
-
-        if (intersection(nid, v, self.coin_min, vl)
-                or intersection(nid, v, self.coin_min, vh)
-                or intersection(nid, v, self.coin_max, -vl)
-                or intersection(nid, v, self.coin_max, -vh)):
+        x = nid.largeur
+        y = nid.hauteur
+        vx = but.largeur - x
+        vy = but.hauteur - y
+        vl = self.coin_max.largeur - self.coin_min.largeur
+        vh = self.coin_max.hauteur - self.coin_min.hauteur
+        xmin = self.coin_min.largeur
+        ymin = self.coin_min.hauteur
+        xmax = self.coin_max.largeur
+        ymax = self.coin_max.hauteur
+
+        if vx != 0 and vy != 0 and vl != 0 and vh != 0:
+            retour = index_spatial.coupe_contour(x, y, vx, vy,
+                                                 xmin, ymin, xmax, ymax)
+        elif (intersection_coordonnées(x, y, vx, vy, xmin, ymin, vl, 0)
+                or intersection_coordonnées(x, y, vx, vy, xmin, ymin, 0, vh)
+                or intersection_coordonnées(x, y, vx, vy, xmax, ymax, -vl, 0)
+                or intersection_coordonnées(x, y, vx, vy, xmax, ymax, 0,
+                                            -vh)):
             retour = True
 
         return retour
@@ -100,14 +155,15 @@ class Liaison:
 PALIERS = 3
 
 
-def couleur_aléatoire(palier):
-    """Couleur d'intensité aléatoire, selon le palier choisi
+def couleur_aléatoire(palier, aléa=random):
+    """Couleur d'intensité aléatoire, selon le palier choisi, tirée du
+    générateur 'aléa' (par défaut, celui du module «random»)
     """
     composante_min = round(255 * palier / PALIERS)
     composante_max = round(255 * (palier + 1) / PALIERS)
     composantes = list()
     for k in range(3):
-        composantes.append(random.randint(composante_min, composante_max))
+        composantes.append(aléa.randint(composante_min, composante_max))
     return tuple(composantes)
 
 
@@ -166,15 +222,20 @@ def lien_proche(graphe, position):
 def carte_est_valide(graphe):
     """Un graphe est valide si aucun lien ne croise un autre lien de même
     'palier'
+
+    Implémentation de référence, par comparaison de toutes les paires de
+    liens. Voir «balayage.carte_est_valide» pour la version rapide.
     """
     retour = True
-    for i, lien in enumerate(graphe.iter_liens()):
+    # Une seule copie de la liste des liens, parcourue ensuite sans copie
+    liens = graphe.liens
+    for i, lien in enumerate(liens):
         # On considère que tous les liens sont des liens binaires,
         # c'est-à-dire que chaque lien implique 2 nœuds différents, ni
         # plus, ni moins
         nid1 = lien.liaisons[0]["position"]
         v1 = lien.liaisons[1]["position"] - lien.liaisons[0]["position"]
-        for autre in graphe.liens[i + 1:]:
+        for autre in itertools.islice(liens, i + 1, None):
             # On ne regarde que les liens qui n'ont pas de nœud en commun
             if (lien["palier"] == autre["palier"]
                     and len(nœuds_communs(lien, autre)) == 0):
@@ -191,7 +252,7 @@ def carte_est_valide(graphe):
                           v2.hauteur * écart.largeur) / dét
                     t2 = (v1.largeur * écart.hauteur -
                           v1.hauteur * écart.largeur) / dét
-                    logging.debug(f"{t1} et {t2}")
+                    logging.debug("%s et %s", t1, t2)
                     if 0 <= t1 <= 1 and 0 <= t2 <= 1:
                         retour = False
                         break
@@ -204,23 +265,35 @@ def carte_est_valide(graphe):
 def intersection(nid1, v1, nid2, v2):
     """Y a-t-il une intersection entre les deux segments ?
     """
+    return intersection_coordonnées(nid1.largeur, nid1.hauteur,
+                                    v1.largeur, v1.hauteur,
+                                    nid2.largeur, nid2.hauteur,
+                                    v2.largeur, v2.hauteur)
+
+
+def intersection_coordonnées(x1, y1, v1x, v1y, x2, y2, v2x, v2y):
+    """Variante de «intersection» opérant directement sur les coordonnées,
+    sans construire de vecteur intermédiaire
+    """
     retour = False
-    écart = nid2 - nid1
+    ex = x2 - x1
+    ey = y2 - y1
     # Équation à vérifier (en deux dimensions) :
     # v1 * t1 - v2 * t2 = nid2 - nid1
     # avec t1 ∈ [0, 1] et t2 ∈ [0, 1]
-    dét = v1.hauteur * v2.largeur - v1.largeur * v2.hauteur
+    dét = v1y * v2x - v1x * v2y
     if dét != 0:
-        t1 = (v2.largeur * écart.hauteur - v2.hauteur * écart.largeur) / dét
-        t2 = (v1.largeur * écart.hauteur - v1.hauteur * écart.largeur) / dét
-        logging.debug(f"{t1} et {t2}")
+        t1 = (v2x * ey - v2y * ex) / dét
+        t2 = (v1x * ey - v1y * ex) / dét
+        logging.debug("%s et %s", t1, t2)
         if 0 <= t1 <= 1 and 0 <= t2 <= 1:
             retour = True
     else:
         # Soit les points sont colinéaires, soit les segments sont parallèles
         # Équation à vérifier :
         # v1 * t = nid2 - nid1
-        cos = abs(v1.scalaire(écart)) / math.sqrt(v1.norme2() * écart.norme2())
+        cos = abs(v1x * ex + v1y * ey) / math.sqrt(
+            (v1x * v1x + v1y * v1y) * (ex * ex + ey * ey))
         if cos - 1 >= -1e-7:
             logging.debug("Aïe !")
             retour = True
@@ -228,69 +301,170 @@ def intersection(nid1, v1, nid2, v2):
     return retour
 
 
+def instrumenter(mesures, niveau, affichage=None):
+    """Place les points de mesure sur les tests du niveau, la recherche des
+    éléments sous le pointeur et l'affichage
+    """
+    for nom in ("valider_mouvement", "carte_est_valide", "est_complet",
+                "palier_valide", "nœud_proche", "lien_proche"):
+        mesures.instrumenter(niveau, nom)
+    mesures.instrumenter(niveau.graphe, "fusionner_nœuds")
+    if affichage is not None:
+        mesures.instrumenter(affichage, "dessiner", "rendu")
+
+
+class ServiceDétaché:
+    """Tient la place d'un service du niveau qui ne suit plus son graphe
+    (voir «Niveau.détacher_services») : tout usage en est une erreur
+    """
+
+    def __init__(self, nom):
+        self.nom = nom
+
+    def __getattr__(self, attribut):
+        raise RuntimeError(f"Service «{self.nom}» détaché du niveau")
+
+
 class Niveau:
-    def __init__(self):
+    def __init__(self, moteur=None):
         self.graphe = graphe.Graphe()
+        self.géométrie = géométrie.GéométrieLiens(self.graphe)
+        self.index = index_spatial.IndexSpatial(self.graphe, self.géométrie)
         self.obstacles = list()
+        self.index_obstacles = index_spatial.IndexObstacles(self.obstacles)
+        self.contraintes = contraintes.MoteurContraintes(
+            self.graphe, self.obstacles, intersection_coordonnées,
+            self.géométrie, self.index_obstacles)
+        self.connexité = connexité.Connexité(self.graphe)
+        self.itinéraires = itinéraires.Itinéraires(self)
+        if moteur is None:
+            moteur = (Moteur.NUMPY if contraintes.numpy_disponible()
+                      else Moteur.SCALAIRE)
+        self.choisir_moteur(moteur)
         self.flux = list()
-
-    def charger(self, nom_fichier):
-        val = format_1.Validateur(".")
-        données = format_1.charger(nom_fichier, "échangeur", val)
-        points = dict()
-        for r in données["routes"]:
+        # Dernière réponse de «est_complet», et version de la topologie à
+        # laquelle elle se rapporte
+        self.complétude = (None, False)
+        # Monde découpé en régions : niveau compilé, laissé ouvert, grille
+        # des régions (par rang) selon l'étendue de leurs obstacles, et
+        # obstacles des régions chargées
+        self.données = None
+        self.régions = None
+        self.chargées = dict()
+
+    def choisir_moteur(self, moteur):
+        """Sélection de l'implémentation des tests géométriques, avec repli
+        sur la version scalaire si NumPy est indisponible
+        """
+        if moteur == Moteur.NUMPY and not contraintes.numpy_disponible():
+            logging.warning("NumPy indisponible : moteur scalaire retenu")
+            moteur = Moteur.SCALAIRE
+        self.moteur = moteur
+        self.contraintes.vectoriel = (moteur == Moteur.NUMPY)
+
+    def charger(self, nom_fichier, à_la_demande=True):
+        """Charge le niveau décrit par le fichier. Les obstacles d'un monde
+        découpé en régions ne sont lus qu'à la demande (voir
+        «charger_zone»), à moins que 'à_la_demande' soit faux.
+        """
+        val = format_1.validateur(".")
+        données = format_binaire.charger(nom_fichier, "échangeur", val)
+        self.construire(données, à_la_demande)
+        if self.données is not données:
+            données.fermer()
+
+    def construire(self, données, à_la_demande=False):
+        """Peuple le niveau à partir d'un niveau compilé, qui reste ouvert
+        si les obstacles de ses régions sont chargés à la demande
+        """
+        # Nœuds d'entrée et de sortie, par numéro de route
+        entrées = list()
+        sorties = list()
+        for nom, e, s in données.routes():
             couleur = couleur_aléatoire(0)
-            if "entrée" in r:
+            entrée = sortie = None
+            if e is not None:
                 entrée = self.graphe.ajouter_nœud()
                 entrée["amovible"] = False
                 entrée["biome"] = Biome.ENTRÉE
                 entrée["couleur"] = couleur
-                entrée["position"] = V2(r["entrée"]["largeur"],
-                                        r["entrée"]["hauteur"])
+                entrée["position"] = V2(*e)
                 entrée["palier"] = 0
-                points[f"but/{r['nom']}"] = entrée
 
-            if "sortie" in r:
+            if s is not None:
                 sortie = self.graphe.ajouter_nœud()
                 sortie["amovible"] = False
                 sortie["biome"] = Biome.SORTIE
                 sortie["couleur"] = couleur
-                sortie["position"] = V2(r["sortie"]["largeur"],
-                                        r["sortie"]["hauteur"])
+                sortie["position"] = V2(*s)
                 sortie["palier"] = 0
-                points[f"nid/{r['nom']}"] = sortie
-
-        # Obstacles
-        if "obstacles" in données:
-            for o in données["obstacles"]:
-                coin_min = V2(o["position"]["inf"]["largeur"],
-                              o["position"]["inf"]["hauteur"])
-                coin_max = V2(o["position"]["sup"]["largeur"],
-                              o["position"]["sup"]["hauteur"])
-                biome = Biome[o["rôle"]]
-                obstacle = Obstacle(coin_min, coin_max, biome)
+            entrées.append(entrée)
+            sorties.append(sortie)
+
+        # Obstacles. Dans un monde, un lien n'est confronté qu'aux obstacles
+        # et aux liens qu'il touche : seules les régions qu'il recoupe sont
+        # nécessaires.
+        self.contraintes.colinéaires_lointains = not données.découpé
+        if à_la_demande and données.découpé:
+            self.données = données
+            self.régions = index_spatial.Grille(données.côté)
+            for k, (*_, xmin, ymin, xmax, ymax) in enumerate(
+                    données.régions()):
+                self.régions.insérer(k, self.régions.cases_rectangle(
+                    xmin, ymin, xmax, ymax))
+        else:
+            for rôle, xmin, ymin, xmax, ymax in données.obstacles():
+                obstacle = Obstacle(V2(xmin, ymin), V2(xmax, ymax),
+                                    Biome[rôle])
                 self.obstacles.append(obstacle)
+        self.index_obstacles.indexer()
 
         # Objectifs de connexion
-        for l in données["liaisons"]:
-            clef = f"nid/{l['nid']}"
-            nid = points[clef]
-            clef = f"but/{l['but']}"
-            but = points[clef]
-            self.flux.append(Liaison(nid, but, l["flux"]))
+        for nid, but, débit in données.liaisons():
+            self.flux.append(Liaison(sorties[nid], entrées[but], débit))
+        self.complétude = (None, False)
+
+    def détacher_services(self):
+        """Cesse de tenir à jour les services qui ne servent qu'au jeu
+        interactif : index de désignation, arbitre des mouvements et des
+        changements de palier, itinéraires. Un processus qui ne fait
+        qu'ajouter puis évaluer des réseaux s'en dispense.
+
+        Les tests globaux (validité de la carte, complétude, obstacles)
+        restent disponibles ; les requêtes qui dépendent des services
+        détachés lèvent une RuntimeError.
+        """
+        for service in (self.index, self.itinéraires):
+            self.graphe.désabonner(service)
+        self.contraintes.détacher()
+        self.index = ServiceDétaché("index")
+        self.itinéraires = ServiceDétaché("itinéraires")
+
+    def nœud_proche(self, position, *exclus, rayon=math.inf):
+        """Nœud le plus proche de la position, hors nœuds exclus, et sa
+        distance. Au-delà de 'rayon', aucun nœud n'est retenu.
+        """
+        return self.index.nœud_proche(position, *exclus, rayon=rayon)
+
+    def plus_proches_nœuds(self, position, k, *exclus, rayon=math.inf):
+        """Liste des 'k' nœuds les plus proches de la position, avec leur
+        distance
+        """
+        return self.index.plus_proches_nœuds(position, k, *exclus,
+                                             rayon=rayon)
+
+    def lien_proche(self, position, rayon=math.inf):
+        """Lien le plus proche de la position, et sa distance
+        """
+        return self.index.lien_proche(position, rayon=rayon)
 
     def est_dans_un_obstacle(self, position):
         """Vrai ssi la position est occupée par un des obstacles du niveau
         """
         logging.debug(position)
-        retour = False
-        for o in self.obstacles:
-            if (o.coin_min.largeur <= position.largeur <= o.coin_max.largeur
-                    and o.coin_min.hauteur <= position.hauteur <=
-                    o.coin_max.hauteur):
-                retour = True
-                break
-        return retour
+        self.charger_autour(position)
+        return self.index_obstacles.contenant(position.largeur,
+                                              position.hauteur) is not None
 
     def valider_mouvement(self, sommet, position):
         """Le mouvement du sommet à la position donnée est autorisé si:
@@ -305,261 +479,192 @@ class Niveau:
         if self.est_dans_un_obstacle(position):
             retour = False
         else:
-            ancienne = sommet["position"]
-            sommet["position"] = position
-            for lien in sommet.liaisons:
-                nid1 = lien.liaisons[0]["position"]
-                v1 = lien.liaisons[1]["position"] - lien.liaisons[0]["position"]
-                # ÀDU : On vérifie la collision avec un obstacle
-                for o in self.obstacles:
-                    if o.intersection(lien.liaisons[0]["position"],
-                                      lien.liaisons[1]["position"]):
-                        logging.debug(f"Intersection avec {o} !")
-                        retour = False
-                        break
-                if not retour:
-                    break
-
-                # On vérifie l'intersection avec un autre lien de même palier
-                for autre in self.graphe.liens:
-                    # On ne regarde que les liens qui n'ont pas de nœud commun
-                    if (lien["palier"] == autre["palier"]
-                            and len(nœuds_communs(lien, autre)) == 0):
-                        nid2 = autre.liaisons[0]["position"]
-                        v2 = autre.liaisons[1]["position"] - \
-                            autre.liaisons[0]["position"]
-                        if intersection(nid1, v1, nid2, v2):
-                            retour = False
-                            break
-                if not retour:
-                    break
-            sommet["position"] = ancienne
+            self.charger_autour(position, *[n["position"]
+                                            for l in sommet.liaisons
+                                            for n in l.liaisons
+                                            if n is not sommet])
+            retour = self.contraintes.mouvement_valide(sommet, position)
 
         return retour
 
+    def touche_un_obstacle(self, p0, p1):
+        """Vrai ssi le segment [p0, p1] touche un des obstacles du niveau
+        """
+        self.charger_autour(p0, p1)
+        return any(o.intersection(p0, p1)
+                   for o in self.contraintes.obstacles_voisins(p0, p1))
+
+    def palier_valide(self, lien, palier):
+        """Le passage du lien au palier donné est autorisé si aucun tronçon
+        de ce palier ne l'intersecte
+        """
+        return self.contraintes.palier_valide(lien, palier)
+
+    def carte_est_valide(self):
+        """Vrai ssi aucun lien ne croise un autre lien de même palier
+
+        Quel que soit le moteur, la carte entière est vérifiée par balayage :
+        la confrontation de toutes les paires, même par lots, coûte O(E²).
+        """
+        return balayage.carte_est_valide(self.graphe)
+
     def est_complet(self):
         """Vrai ssi toutes les liaisons objectives sont effectives
         """
-        retour = True
-        for l in self.flux:
-            if not self.sont_connectés(l.nid, l.but):
-                retour = False
-                break
+        version, retour = self.complétude
+        if version != self.connexité.version:
+            retour = True
+            for l in self.flux:
+                if not self.sont_connectés(l.nid, l.but):
+                    retour = False
+                    break
+            self.complétude = (self.connexité.version, retour)
         return retour
 
     def sont_connectés(self, nid, but):
         """Vrai ssi un chemin existe entre les deux sommets
         """
-        trouvé = False
-        atteints = [nid]
-        nouveaux = [nid]
-        while not (trouvé or len(nouveaux) == 0):
-            muchmuch = list()
-            for s in nouveaux:
-                for l in s.liaisons:
-                    for autre in l.liaisons:
-                        if autre is but:
-                            trouvé = True
-                            break
-                        elif autre not in atteints:
-                            muchmuch.append(autre)
-                            atteints.append(autre)
-                    if trouvé:
-                        break
-                if trouvé:
-                    break
-            nouveaux = muchmuch
-        return trouvé
+        return self.connexité.sont_connectés(nid, but)
 
+    # Opérations du joueur
 
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    random.seed(1977)
-    pygame.init()
-
-    rayon = 10
-
-    noir = (0, 0, 0)
-    # rouge = (255, 0, 0)
-    vert = (0, 255, 0)
-    # bleu = (0, 0, 255)
-    # jaune = (0, 255, 255)
-
-    dimensions = V2(640, 480)
-    écran = pygame.display.set_mode(dimensions.en_tuple())
-
-    # Chargement du niveau
-    NIVEAU = Niveau()
-    NIVEAU.charger("niveau-1.0.json")
-
-    # Boucle d'interaction
-    point = None  # Nœud sélectionné
-    modif = True
-    while True:
-        if modif:
-            écran.fill(noir)
-
-            # Liaisons
-            for l in sorted(NIVEAU.graphe.iter_liens(),
-                            key=lambda l: l["palier"]):
-                pygame.draw.line(écran, l["couleur"],
-                                 l.liaisons[0]["position"].en_tuple(),
-                                 l.liaisons[1]["position"].en_tuple(), rayon)
-            # Sommets
-            for n in NIVEAU.graphe.iter_nœuds():
-                pygame.draw.circle(écran, n["couleur"],
-                                   n["position"].en_tuple(), rayon)
-            # Obstacles
-            for o in NIVEAU.obstacles:
-                pygame.draw.rect(écran, vert,
-                                 (o.coin_min.en_tuple(),
-                                  (o.coin_max - o.coin_min).en_tuple()))
-
-            pygame.display.flip()
-
-            modif = False
-
-        if NIVEAU.est_complet():
-            logging.info("Bravo !")
-
-        évt = pygame.event.wait()
-        # print(évt)
-        if (évt.type == pygame.KEYDOWN and évt.key == pygame.K_ESCAPE):
-            break
-
-        modif = False
-        if évt.type == pygame.MOUSEBUTTONUP:
-            if point is not None:
-                nœud, dn = nœud_proche(NIVEAU.graphe, point["position"], point)
-                if dn <= rayon:
-                    logging.info("Fusion de deux nœuds")
-                    logging.debug("*** Avant")
-                    logging.debug(NIVEAU.graphe)
-                    if nœud["amovible"]:
-                        NIVEAU.graphe.fusionner_nœuds(nœud, point)
-                    else:
-                        NIVEAU.graphe.fusionner_nœuds(point, nœud)
-                    logging.debug("*** Après")
-                    logging.debug(NIVEAU.graphe)
-                    modif = True
-
-                point = None
-
-        elif évt.type == pygame.MOUSEBUTTONDOWN:
-            logging.debug("*** Avant")
-            logging.debug(NIVEAU.graphe)
-            position = V2.de_tuple(évt.pos)
-            nœud, dn = nœud_proche(NIVEAU.graphe, position)
-            lien, dl = lien_proche(NIVEAU.graphe, position)
-            if dn <= rayon:
-                if nœud["amovible"]:
-                    logging.info("Sélection d'un nœud")
-                    if évt.button == 1:
-                        # Bouton gauche : sélection du nœud
-                        point = nœud
-                    elif évt.button == 3:
-                        # Bouton droit : suppression du nœud
-                        NIVEAU.graphe.supprimer_nœud(nœud)
-                        logging.debug("*** Après")
-                        logging.debug(NIVEAU.graphe)
-                        modif = True
-
-            elif dl <= rayon / 2:
-                logging.info("Sélection d'un lien")
-                if évt.button == 1:
-                    # Bouton gauche : césure du segment
-                    point = NIVEAU.graphe.ajouter_nœud()
-                    point["position"] = position
-                    point["couleur"] = lien["couleur"]
-                    point["amovible"] = True
-                    point["biome"] = Biome.AUCUN
-                    point["palier"] = lien["palier"]
-                    lg = NIVEAU.graphe.ajouter_lien()
-                    lg["couleur"] = lien["couleur"]
-                    lg["palier"] = lien["palier"]
-                    lg.associer(point, lien.liaisons[0])
-                    ld = NIVEAU.graphe.ajouter_lien()
-                    ld["couleur"] = lien["couleur"]
-                    ld["palier"] = lien["palier"]
-                    ld.associer(point, lien.liaisons[1])
-                    NIVEAU.graphe.supprimer_lien(lien)
-                    logging.debug("*** Après")
-                    logging.debug(NIVEAU.graphe)
-                    modif = True
-                elif évt.button == 3:
-                    # Bouton droit: suppression du lien
-                    NIVEAU.graphe.supprimer_lien(lien)
-                    modif = True
-                elif évt.button == 4:
-                    # Molette haut → augmentation du palier
-                    if lien["palier"] + 1 < PALIERS:
-                        lien["palier"] += 1
-                        if not carte_est_valide(NIVEAU.graphe):
-                            lien["palier"] -= 1
-                        else:
-                            lien["couleur"] = augmenter_intensité(
-                                lien["couleur"])
-                            modif = True
-                elif évt.button == 5:
-                    # Molette bas → diminution du palier
-                    if lien["palier"] > 0:
-                        lien["palier"] -= 1
-                        if not carte_est_valide(NIVEAU.graphe):
-                            lien["palier"] += 1
-                        else:
-                            lien["couleur"] = diminuer_intensité(
-                                lien["couleur"])
-                            modif = True
+    def ajouter_nœud(self, position, voisin=None):
+        """Nouveau nœud amovible à la position donnée, relié au nœud
+        'voisin' s'il est fourni, dont il reprend alors couleur et palier
+        """
+        nœud = self.graphe.ajouter_nœud()
+        nœud["position"] = position
+        nœud["couleur"] = couleur_aléatoire(0)
+        nœud["amovible"] = True
+        nœud["biome"] = Biome.AUCUN
+        nœud["palier"] = 0
+        if voisin is not None:
+            nœud["couleur"] = voisin["couleur"]
+            nœud["palier"] = voisin["palier"]
+            lien = self.graphe.ajouter_lien()
+            lien["couleur"] = voisin["couleur"]
+            lien["palier"] = voisin["palier"]
+            lien.associer(voisin, nœud)
+        return nœud
+
+    def couper_lien(self, lien, position):
+        """Remplace le lien par deux liens passant par un nouveau nœud, placé
+        à la position donnée, et retourne ce nœud
+        """
+        nœud = self.graphe.ajouter_nœud()
+        nœud["position"] = position
+        nœud["couleur"] = lien["couleur"]
+        nœud["amovible"] = True
+        nœud["biome"] = Biome.AUCUN
+        nœud["palier"] = lien["palier"]
+        for extrémité in list(lien.liaisons):
+            moitié = self.graphe.ajouter_lien()
+            moitié["couleur"] = lien["couleur"]
+            moitié["palier"] = lien["palier"]
+            moitié.associer(nœud, extrémité)
+        self.graphe.supprimer_lien(lien)
+        return nœud
+
+    def changer_palier(self, lien, sens):
+        """Fait monter (sens 1) ou descendre (sens -1) le lien d'un palier,
+        si le palier existe et que le lien n'y croise aucun autre lien ;
+        vrai si le changement a eu lieu
+        """
+        palier = lien["palier"] + sens
+        retour = 0 <= palier < PALIERS and self.palier_valide(lien, palier)
+        if retour:
+            lien["palier"] = palier
+            if sens > 0:
+                lien["couleur"] = augmenter_intensité(lien["couleur"])
+            else:
+                lien["couleur"] = diminuer_intensité(lien["couleur"])
+        return retour
+
+    def déplacer_nœud(self, nœud, position):
+        """Déplace le nœud à la position donnée, si le mouvement est
+        autorisé ; vrai si le nœud a été déplacé
+        """
+        retour = self.valider_mouvement(nœud, position)
+        if retour:
+            nœud["position"] = position
+        return retour
 
+    def fusionner(self, nœud, rayon):
+        """Fusionne le nœud avec le plus proche autre nœud situé à moins de
+        'rayon', s'il en est ; vrai si la fusion a eu lieu. Un nœud fixe
+        absorbe le nœud fusionné, qui absorbe sinon l'autre nœud.
+        """
+        autre, distance = self.nœud_proche(nœud["position"], nœud,
+                                           rayon=rayon)
+        retour = distance <= rayon
+        if retour:
+            if autre["amovible"]:
+                self.graphe.fusionner_nœuds(autre, nœud)
             else:
-                if NIVEAU.est_dans_un_obstacle(position):
-                    logging.debug("Intersection avec un obstacle")
-                else:
-                    logging.info("Ajout d'un nœud/lien")
-                    # On ajoute un nouveau nœud…
-                    point = NIVEAU.graphe.ajouter_nœud()
-                    point["position"] = position
-                    point["couleur"] = couleur_aléatoire(0)
-                    point["amovible"] = True
-                    point["biome"] = Biome.AUCUN
-                    point["palier"] = 0
-                    # …et éventuellement un nouveau lien
-                    logging.debug(NIVEAU.graphe)
-                    if dn <= 10 * rayon:
-                        point["couleur"] = nœud["couleur"]
-                        point["palier"] = nœud["palier"]
-                        lien = NIVEAU.graphe.ajouter_lien()
-                        lien["couleur"] = nœud["couleur"]
-                        lien["palier"] = nœud["palier"]
-                        lien.associer(nœud, point)
-                    logging.debug("*** Après")
-                    logging.debug(NIVEAU.graphe)
-                    modif = True
-
-            nœud = None
-            lien = None
-
-        elif évt.type == pygame.MOUSEMOTION:
-            if point is not None:
-                position = V2.de_tuple(évt.pos)
-                if NIVEAU.valider_mouvement(point, position):
-                    point["position"] = position
-                    modif = True
-                else:
-                    # La sélection du nœud est perdue : reprise de l'action
-                    # 'pygame.MOUSEBUTTONUP'
-                    nœud, dn = nœud_proche(NIVEAU.graphe, point["position"],
-                                           point)
-                    if dn <= rayon:
-                        logging.info("Fusion de deux nœuds")
-                        logging.debug("*** Avant")
-                        logging.debug(NIVEAU.graphe)
-                        if nœud["amovible"]:
-                            NIVEAU.graphe.fusionner_nœuds(nœud, point)
-                        else:
-                            NIVEAU.graphe.fusionner_nœuds(point, nœud)
-                        logging.debug("*** Après")
-                        logging.debug(NIVEAU.graphe)
-                        modif = True
-
-                    point = None
+                self.graphe.fusionner_nœuds(nœud, autre)
+        return retour
+
+    # Régions d'un monde
+
+    def recoupe(self, région, xmin, ymin, xmax, ymax):
+        """Vrai ssi l'étendue des obstacles de la région de rang donné
+        recoupe le rectangle
+        """
+        *_, x0, y0, x1, y1 = self.données.régions()[région]
+        return x0 <= xmax and xmin <= x1 and y0 <= ymax and ymin <= y1
+
+    def charger_zone(self, xmin, ymin, xmax, ymax):
+        """Charge, s'ils ne le sont déjà, les obstacles des régions pouvant
+        recouper le rectangle donné
+        """
+        if self.données is not None:
+            nouvelles = sorted(
+                k for k in self.régions.dans_rectangle(xmin, ymin, xmax, ymax)
+                if k not in self.chargées
+                and self.recoupe(k, xmin, ymin, xmax, ymax))
+            for k in nouvelles:
+                obstacles = [Obstacle(V2(x0, y0), V2(x1, y1), Biome[rôle])
+                             for rôle, x0, y0, x1, y1
+                             in self.données.obstacles(k)]
+                self.chargées[k] = obstacles
+                self.obstacles.extend(obstacles)
+            self.index_obstacles.compléter()
+
+    def charger_autour(self, *positions):
+        """Charge les régions pouvant recouper la boîte englobant les
+        positions données
+        """
+        if self.données is not None:
+            xs = [p.largeur for p in positions]
+            ys = [p.hauteur for p in positions]
+            self.charger_zone(min(xs), min(ys), max(xs), max(ys))
+
+    def cadrer(self, xmin, ymin, xmax, ymax):
+        """Ne garde en mémoire que les obstacles des régions pouvant recouper
+        le rectangle donné (la vue du joueur), chargées au besoin. Les
+        règles du jeu rechargent d'elles-mêmes les régions qu'elles
+        consultent.
+        """
+        if self.données is not None:
+            gardées = {k: o for k, o in self.chargées.items()
+                       if self.recoupe(k, xmin, ymin, xmax, ymax)}
+            if len(gardées) < len(self.chargées):
+                self.chargées = gardées
+                self.obstacles[:] = [o for k in sorted(gardées)
+                                     for o in gardées[k]]
+                self.index_obstacles.indexer()
+            self.charger_zone(xmin, ymin, xmax, ymax)
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(description=__doc__)
+    analyseur.add_argument("niveau", nargs="?", default="niveau-1.0.json")
+    analyseur.add_argument("--enregistrer", metavar="SESSION",
+                           help="fichier où enregistrer la session, "
+                           "à rejouer avec «session.py»")
+    arguments = analyseur.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Import à la demande : seul le jeu lui-même a besoin de pygame
+    import interface
+    interface.jouer(arguments.niveau, arguments.enregistrer)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Évaluation, sans interface graphique, de réseaux proposés pour un niveau
+
+Un réseau est décrit comme les solutions de «solveur» : liste des points
+«nœuds» ([x, y], un point confondu avec une extrémité de route désignant
+celle-ci) et des tronçons «liens» ([i, j, palier], par rang des points).
+Pour chaque réseau sont établis :
+
+- la validité de la carte (aucun croisement entre liens de même palier) ;
+- le nombre de nœuds placés dans un obstacle et de liens en touchant un ;
+- la complétude (toutes les liaisons du niveau sont reliées).
+
+Les réseaux sont répartis sur un ensemble de processus, dont chacun ne
+charge le niveau qu'une fois : chaque réseau y est construit, évalué, puis
+retiré du graphe.
+"""
+
+# Dépendance(s) standard(s)
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+# Dépendance(s) interne(s)
+import solveur
+import échangeur
+
+# Dépendance(s) externe(s)
+
+
+# Niveau propre à chaque processus d'évaluation
+CONTEXTE = dict()
+
+
+def est_entier(valeur):
+    """Vrai ssi la valeur est un entier (un booléen n'en est pas un)
+    """
+    return isinstance(valeur, int) and not isinstance(valeur, bool)
+
+
+def erreur_de_format(réseau):
+    """Description du premier défaut de forme du réseau, ou None
+
+    Les liens dont les deux extrémités sont confondues sont refusés : qu'ils
+    désignent deux fois la même extrémité de route ou deux nœuds superposés,
+    ils n'ont pas de longueur.
+    """
+    try:
+        points = réseau["nœuds"]
+        for x, y in points:
+            if not all(isinstance(c, (int, float))
+                       and not isinstance(c, bool) for c in (x, y)):
+                return f"point invalide : {[x, y]}"
+        for i, j, palier in réseau["liens"]:
+            if not (est_entier(i) and est_entier(j)
+                    and 0 <= i < len(points) and 0 <= j < len(points)
+                    and i != j):
+                return f"lien invalide : {[i, j]}"
+            if list(points[i]) == list(points[j]):
+                return f"lien de longueur nulle : {[i, j]}"
+            if not (est_entier(palier)
+                    and palier in range(échangeur.PALIERS)):
+                return f"palier invalide : {palier}"
+    except (KeyError, TypeError, ValueError) as e:
+        return f"réseau mal formé : {e!r}"
+    return None
+
+
+def évaluer(niveau, réseau):
+    """Bilan du réseau sur le niveau, qui est rendu inchangé
+
+    Un réseau que le niveau ne peut évaluer est signalé par une erreur dans
+    son bilan, sans interrompre l'évaluation des autres.
+    """
+    erreur = erreur_de_format(réseau)
+    if erreur is not None:
+        return {"erreur": erreur}
+
+    créés = list()
+    try:
+        solveur.appliquer(niveau, réseau, créés)
+        nœuds = [e for e in créés if not e.est_arête]
+        liens = [e for e in créés if e.est_arête]
+        carte_valide = niveau.carte_est_valide()
+        nœuds_en_obstacle = sum(
+            niveau.est_dans_un_obstacle(n["position"]) for n in nœuds)
+        liens_en_obstacle = 0
+        for l in liens:
+            if niveau.touche_un_obstacle(l.liaisons[0]["position"],
+                                         l.liaisons[1]["position"]):
+                liens_en_obstacle += 1
+        complet = niveau.est_complet()
+    except Exception as e:
+        return {"erreur": f"évaluation impossible : {e!r}"}
+    finally:
+        # Les liens d'abord : les nœuds créés n'en ont alors plus aucun
+        for e in reversed(créés):
+            if e.est_arête:
+                niveau.graphe.supprimer_lien(e)
+            else:
+                niveau.graphe.supprimer_nœud(e)
+
+    return {"valide": (carte_valide and nœuds_en_obstacle == 0
+                       and liens_en_obstacle == 0),
+            "carte_valide": carte_valide,
+            "nœuds_en_obstacle": nœuds_en_obstacle,
+            "liens_en_obstacle": liens_en_obstacle,
+            "complet": complet}
+
+
+def initialiser(nom_fichier, moteur):
+    """Prépare un processus d'évaluation, dont le niveau se passe des
+    services du jeu interactif (voir «Niveau.détacher_services»)
+    """
+    niveau = échangeur.Niveau(moteur)
+    niveau.charger(nom_fichier)
+    niveau.détacher_services()
+    CONTEXTE["niveau"] = niveau
+
+
+def évaluer_dans_processus(réseau):
+    return évaluer(CONTEXTE["niveau"], réseau)
+
+
+def évaluer_lot(nom_fichier, réseaux, processus=None, moteur=None):
+    """Bilans des réseaux sur le niveau, dans l'ordre des réseaux
+    """
+    réseaux = list(réseaux)
+    lot = max(1, len(réseaux) // (4 * (processus or os.cpu_count() or 1)))
+    with concurrent.futures.ProcessPoolExecutor(
+            processus, initializer=initialiser,
+            initargs=(nom_fichier, moteur)) as exécuteur:
+        retour = list(exécuteur.map(évaluer_dans_processus, réseaux,
+                                    chunksize=lot))
+    return retour
+
+
+if __name__ == "__main__":
+    analyseur = argparse.ArgumentParser(
+        description="Évaluation de réseaux proposés pour un niveau")
+    analyseur.add_argument("niveau")
+    analyseur.add_argument("réseaux", help="fichier de réseaux, à raison "
+                           "d'un objet JSON par ligne")
+    analyseur.add_argument("--processus", type=int)
+    analyseur.add_argument("--moteur",
+                           choices=[m.name for m in échangeur.Moteur])
+    arguments = analyseur.parse_args()
+
+    with open(arguments.réseaux, "rt", encoding="utf-8") as entrée:
+        réseaux = [json.loads(l) for l in entrée if l.strip()]
+    moteur = None
+    if arguments.moteur is not None:
+        moteur = échangeur.Moteur[arguments.moteur]
+
+    début = time.perf_counter()
+    bilans = évaluer_lot(arguments.niveau, réseaux, arguments.processus,
+                         moteur)
+    durée = time.perf_counter() - début
+    for k, b in enumerate(bilans):
+        print(json.dumps(dict(numéro=k, **b), ensure_ascii=False))
+    print(f"{len(bilans)} réseaux en {durée:.2f} s "
+          f"({len(bilans) / durée:.1f} réseaux/s)", file=sys.stderr)